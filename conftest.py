@@ -54,6 +54,29 @@ def CommentSerializer():
     return CommentSerializer
 
 
+@pytest.fixture()
+def assert_query_budget(db):
+    """Check the queries of a list view against its `query_budget`
+
+    The list is rendered at two page sizes, and the number of queries must
+    be the same for both, so it does not grow with the number of rows.
+    """
+    from tests.utils import count_list_queries
+
+    def assert_query_budget(viewset, small_page=2, large_page=5):
+        small = count_list_queries(viewset, small_page)
+        large = count_list_queries(viewset, large_page)
+
+        assert small == large, \
+            "%d queries for %d rows, but %d queries for %d rows" % (
+                small, small_page, large, large_page)
+        assert large <= viewset.query_budget, \
+            "%d queries, over the budget of %d" % (
+                large, viewset.query_budget)
+
+    return assert_query_budget
+
+
 def pytest_configure():
     from django.conf import settings
     try:
@@ -83,6 +106,7 @@ def pytest_configure():
             'django.contrib.contenttypes',
 
             'rest_framework',
+            'rest_framework_json_api',
             'tests',
         ),
         PASSWORD_HASHERS=(
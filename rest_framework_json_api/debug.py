@@ -0,0 +1,90 @@
+"""
+Debug data for the `meta` of rendered documents
+
+A `DebugCollector` is started by `DebugMetaMixin` once the view has chosen
+its renderer, captures the queries of the view and the renderer, and is
+stopped by the renderer before the document is encoded.
+"""
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from timeit import default_timer
+
+
+class DebugCollector(object):
+
+    def __init__(self):
+        self.queries = CaptureQueriesContext(connection)
+        self.timings = {}
+        self.started = None
+        self.query_count = None
+        self.db_time = None
+
+    def start(self):
+        self.queries.__enter__()
+        self.started = default_timer()
+
+        return self
+
+    def stop(self):
+        """Stop capturing queries, returning False if already stopped"""
+        if self.query_count is not None:
+            return False
+
+        self.queries.__exit__(None, None, None)
+
+        # The captured queries are read from the connection, which is reset
+        # by later requests, so they are counted right away
+        self.query_count = len(self.queries)
+        self.db_time = sum(
+            float(query["time"]) for query in self.queries.captured_queries)
+
+        return True
+
+    def lap(self, name):
+        """Record the time since the start or the previous lap as `name`"""
+        now = default_timer()
+        self.timings[name] = now - self.started
+        self.started = now
+
+    def as_meta(self, document, dict_class=dict):
+        """Return the debug data of a document, with the resource counts"""
+        resources = dict_class()
+        linked = dict_class()
+
+        for key, value in document.items():
+            if key in ("errors", "links", "linked", "meta"):
+                continue
+
+            if isinstance(value, list):
+                resources[key] = len(value)
+            else:
+                resources[key] = int(value is not None)
+
+        for key, value in document.get("linked", {}).items():
+            linked[key] = len(value)
+
+        return self.counts_as_meta(resources, linked, dict_class)
+
+    def counts_as_meta(self, resources, linked, dict_class=dict):
+        """Return the debug data for the number of resources of each type
+
+        Used by writers, which do not build the document as a dictionary.
+        """
+        meta = dict_class()
+        meta["queries"] = self.query_count
+        meta["db_time"] = self.db_time
+        meta["resources"] = resources
+        meta["linked"] = linked
+        meta["timings"] = dict_class(self.timings)
+
+        return meta
+
+    def server_timing(self):
+        """Return the timings as a `Server-Timing` header, in milliseconds"""
+        timings = [("db", self.db_time or 0.0)]
+        timings.extend(sorted(self.timings.items()))
+
+        return ", ".join(
+            "%s;dur=%.3f" % (name, seconds * 1000)
+            for name, seconds in timings)
@@ -0,0 +1,253 @@
+from django.core.exceptions import ValidationError
+from django.db.models.fields import FieldDoesNotExist
+from rest_framework import filters
+from rest_framework.exceptions import ParseError
+from rest_framework_json_api.utils import is_related_many
+
+
+def is_indexed(model, name):
+    """Return True when the field is the first column of an index
+
+    To-many relations are looked up through the foreign key column of the
+    related model, or the foreign keys of the through table, which is
+    indexed.
+    """
+    try:
+        field, _, direct, m2m = model._meta.get_field_by_name(name)
+    except FieldDoesNotExist:
+        return False
+
+    if m2m:
+        return True
+
+    if not direct:
+        return field.field.db_index
+
+    if field.primary_key or field.unique or field.db_index:
+        return True
+
+    return any(
+        fields[0] in (field.name, field.attname)
+        for fields in model._meta.index_together
+    )
+
+
+def get_lookup(model, name):
+    """Return the ORM lookup of a field of the model
+
+    To-one relations to the primary key of the related model are looked up
+    by their foreign key column, without a join.
+    """
+    try:
+        model_field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return name
+
+    rel = getattr(model_field, "rel", None)
+
+    if rel is None:
+        return name
+
+    if rel.field_name == rel.to._meta.pk.name:
+        return model_field.attname
+
+    return name + "__pk"
+
+
+class JsonApiSortFilter(filters.BaseFilterBackend):
+    """
+    Order list views by the `sort` query parameter
+
+    The parameter is a comma separated list of field names of the
+    serializer, each optionally prefixed with `-` for a descending order:
+
+    /posts/?sort=-created,title
+
+    Names are translated to the sources of the fields, and the queryset is
+    ordered by the database, before it is paginated.  The primary key is
+    added last, so pages are stable.  To-one relations are sorted by their
+    foreign key column, like `JsonApiFilter` filters them, and not by the
+    ordering of the related model.  Only the fields listed in the
+    `sort_fields` of the view, or whose source is an indexed column of the
+    model, can be sorted by, so sorting never needs a full table sort.
+    Other names are rejected with a 400 error.
+
+    The sortable fields of each view class and serializer class are
+    computed once, and kept in `plans`.
+    """
+
+    plans = {}
+    sort_param = 'sort'
+
+    def filter_queryset(self, request, queryset, view):
+        sort = request.GET.get(self.sort_param, None)
+
+        if not sort:
+            return queryset
+
+        plan = self.get_plan(view, queryset.model)
+        ordering = []
+
+        for key in sort.split(","):
+            descending = key.startswith("-")
+            name = key[1:] if descending else key
+
+            if not name or not (name[0].isalnum() or name[0] == "_"):
+                raise ParseError(
+                    'Invalid sort key "%s", only a "-" prefix for a '
+                    'descending order is supported.' % key)
+
+            if name not in plan:
+                raise ParseError('Sorting by "%s" is not supported.' % name)
+
+            ordering.append(("-" if descending else "") + plan[name])
+
+        ordering.append("pk")
+
+        return queryset.order_by(*ordering)
+
+    def get_plan(self, view, model):
+        key = (view.__class__, view.get_serializer_class(), model)
+        plan = self.plans.get(key, None)
+
+        if plan is None:
+            plan = self.compile_plan(view, model)
+            self.plans[key] = plan
+
+        return plan
+
+    def compile_plan(self, view, model):
+        """Return the ORM lookup of each sortable field of the serializer"""
+        serializer = view.get_serializer()
+        allowed = getattr(view, "sort_fields", ())
+        plan = {}
+
+        for field_name, field in serializer.fields.items():
+            if is_related_many(field):
+                continue
+
+            source = getattr(field, "source", None) or field_name
+
+            if source == "*":
+                continue
+
+            lookup = source.replace(".", "__")
+
+            if field_name in allowed or self.is_indexed(model, lookup):
+                plan[field_name] = get_lookup(model, lookup)
+
+        return plan
+
+    def is_indexed(self, model, lookup):
+        """Return True when the lookup is the first column of an index"""
+        return is_indexed(model, lookup)
+
+
+class JsonApiFilter(filters.BaseFilterBackend):
+    """
+    Filter list views by the `filter[<field>]` query parameters
+
+    Each parameter names a field of the serializer, and takes a value or a
+    comma separated list of values:
+
+    /posts/?filter[author]=3&filter[title]=foo
+    /posts/?filter[author]=3,4
+
+    Names are translated to the sources of the fields.  To-one relations
+    are filtered by the foreign key column of the model, so filtering by
+    the id of a related resource does not join its table, and to-many
+    relations return each resource once.  Only the fields listed in the
+    `filter_fields` of the view can be filtered by.  When the
+    `filter_require_index` of the view is set, fields whose column is not
+    indexed are also rejected, so filters never need a full table scan.
+    Other names and invalid values are rejected with a 400 error.
+
+    The lookups of each view class, serializer class and set of filtered
+    fields are computed once, and kept in `plans`.
+    """
+
+    plans = {}
+    filter_prefix = 'filter['
+    require_index = False
+
+    def filter_queryset(self, request, queryset, view):
+        params = self.get_filter_params(request)
+
+        if not params:
+            return queryset
+
+        plan = self.get_plan(view, queryset.model, params)
+        distinct = False
+
+        for name, lookup, many in plan:
+            values = params[name].split(",")
+            distinct = distinct or many
+
+            try:
+                if len(values) == 1:
+                    queryset = queryset.filter(**{lookup: values[0]})
+                else:
+                    queryset = queryset.filter(**{lookup + "__in": values})
+            except (TypeError, ValueError, ValidationError):
+                raise ParseError('Invalid value for filter "%s".' % name)
+
+        if distinct:
+            queryset = queryset.distinct()
+
+        return queryset
+
+    def get_filter_params(self, request):
+        """Return the filtered field names and their raw values"""
+        prefix = self.filter_prefix
+
+        return dict(
+            (key[len(prefix):-1], value)
+            for key, value in request.GET.items()
+            if key.startswith(prefix) and key.endswith("]")
+        )
+
+    def get_plan(self, view, model, params):
+        names = tuple(sorted(params))
+        key = (view.__class__, view.get_serializer_class(), model, names)
+        plan = self.plans.get(key, None)
+
+        if plan is None:
+            plan = self.compile_plan(view, model, names)
+            self.plans[key] = plan
+
+        return plan
+
+    def compile_plan(self, view, model, names):
+        """Return the ORM lookup of each filtered field of the serializer"""
+        serializer = view.get_serializer()
+        allowed = getattr(view, "filter_fields", ())
+        require_index = getattr(
+            view, "filter_require_index", self.require_index)
+        plan = []
+
+        for name in names:
+            field = serializer.fields.get(name, None)
+            source = getattr(field, "source", None) or name
+
+            if field is None or name not in allowed or source == "*":
+                raise ParseError('Filtering by "%s" is not supported.' % name)
+
+            if require_index and not self.is_indexed(model, source):
+                raise ParseError('Filtering by "%s" is not supported.' % name)
+
+            many = is_related_many(field)
+            lookup = self.get_lookup(model, source, many)
+            plan.append((name, lookup, many))
+
+        return tuple(plan)
+
+    def get_lookup(self, model, source, many):
+        """Return the ORM lookup of a source"""
+        if "." in source or many:
+            return source.replace(".", "__")
+
+        return get_lookup(model, source)
+
+    def is_indexed(self, model, source):
+        """Return True when the source is the first column of an index"""
+        return is_indexed(model, source)
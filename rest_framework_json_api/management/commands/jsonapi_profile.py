@@ -0,0 +1,149 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils.six import StringIO
+from optparse import make_option
+import cProfile
+import os
+import pstats
+
+
+class Command(BaseCommand):
+    """
+    Profile the rendering of an endpoint
+
+    The url is requested in-process with the test client, `--repeat` times,
+    under `cProfile`.  The time spent parsing the request, serializing the
+    data and rendering the document is reported separately, along with the
+    top hotspots, the number of queries and the size of the document.
+    """
+
+    args = '<url>'
+    help = 'Profile the parsing, serialization and rendering of a url.'
+
+    option_list = BaseCommand.option_list + (
+        make_option(
+            '--repeat', type='int', default=10,
+            help='Number of profiled requests.  Defaults to 10.'),
+        make_option(
+            '--method', default='GET',
+            help='HTTP method of the requests.  Defaults to GET.'),
+        make_option(
+            '--data', default=None,
+            help='File with the body of the requests.'),
+        make_option(
+            '--content-type', dest='content_type',
+            default='application/vnd.api+json',
+            help='Content type of the body of the requests.'),
+        make_option(
+            '--accept', default='application/vnd.api+json',
+            help='Accept header of the requests.'),
+        make_option(
+            '--host', default=None,
+            help='Host of the requests.  Defaults to the first allowed '
+                 'host.'),
+        make_option(
+            '--limit', type='int', default=20,
+            help='Number of hotspots to print.  Defaults to 20.'),
+        make_option(
+            '--sort', default='cumulative',
+            help='Order of the hotspots, as a pstats sort key.  Defaults '
+                 'to cumulative.'),
+        make_option(
+            '--output', default=None,
+            help='Write the profile to a file, which can be loaded with '
+                 'pstats or other profile viewers.'),
+    )
+
+    # The outermost call of each phase, as (file name suffix, function name)
+    phases = (
+        ('Parsing', 'rest_framework_json_api/parsers.py', 'parse'),
+        ('Serialization', 'rest_framework/serializers.py', 'data'),
+        ('Rendering', 'rest_framework_json_api/renderers.py', 'render'),
+    )
+
+    def handle(self, *args, **options):
+        if len(args) != 1:
+            raise CommandError('A single url to profile is required.')
+
+        url = args[0]
+        repeat = options['repeat']
+
+        if repeat < 1:
+            raise CommandError('--repeat must be at least 1.')
+
+        body = b''
+
+        if options['data']:
+            with open(options['data'], 'rb') as data_file:
+                body = data_file.read()
+
+        client = Client(SERVER_NAME=options['host'] or self.get_host())
+        method = options['method'].lower()
+
+        def request():
+            return client.generic(
+                method, url, data=body,
+                content_type=options['content_type'],
+                HTTP_ACCEPT=options['accept'])
+
+        # Warm up the caches before profiling, and count the queries
+        with CaptureQueriesContext(connection) as queries:
+            response = request()
+
+        # Later requests reset the queries captured by the context
+        query_count = len(queries)
+
+        profiler = cProfile.Profile()
+
+        for _ in range(repeat):
+            profiler.enable()
+            request()
+            profiler.disable()
+
+        if options['output']:
+            profiler.dump_stats(options['output'])
+
+        hotspots = StringIO()
+        stats = pstats.Stats(profiler, stream=hotspots)
+
+        self.stdout.write('%s %s: %d, %d bytes, %d queries' % (
+            options['method'].upper(), url, response.status_code,
+            len(response.content), query_count))
+
+        total = stats.total_tt / repeat
+        self.stdout.write('%d requests, %.2f ms per request' % (
+            repeat, total * 1000))
+
+        for name, time in self.get_phase_times(stats):
+            self.stdout.write('%s: %.2f ms per request' % (
+                name, time * 1000 / repeat))
+
+        stats.sort_stats(options['sort']).print_stats(options['limit'])
+        self.stdout.write(hotspots.getvalue())
+
+        if options['output']:
+            self.stdout.write('Profile written to %s' % (
+                os.path.abspath(options['output'])))
+
+    def get_host(self):
+        for host in getattr(settings, 'ALLOWED_HOSTS', []):
+            if '*' not in host and not host.startswith('.'):
+                return host
+
+        return 'testserver'
+
+    def get_phase_times(self, stats):
+        """Return the cumulative time of the outermost call of each phase"""
+        for name, file_name, function_name in self.phases:
+            times = [
+                cumulative
+                for (path, _, function), (_, _, _, cumulative, _)
+                in stats.stats.items()
+                if function == function_name and
+                path.replace(os.sep, '/').endswith(file_name)
+            ]
+
+            yield name, max(times) if times else 0.0
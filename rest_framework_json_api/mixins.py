@@ -0,0 +1,1025 @@
+from django.core import signing
+from django.core.exceptions import ValidationError
+from collections import OrderedDict
+from django.core.paginator import InvalidPage, Paginator
+from django.core.urlresolvers import resolve
+from django.db import connection, transaction
+from django.db.models.fields import FieldDoesNotExist
+from django.http import Http404, HttpResponse
+from django.utils import encoding, six, timezone, translation
+from django.utils.dateparse import parse_datetime
+from rest_framework import exceptions, permissions, relations, status
+from rest_framework.request import clone_request
+from rest_framework.response import Response
+from rest_framework_json_api.debug import DebugCollector
+from rest_framework_json_api.renderers import JsonApiMixin
+from rest_framework_json_api.sql import NotSupported, ResourceCompiler
+from rest_framework_json_api.utils import (
+    Linkage, get_class_cache, get_credentials, get_related_field,
+    is_jsonpatch, is_related_many, model_from_obj, model_to_resource_type,
+    pk_to_representation
+)
+from rest_framework_json_api.writers import EncodedResources
+from timeit import default_timer
+import copy
+import datetime
+import threading
+
+try:
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:
+    ThreadPoolExecutor = None
+
+try:
+    from rest_framework.templatetags.rest_framework import replace_query_param
+except ImportError:
+    from rest_framework.utils.urls import replace_query_param
+
+
+class JsonPatchMixin(object):
+    """
+    Apply JSON Patch extension documents sent to the list view.
+
+    The parser converts the document into a list of operations.  Operations
+    are applied in a single transaction, and are grouped so that the
+    resources being replaced or removed are fetched with one query and the
+    removals are done with one `DELETE` query.  Operations following the
+    removal of a resource cannot change it, as if it was already deleted,
+    and ids that are not valid primary keys are rejected with a 400 error
+    before anything is applied.  Additions and replacements still go
+    through the serializer, so validation and `save` hooks behave like they
+    do for `create` and `partial_update`.
+
+    The `JsonApiRouter` maps `PATCH` requests on the list route to
+    `patch_list`.
+    """
+
+    def patch_list(self, request, *args, **kwargs):
+        if not is_jsonpatch(request.content_type):
+            raise exceptions.UnsupportedMediaType(request.content_type)
+
+        try:
+            operations = request.data
+        except AttributeError:
+            operations = request.DATA
+
+        with transaction.atomic():
+            results = self.apply_operations(operations)
+
+        if not any(result is not None for result in results):
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        return Response(results)
+
+    def apply_operations(self, operations):
+        queryset = self.filter_queryset(self.get_queryset())
+        pks = self.get_operation_pks(queryset.model, operations)
+
+        instances = dict(
+            (encoding.force_text(pk), instance)
+            for pk, instance in queryset.in_bulk(set(pks.values())).items())
+
+        results = []
+        removed = []
+
+        for index, operation in enumerate(operations):
+            instance = None
+
+            if operation["id"] is not None:
+                pk = pks[operation["id"]]
+                instance = instances.get(encoding.force_text(pk), None)
+
+                # Removals are deferred, but the removed resources are gone
+                # for the operations that follow them
+                if instance is None or pk in removed:
+                    raise Http404
+
+                self.check_object_permissions(self.request, instance)
+
+            if operation["op"] == "remove":
+                removed.append(pk)
+                results.append(None)
+                continue
+
+            serializer = self.get_serializer(
+                instance, data=operation["data"], partial=instance is not None)
+
+            if not serializer.is_valid():
+                errors = [{} for _ in range(index)]
+                errors.append(serializer.errors)
+
+                raise exceptions.ValidationError(errors)
+
+            serializer.save()
+            results.append(serializer.data)
+
+        if removed:
+            queryset.filter(pk__in=removed).delete()
+
+        return results
+
+    def get_operation_pks(self, model, operations):
+        """Map the ids of the operations to primary keys of the model"""
+        pks = {}
+
+        for operation in operations:
+            if operation["id"] is None or operation["id"] in pks:
+                continue
+
+            try:
+                pks[operation["id"]] = model._meta.pk.to_python(
+                    operation["id"])
+            except ValidationError:
+                raise exceptions.ParseError(
+                    'Invalid resource id "%s".' % operation["id"])
+
+        return pks
+
+
+class DatabaseJsonMixin(object):
+    """
+    Build the resources of list views in the database
+
+    For serializers made only of model attributes and relations to primary
+    keys, each resource is built as JSON by the database (with the JSON1
+    functions of SQLite, or the JSON functions of PostgreSQL) and spliced
+    into the document by the renderer.  This skips the serializer and the
+    conversion of rows into dictionaries.
+
+    Any other serializer, database or renderer falls back to the normal
+    `list` view.
+    """
+
+    def list(self, request, *args, **kwargs):
+        renderer = getattr(request, "accepted_renderer", None)
+
+        if not isinstance(renderer, JsonApiMixin) or \
+                "write_encoded" not in renderer.wrappers:
+            return super(DatabaseJsonMixin, self).list(
+                request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer = self.get_serializer()
+
+        try:
+            compiler = ResourceCompiler(
+                renderer, serializer, queryset, request)
+            sql, params = compiler.compile()
+        except NotSupported:
+            return super(DatabaseJsonMixin, self).list(
+                request, *args, **kwargs)
+
+        resources = queryset.extra(
+            select={"_jsonapi_resource": sql}, select_params=params,
+        ).values_list("_jsonapi_resource", flat=True)
+
+        pagination = None
+        page = self.paginate_queryset(resources)
+
+        if page is not None:
+            resources = page.object_list
+            pagination = self.get_encoded_pagination(page)
+        elif renderer.max_resources is not None:
+            # One more resource is enough for the renderer to see the limit
+            resources = resources[:renderer.max_resources + 1]
+
+        return Response(EncodedResources(
+            resources, links=compiler.links, pagination=pagination))
+
+    def get_encoded_pagination(self, page):
+        url = self.request.build_absolute_uri()
+
+        pagination = {
+            "count": page.paginator.count,
+            "next": None,
+            "previous": None,
+        }
+
+        if page.has_next():
+            pagination["next"] = replace_query_param(
+                url, self.page_kwarg, page.next_page_number())
+
+        if page.has_previous():
+            pagination["previous"] = replace_query_param(
+                url, self.page_kwarg, page.previous_page_number())
+
+        return pagination
+
+
+class InFlightRequest(object):
+    """A request being handled, which identical requests can wait for"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+class CoalesceMixin(object):
+    """
+    Share the response of identical concurrent `GET` requests
+
+    The first request is handled normally, and the identical requests made
+    while it runs, in the same process, wait for it and get a copy of its
+    encoded response instead of being handled again.  Requests are identical
+    when `get_coalesce_key` returns the same key: the view class, path, query
+    string, `Accept` header and the scope of `get_coalesce_scope`.
+
+    Waiting requests are handled normally when the first one fails, does not
+    return a 200 response, or takes more than `coalesce_timeout` seconds.
+    They are not authenticated, checked or throttled themselves, so the scope
+    must include everything the permissions depend on.
+    """
+
+    coalesce_in_flight = {}
+    coalesce_lock = threading.Lock()
+    coalesce_timeout = 10.0
+
+    def dispatch(self, request, *args, **kwargs):
+        key = self.get_coalesce_key(request)
+
+        if key is None:
+            return super(CoalesceMixin, self).dispatch(
+                request, *args, **kwargs)
+
+        with self.coalesce_lock:
+            in_flight = self.coalesce_in_flight.get(key, None)
+            leader = in_flight is None
+
+            if leader:
+                in_flight = InFlightRequest()
+                self.coalesce_in_flight[key] = in_flight
+
+        if not leader:
+            in_flight.done.wait(self.coalesce_timeout)
+
+            if in_flight.result is not None:
+                content, headers = in_flight.result
+                response = HttpResponse(content)
+
+                for header, value in headers:
+                    response[header] = value
+
+                return response
+
+            return super(CoalesceMixin, self).dispatch(
+                request, *args, **kwargs)
+
+        try:
+            response = super(CoalesceMixin, self).dispatch(
+                request, *args, **kwargs)
+
+            if hasattr(response, "render") and callable(response.render):
+                response.render()
+
+            if response.status_code == status.HTTP_200_OK:
+                in_flight.result = (response.content, list(response.items()))
+
+            return response
+        finally:
+            with self.coalesce_lock:
+                self.coalesce_in_flight.pop(key, None)
+
+            in_flight.done.set()
+
+    def get_coalesce_key(self, request):
+        """Return the key of identical requests, or None to not coalesce"""
+        if request.method != "GET":
+            return None
+
+        return (
+            self.__class__,
+            request.path,
+            request.META.get("QUERY_STRING", ""),
+            request.META.get("HTTP_ACCEPT", ""),
+            self.get_coalesce_scope(request),
+        )
+
+    def get_coalesce_scope(self, request):
+        """Return the credentials that identical requests must share
+
+        The `Authorization` header and the session cookie are used by
+        default.
+        """
+        return get_credentials(request)
+
+
+class CachedResponseHit(Exception):
+    """Raised by `StaleWhileRevalidateMixin.initial` to serve the cache"""
+
+    def __init__(self, response):
+        self.response = response
+
+
+class StaleWhileRevalidateMixin(object):
+    """
+    Serve cached responses of `GET` requests, refreshed in the background
+
+    Responses are cached in the process for `swr_stale_after` seconds.
+    Older responses are still served until they are `swr_expire_after`
+    seconds old, while the request is handled again in the background to
+    refresh them, at most once at a time for each cached response.  Expired
+    responses are refreshed by the request itself.
+
+    The cache is only read once the request is authenticated, and has passed
+    the permission and throttling checks of `initial`.  Responses are cached
+    by view class, path, query string, `Accept` header and the scope of
+    `get_swr_scope`, the authenticated user by default.  Object permissions
+    are only checked when a response is rendered, so views whose object
+    permissions can change for a user within `swr_expire_after` should not
+    use the mixin, or add what they depend on to the scope.
+
+    Each view class has its own cache, which keeps at most `swr_max_entries`
+    responses, evicting the oldest ones.  Refreshes run on `swr_executor`, a
+    shared pool of `swr_max_workers` threads by default, or a thread per
+    refresh without `concurrent.futures`.  The view is found by resolving
+    the path, so it must be routed.
+    """
+
+    swr_executor = None
+    swr_expire_after = 60.0
+    swr_key = None
+    swr_lock = threading.Lock()
+    swr_max_entries = 100
+    swr_max_workers = 2
+    swr_stale_after = 5.0
+
+    @classmethod
+    def get_swr_cache(cls):
+        return get_class_cache(cls, "swr_cache", OrderedDict)
+
+    @classmethod
+    def get_swr_refreshing(cls):
+        """Return the keys of the responses being refreshed"""
+        return get_class_cache(cls, "swr_refreshing", set)
+
+    def dispatch(self, request, *args, **kwargs):
+        response = super(StaleWhileRevalidateMixin, self).dispatch(
+            request, *args, **kwargs)
+
+        if self.swr_key is not None:
+            self.cache_swr_response(self.swr_key, response)
+
+        return response
+
+    def initial(self, request, *args, **kwargs):
+        super(StaleWhileRevalidateMixin, self).initial(
+            request, *args, **kwargs)
+
+        key = self.get_swr_key(request)
+
+        if key is None:
+            return
+
+        django_request = getattr(request, "_request", request)
+
+        if not getattr(django_request, "_jsonapi_swr_refresh", False):
+            entry = self.get_swr_cache().get(key, None)
+
+            if entry is not None:
+                age = default_timer() - entry[0]
+
+                if age < self.swr_expire_after:
+                    if age >= self.swr_stale_after:
+                        self.schedule_swr_refresh(key, django_request)
+
+                    raise CachedResponseHit(
+                        self.cached_swr_response(entry, age))
+
+        self.swr_key = key
+
+    def handle_exception(self, exc):
+        if isinstance(exc, CachedResponseHit):
+            return exc.response
+
+        return super(StaleWhileRevalidateMixin, self).handle_exception(exc)
+
+    def cache_swr_response(self, key, response):
+        if hasattr(response, "render") and callable(response.render):
+            response.render()
+
+        if response.status_code != status.HTTP_200_OK:
+            return
+
+        entry = (default_timer(), response.content, list(response.items()))
+        cache = self.get_swr_cache()
+
+        with self.swr_lock:
+            cache.pop(key, None)
+
+            while cache and len(cache) >= self.swr_max_entries:
+                cache.popitem(last=False)
+
+            cache[key] = entry
+
+    def cached_swr_response(self, entry, age):
+        _, content, headers = entry
+        response = HttpResponse(content)
+
+        for header, value in headers:
+            response[header] = value
+
+        response["Age"] = str(int(age))
+
+        return response
+
+    def get_swr_key(self, request):
+        """Return the key of the cached response, or None to not cache"""
+        if request.method != "GET":
+            return None
+
+        return (
+            request.path,
+            request.META.get("QUERY_STRING", ""),
+            request.META.get("HTTP_ACCEPT", ""),
+            self.get_swr_scope(request),
+        )
+
+    def get_swr_scope(self, request):
+        """Return what the cached responses of a request depend on
+
+        The authenticated user is used by default, so users never share
+        cached responses.
+        """
+        user = getattr(request, "user", None)
+
+        return (type(user), getattr(user, "pk", None))
+
+    def get_swr_executor(self):
+        """Return the executor of refreshes, shared by views without one"""
+        if self.swr_executor is None and ThreadPoolExecutor is not None:
+            cls = StaleWhileRevalidateMixin
+
+            with cls.swr_lock:
+                if cls.swr_executor is None:
+                    cls.swr_executor = ThreadPoolExecutor(
+                        max_workers=self.swr_max_workers)
+
+        return self.swr_executor
+
+    def schedule_swr_refresh(self, key, request):
+        refreshing = self.get_swr_refreshing()
+
+        with self.swr_lock:
+            if key in refreshing:
+                return
+
+            refreshing.add(key)
+
+        refresh_request = copy.copy(request)
+        refresh_request._jsonapi_swr_refresh = True
+
+        args = (key, refresh_request, threading.current_thread())
+        executor = self.get_swr_executor()
+
+        try:
+            if executor is not None:
+                executor.submit(self.refresh_swr_response, *args)
+            else:
+                thread = threading.Thread(
+                    target=self.refresh_swr_response, args=args)
+                thread.daemon = True
+                thread.start()
+        except Exception:
+            with self.swr_lock:
+                refreshing.discard(key)
+
+            raise
+
+    def refresh_swr_response(self, key, request, requesting_thread):
+        """Handle the request again, which caches the new response"""
+        try:
+            match = resolve(
+                request.path_info, getattr(request, "urlconf", None))
+            match.func(request, *match.args, **match.kwargs)
+        finally:
+            with self.swr_lock:
+                self.get_swr_refreshing().discard(key)
+
+            # Background threads have their own database connection
+            if threading.current_thread() is not requesting_thread:
+                connection.close()
+
+
+class DebugMetaMixin(object):
+    """
+    Add debug data to the `meta` of the documents of a view
+
+    When the renderer's `use_debug_meta` allows it, the queries of the view
+    and the renderer are captured, and the renderer adds their count and
+    time, the number of resources and linked resources of each type, and
+    the time spent serializing and converting the data to the `meta`.
+
+    Nothing is captured or timed for the other requests.
+    """
+
+    jsonapi_debug = None
+
+    def initial(self, request, *args, **kwargs):
+        super(DebugMetaMixin, self).initial(request, *args, **kwargs)
+
+        renderer = getattr(request, "accepted_renderer", None)
+
+        if isinstance(renderer, JsonApiMixin) and \
+                renderer.use_debug_meta(request):
+            self.jsonapi_debug = DebugCollector().start()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super(DebugMetaMixin, self).finalize_response(
+            request, response, *args, **kwargs)
+
+        # Only the renderer of a `Response` stops capturing the queries
+        if self.jsonapi_debug is not None and \
+                not isinstance(response, Response):
+            self.jsonapi_debug.stop()
+
+        return response
+
+
+class OptionsCacheMixin(object):
+    """
+    Cache the rendered documents of `OPTIONS` requests
+
+    Building the metadata of a view instantiates its serializer and walks
+    every field, but the metadata only changes with the code.  Documents
+    rendered by JSON API renderers are cached in `options_cache`, keyed by
+    `get_options_cache_key`: the view class and its suffix, renderers and
+    parsers, the serializer class, the accepted media type, the active
+    language, and the permission context of `get_options_permission_context`.
+    The url arguments, which are chosen by the client, are only part of the
+    key when `options_cache_kwargs` is set.
+
+    The cache keeps the `options_cache_size` most recently used documents.
+    The choices of related fields, which DRF lists from the database, are
+    cached along with the rest of the metadata.  `clear_options_cache`
+    invalidates the documents of a view class and its subclasses, or all of
+    them when called on the mixin.
+    """
+
+    options_cache = OrderedDict()
+    options_cache_key = None
+    options_cache_kwargs = False
+    options_cache_lock = threading.Lock()
+    options_cache_size = 256
+
+    def options(self, request, *args, **kwargs):
+        self.options_cache_key = self.get_options_cache_key(request)
+        cached = None
+
+        if self.options_cache_key is not None:
+            with self.options_cache_lock:
+                cached = self.options_cache.pop(self.options_cache_key, None)
+
+                if cached is not None:
+                    self.options_cache[self.options_cache_key] = cached
+
+        if cached is not None:
+            # The cached document is not rendered again
+            self.options_cache_key = None
+            content, content_type = cached
+
+            return HttpResponse(content, content_type=content_type)
+
+        return super(OptionsCacheMixin, self).options(
+            request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super(OptionsCacheMixin, self).finalize_response(
+            request, response, *args, **kwargs)
+
+        if self.options_cache_key is not None and \
+                isinstance(response, Response) and \
+                response.status_code == status.HTTP_200_OK:
+            response.render()
+
+            self.cache_options(self.options_cache_key, (
+                response.content, response["Content-Type"]))
+
+        return response
+
+    def cache_options(self, key, cached):
+        """Cache a rendered document, evicting the least recently used"""
+        with self.options_cache_lock:
+            self.options_cache.pop(key, None)
+
+            while self.options_cache and \
+                    len(self.options_cache) >= self.options_cache_size:
+                self.options_cache.popitem(last=False)
+
+            self.options_cache[key] = cached
+
+    def get_options_cache_key(self, request):
+        """Return the key of the cached document, or None to skip the cache
+
+        Only documents rendered by JSON API renderers are cached, as other
+        renderers, like the browsable API, render request specific content.
+        """
+        renderer = getattr(request, "accepted_renderer", None)
+
+        if not isinstance(renderer, JsonApiMixin):
+            return None
+
+        serializer_class = None
+
+        if hasattr(self, "get_serializer_class"):
+            serializer_class = self.get_serializer_class()
+
+        kwargs = None
+
+        if self.options_cache_kwargs:
+            kwargs = tuple(sorted(self.kwargs.items()))
+
+        return (
+            self.__class__,
+            getattr(self, "suffix", None),
+            kwargs,
+            tuple(self.renderer_classes),
+            tuple(self.parser_classes),
+            serializer_class,
+            request.accepted_media_type,
+            translation.get_language(),
+            self.get_options_permission_context(request),
+        )
+
+    def get_options_permission_context(self, request):
+        """Return the methods with actions in the metadata
+
+        The metadata only lists the fields of the `PUT` and `POST` actions
+        that pass the permission checks of the view.  Object permissions are
+        not checked, so views whose metadata depends on them should include
+        them in the context.
+        """
+        methods = []
+
+        for method in ("POST", "PUT"):
+            if method not in self.allowed_methods:
+                continue
+
+            try:
+                self.check_permissions(clone_request(request, method))
+            except exceptions.APIException:
+                continue
+
+            methods.append(method)
+
+        return tuple(methods)
+
+    @classmethod
+    def clear_options_cache(cls):
+        """Invalidate the cached documents of the view class"""
+        with cls.options_cache_lock:
+            for key in list(cls.options_cache):
+                if issubclass(key[0], cls):
+                    cls.options_cache.pop(key, None)
+
+
+class RelationshipMixin(object):
+    """
+    Serve the linkage of relations at `/<prefix>/<pk>/links/<field>/`
+
+    Reading a linkage runs a single `values_list` query for the primary keys
+    of the related objects, without loading the resource, the related
+    objects or running the serializer.  The resource is only loaded to check
+    object permissions, when a permission class of the view implements
+    `has_object_permission`, and for updates, which save it through the
+    serializer.  Relations that cannot be saved through the model, such as
+    read only fields and reverse relations, cannot be changed.
+
+    `PUT` replaces the linkage, `POST` adds ids to a to-many linkage, and
+    `DELETE` removes the ids in the url (`/links/comments/1,2/`) from a
+    to-many linkage or clears a to-one linkage.  Documents are keyed by the
+    resource type of the related model, and are parsed by the JSON API
+    parser:
+
+    {"comments": ["1", "2"]}
+
+    The linkage of to-many relations is paginated when `linkage_page_size`
+    is set, using the `linkage_page_kwarg` query parameter.
+
+    The `JsonApiRouter` routes the relationship urls.
+    """
+
+    linkage_page_size = None
+    linkage_page_kwarg = "page"
+
+    def initial(self, request, *args, **kwargs):
+        super(RelationshipMixin, self).initial(request, *args, **kwargs)
+
+        link_name = kwargs.get("link_name", None)
+
+        if link_name is not None:
+            self.link_field = self.get_link_field(link_name)
+
+            if request.method not in permissions.SAFE_METHODS and \
+                    not self.is_link_writable(model_from_obj(self)):
+                raise exceptions.MethodNotAllowed(request.method)
+
+            # The parser and renderer use the model of the view to determine
+            # the resource type, which is the one of the related model here
+            self.model = model_from_obj(get_related_field(self.link_field))
+
+    def get_link_field(self, link_name):
+        field = self.get_serializer().fields.get(link_name, None)
+        related_field = get_related_field(field)
+
+        if not isinstance(related_field, (relations.PrimaryKeyRelatedField,
+                                          relations.HyperlinkedRelatedField)):
+            raise Http404
+
+        return field
+
+    def is_link_writable(self, model):
+        """Return True when the relation is saved by the serializer"""
+        if self.link_field.read_only:
+            return False
+
+        try:
+            model_field = model._meta.get_field(self.get_link_source())
+        except FieldDoesNotExist:
+            return False
+
+        # Reverse relations are returned by `get_field` since Django 1.8
+        return not (model_field.auto_created and
+                    not getattr(model_field, "concrete", True))
+
+    def retrieve_links(self, request, *args, **kwargs):
+        if self.has_object_permission_checks():
+            self.get_object()
+
+        return Response(self.get_linkage())
+
+    def has_object_permission_checks(self):
+        """Return True when a permission class checks object permissions"""
+        default = six.get_unbound_function(
+            permissions.BasePermission.has_object_permission)
+
+        return any(
+            six.get_unbound_function(
+                type(permission).has_object_permission) is not default
+            for permission in self.get_permissions()
+        )
+
+    def update_links(self, request, *args, **kwargs):
+        pks = self.get_link_data(request)
+
+        if is_related_many(self.link_field) and not isinstance(pks, list):
+            raise exceptions.ParseError(
+                'To-many linkage must be a list of ids.')
+
+        self.save_linkage(pks)
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def create_links(self, request, *args, **kwargs):
+        if not is_related_many(self.link_field):
+            raise exceptions.MethodNotAllowed(request.method)
+
+        pks = self.get_link_data(request)
+
+        if not isinstance(pks, list):
+            pks = [pks]
+
+        linkage = self.get_linkage_ids()
+        linkage.extend(
+            pk for pk in map(encoding.force_text, pks) if pk not in linkage)
+
+        self.save_linkage(linkage)
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def destroy_links(self, request, *args, **kwargs):
+        link_ids = kwargs.get("link_ids", None)
+
+        if not is_related_many(self.link_field):
+            if link_ids is not None:
+                raise Http404
+
+            self.save_linkage(None)
+        elif link_ids is None:
+            raise exceptions.MethodNotAllowed(request.method)
+        else:
+            removed = link_ids.split(",")
+
+            self.save_linkage([
+                pk for pk in self.get_linkage_ids() if pk not in removed])
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def get_linkage(self):
+        """Return the `Linkage` document of the relation"""
+        resource_type = model_to_resource_type(self.model)
+
+        if self.linkage_page_size and is_related_many(self.link_field):
+            return self.get_paginated_linkage(resource_type)
+
+        linkage = self.get_linkage_ids()
+
+        if not is_related_many(self.link_field):
+            linkage = linkage[0] if linkage else None
+
+        return Linkage([(resource_type, linkage)])
+
+    def get_paginated_linkage(self, resource_type):
+        """Return a page of the linkage of a to-many relation
+
+        The pagination metadata matches the one of paginated lists.
+        """
+        source = self.get_link_source()
+        owner = self.get_link_owner_queryset()
+        pks = owner.filter(**{"%s__isnull" % source: False}) \
+            .order_by(source).values_list(source, flat=True)
+
+        paginator = Paginator(pks, self.linkage_page_size)
+
+        try:
+            page = paginator.page(
+                self.request.GET.get(self.linkage_page_kwarg, 1))
+        except InvalidPage:
+            raise Http404
+
+        if not paginator.count and not owner.exists():
+            raise Http404
+
+        url = self.request.build_absolute_uri()
+        pagination = {
+            "count": paginator.count,
+            "next": None,
+            "previous": None,
+        }
+
+        if page.has_next():
+            pagination["next"] = replace_query_param(
+                url, self.linkage_page_kwarg, page.next_page_number())
+
+        if page.has_previous():
+            pagination["previous"] = replace_query_param(
+                url, self.linkage_page_kwarg, page.previous_page_number())
+
+        return Linkage([
+            (resource_type,
+             [encoding.force_text(pk) for pk in page.object_list]),
+            ("meta", {"pagination": {resource_type: pagination}}),
+        ])
+
+    def get_linkage_ids(self):
+        """Return the ids of the related objects with a single query"""
+        source = self.get_link_source()
+        queryset = self.get_link_owner_queryset()
+        pks = list(queryset.order_by(source).values_list(source, flat=True))
+
+        if not pks:
+            raise Http404
+
+        return [encoding.force_text(pk) for pk in pks if pk is not None]
+
+    def get_link_source(self):
+        return getattr(self.link_field, "source", None) or \
+            self.kwargs["link_name"]
+
+    def get_link_owner_queryset(self):
+        """Return a queryset of the resource that owns the relation"""
+        lookup_url_kwarg = getattr(self, "lookup_url_kwarg", None) or \
+            self.lookup_field
+
+        return self.filter_queryset(self.get_queryset()).filter(**{
+            self.lookup_field: self.kwargs[lookup_url_kwarg],
+        })
+
+    def get_link_data(self, request):
+        try:
+            data = request.data
+        except AttributeError:
+            data = request.DATA
+
+        if isinstance(data, dict):
+            raise exceptions.ParseError(
+                'Linkage must be keyed by "%s".' %
+                model_to_resource_type(self.model))
+
+        return data
+
+    def save_linkage(self, pks):
+        link_name = self.kwargs["link_name"]
+        related_field = get_related_field(self.link_field)
+
+        if isinstance(related_field, relations.HyperlinkedRelatedField):
+            if isinstance(pks, list):
+                value = [pk_to_representation(related_field, pk)
+                         for pk in pks]
+            elif pks is not None:
+                value = pk_to_representation(related_field, pks)
+            else:
+                value = None
+        else:
+            value = pks
+
+        instance = self.get_object()
+        serializer = self.get_serializer(
+            instance, data={link_name: value}, partial=True)
+
+        if not serializer.is_valid():
+            raise exceptions.ValidationError(serializer.errors)
+
+        serializer.save()
+
+
+class SyncMixin(object):
+    """
+    Serve the changes of a collection since a change token
+
+    List requests with the `sync_param` query parameter only return the
+    resources whose `sync_field` changed since the token, rendered like any
+    other list.  The ids of the resources deleted since the token, read from
+    the tombstones recorded by `track_deletions`, and the token for the next
+    request are added to the `meta`:
+
+    {
+        "posts": [...],
+        "meta": {
+            "sync": {
+                "deleted": ["3", "8"],
+                "token": "..."
+            }
+        }
+    }
+
+    An empty token returns the whole collection.  Tokens are signed, and
+    are rejected once they are older than `sync_max_age` seconds.
+
+    A row can be committed after a token was issued with a `sync_field`
+    that is older than the token, by a transaction that was still running.
+    Tokens are issued `sync_margin` seconds before the queries start, so
+    such rows are returned by the next request, as long as transactions
+    take less than the margin.  Resources changed during the margin are
+    returned again, so clients must apply changes idempotently.
+    """
+
+    sync_field = "modified"
+    sync_margin = 60
+    sync_param = "since"
+    sync_max_age = None
+    sync_since = None
+
+    def list(self, request, *args, **kwargs):
+        if self.sync_param not in request.GET:
+            return super(SyncMixin, self).list(request, *args, **kwargs)
+
+        # Taken before the queries, so changes made while they run, or by
+        # transactions that commit later, are returned again by the next
+        # request rather than missed
+        now = timezone.now() - datetime.timedelta(seconds=self.sync_margin)
+        token = request.GET[self.sync_param]
+
+        if token:
+            self.sync_since = self.parse_sync_token(token)
+
+        response = super(SyncMixin, self).list(request, *args, **kwargs)
+
+        sync = {
+            "deleted": self.get_deleted_ids(),
+            "token": self.make_sync_token(now),
+        }
+        self.document_meta = {"sync": sync}
+
+        return response
+
+    def filter_queryset(self, queryset):
+        queryset = super(SyncMixin, self).filter_queryset(queryset)
+
+        if self.sync_since is not None:
+            queryset = queryset.filter(
+                **{"%s__gte" % self.sync_field: self.sync_since})
+
+        return queryset
+
+    def get_deleted_ids(self):
+        # Imported here, so the other mixins work without the app installed
+        from rest_framework_json_api.models import Tombstone
+
+        if self.sync_since is None:
+            return []
+
+        tombstones = Tombstone.objects.filter(
+            resource_type=self.get_sync_resource_type(),
+            deleted__gte=self.sync_since,
+        ).order_by("deleted")
+
+        return list(tombstones.values_list("resource_id", flat=True))
+
+    def get_sync_resource_type(self):
+        return model_to_resource_type(model_from_obj(self))
+
+    def get_sync_salt(self):
+        return "rest_framework_json_api.sync.%s" % (
+            self.get_sync_resource_type())
+
+    def make_sync_token(self, now):
+        return signing.dumps(now.isoformat(), salt=self.get_sync_salt())
+
+    def parse_sync_token(self, token):
+        try:
+            since = signing.loads(
+                token, salt=self.get_sync_salt(), max_age=self.sync_max_age)
+        except signing.BadSignature:
+            raise exceptions.ParseError('Invalid or expired sync token.')
+
+        return parse_datetime(since)
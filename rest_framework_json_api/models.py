@@ -0,0 +1,35 @@
+from django.db import models
+from django.db.models import signals
+from django.utils import encoding, timezone
+from rest_framework_json_api.utils import model_to_resource_type
+
+
+class Tombstone(models.Model):
+    """
+    A resource that was deleted, for the sync mode of `SyncMixin`
+
+    Tombstones are recorded by `track_deletions`, and are never removed by
+    this package.  Tombstones older than the `sync_max_age` of the views
+    are no longer read, and can be pruned.
+    """
+
+    resource_type = models.CharField(max_length=100)
+    resource_id = models.CharField(max_length=100)
+    deleted = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        index_together = [("resource_type", "deleted")]
+
+
+def record_tombstone(sender, instance, **kwargs):
+    Tombstone.objects.create(
+        resource_type=model_to_resource_type(sender),
+        resource_id=encoding.force_text(instance.pk))
+
+
+def track_deletions(model):
+    """Record a `Tombstone` whenever an instance of the model is deleted"""
+    signals.post_delete.connect(
+        record_tombstone, sender=model,
+        dispatch_uid="rest_framework_json_api.tombstone.%s.%s" % (
+            model._meta.app_label, model._meta.object_name))
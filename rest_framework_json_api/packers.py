@@ -0,0 +1,322 @@
+"""
+MessagePack encoding for renderers and parsers
+
+The `msgpack` package is used when it is installed, otherwise documents are
+packed and unpacked by a pure Python implementation of the same format.
+Datetimes, dates, times and decimals are packed as extension types, so they
+are unpacked to the same values.
+"""
+
+from collections import namedtuple
+from decimal import Decimal
+from django.utils import six
+from django.utils.dateparse import parse_date, parse_datetime, parse_time
+from django.utils.encoding import force_text
+from django.utils.functional import Promise
+from rest_framework import parsers, renderers
+from rest_framework.exceptions import ParseError
+import datetime
+import struct
+import uuid
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+ExtType = namedtuple("ExtType", ("code", "data"))
+
+DATETIME_EXT = 1
+DATE_EXT = 2
+TIME_EXT = 3
+DECIMAL_EXT = 4
+
+
+def encode_default(obj):
+    """Return a packable value for the types MessagePack does not support"""
+    if isinstance(obj, datetime.datetime):
+        return ExtType(DATETIME_EXT, obj.isoformat().encode("utf-8"))
+
+    if isinstance(obj, datetime.date):
+        return ExtType(DATE_EXT, obj.isoformat().encode("utf-8"))
+
+    if isinstance(obj, datetime.time):
+        return ExtType(TIME_EXT, obj.isoformat().encode("utf-8"))
+
+    if isinstance(obj, Decimal):
+        return ExtType(DECIMAL_EXT, str(obj).encode("utf-8"))
+
+    if isinstance(obj, (Promise, uuid.UUID)):
+        return force_text(obj)
+
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+
+    raise TypeError("%r is not MessagePack serializable" % (obj, ))
+
+
+def decode_ext(code, data):
+    """Return the value of an extension type packed by `encode_default`"""
+    text = bytes(data).decode("utf-8")
+
+    if code == DATETIME_EXT:
+        return parse_datetime(text)
+
+    if code == DATE_EXT:
+        return parse_date(text)
+
+    if code == TIME_EXT:
+        return parse_time(text)
+
+    if code == DECIMAL_EXT:
+        return Decimal(text)
+
+    return ExtType(code, bytes(data))
+
+
+def packb(obj):
+    """Return the MessagePack encoding of a value"""
+    if msgpack is not None:
+        return msgpack.packb(
+            obj, default=_msgpack_default, use_bin_type=not six.PY2)
+
+    out = []
+    _pack(obj, out)
+
+    return b"".join(out)
+
+
+def unpackb(data):
+    """Return the value encoded in MessagePack bytes"""
+    if msgpack is not None:
+        try:
+            return msgpack.unpackb(
+                data, ext_hook=decode_ext, raw=False, strict_map_key=False)
+        except TypeError:
+            # Versions before 1.0 do not know about `strict_map_key`
+            return msgpack.unpackb(
+                data, ext_hook=decode_ext, encoding="utf-8")
+
+    return Unpacker(data).unpack()
+
+
+def _msgpack_default(obj):
+    value = encode_default(obj)
+
+    if isinstance(value, ExtType):
+        return msgpack.ExtType(value.code, value.data)
+
+    return value
+
+
+def _pack(obj, out):
+    if obj is None:
+        out.append(b"\xc0")
+    elif obj is True:
+        out.append(b"\xc3")
+    elif obj is False:
+        out.append(b"\xc2")
+    elif isinstance(obj, six.integer_types):
+        _pack_int(obj, out)
+    elif isinstance(obj, float):
+        out.append(struct.pack(">Bd", 0xcb, obj))
+    elif isinstance(obj, six.text_type) or \
+            (six.PY2 and isinstance(obj, six.binary_type)):
+        # Strings are usually bytes on Python 2, so they are packed as text
+        data = obj.encode("utf-8") if isinstance(obj, six.text_type) else obj
+        _pack_header(len(data), out, 0xa0, 32, 0xd9, 0xda, 0xdb)
+        out.append(data)
+    elif isinstance(obj, (six.binary_type, bytearray)):
+        _pack_header(len(obj), out, None, 0, 0xc4, 0xc5, 0xc6)
+        out.append(bytes(obj))
+    elif isinstance(obj, ExtType):
+        _pack_ext(obj, out)
+    elif isinstance(obj, (list, tuple)):
+        _pack_header(len(obj), out, 0x90, 16, None, 0xdc, 0xdd)
+
+        for item in obj:
+            _pack(item, out)
+    elif isinstance(obj, dict):
+        _pack_header(len(obj), out, 0x80, 16, None, 0xde, 0xdf)
+
+        for key, value in six.iteritems(obj):
+            _pack(key, out)
+            _pack(value, out)
+    else:
+        _pack(encode_default(obj), out)
+
+
+def _pack_int(obj, out):
+    if 0 <= obj < 0x80:
+        out.append(struct.pack(">B", obj))
+    elif -0x20 <= obj < 0:
+        out.append(struct.pack(">b", obj))
+    elif 0 <= obj <= 0xff:
+        out.append(struct.pack(">BB", 0xcc, obj))
+    elif 0 <= obj <= 0xffff:
+        out.append(struct.pack(">BH", 0xcd, obj))
+    elif 0 <= obj <= 0xffffffff:
+        out.append(struct.pack(">BI", 0xce, obj))
+    elif 0 <= obj <= 0xffffffffffffffff:
+        out.append(struct.pack(">BQ", 0xcf, obj))
+    elif -0x80 <= obj:
+        out.append(struct.pack(">Bb", 0xd0, obj))
+    elif -0x8000 <= obj:
+        out.append(struct.pack(">Bh", 0xd1, obj))
+    elif -0x80000000 <= obj:
+        out.append(struct.pack(">Bi", 0xd2, obj))
+    elif -0x8000000000000000 <= obj:
+        out.append(struct.pack(">Bq", 0xd3, obj))
+    else:
+        raise OverflowError("Integer %d is too large to pack" % obj)
+
+
+def _pack_header(length, out, fix, fix_limit, code8, code16, code32):
+    if fix is not None and length < fix_limit:
+        out.append(struct.pack(">B", fix | length))
+    elif code8 is not None and length <= 0xff:
+        out.append(struct.pack(">BB", code8, length))
+    elif length <= 0xffff:
+        out.append(struct.pack(">BH", code16, length))
+    else:
+        out.append(struct.pack(">BI", code32, length))
+
+
+def _pack_ext(obj, out):
+    fixed = {1: 0xd4, 2: 0xd5, 4: 0xd6, 8: 0xd7, 16: 0xd8}
+    length = len(obj.data)
+
+    if length in fixed:
+        out.append(struct.pack(">Bb", fixed[length], obj.code))
+    elif length <= 0xff:
+        out.append(struct.pack(">BBb", 0xc7, length, obj.code))
+    elif length <= 0xffff:
+        out.append(struct.pack(">BHb", 0xc8, length, obj.code))
+    else:
+        out.append(struct.pack(">BIb", 0xc9, length, obj.code))
+
+    out.append(obj.data)
+
+
+class Unpacker(object):
+    """Pure Python MessagePack decoder, used without the `msgpack` package"""
+
+    formats = {
+        0xca: ">f", 0xcb: ">d",
+        0xcc: ">B", 0xcd: ">H", 0xce: ">I", 0xcf: ">Q",
+        0xd0: ">b", 0xd1: ">h", 0xd2: ">i", 0xd3: ">q",
+    }
+
+    def __init__(self, data):
+        self.data = bytearray(data)
+        self.position = 0
+
+    def unpack(self):
+        value = self.read_value()
+
+        if self.position != len(self.data):
+            raise ValueError("Extra data after the MessagePack value")
+
+        return value
+
+    def read(self, length):
+        end = self.position + length
+
+        if end > len(self.data):
+            raise ValueError("Truncated MessagePack data")
+
+        chunk = self.data[self.position:end]
+        self.position = end
+
+        return chunk
+
+    def read_struct(self, fmt):
+        return struct.unpack(fmt, bytes(self.read(struct.calcsize(fmt))))[0]
+
+    def read_value(self):
+        code = self.read_struct(">B")
+
+        if code <= 0x7f:
+            return code
+        if code >= 0xe0:
+            return code - 0x100
+        if 0x80 <= code <= 0x8f:
+            return self.read_map(code & 0x0f)
+        if 0x90 <= code <= 0x9f:
+            return self.read_array(code & 0x0f)
+        if 0xa0 <= code <= 0xbf:
+            return self.read_text(code & 0x1f)
+        if code == 0xc0:
+            return None
+        if code == 0xc2:
+            return False
+        if code == 0xc3:
+            return True
+        if code in self.formats:
+            return self.read_struct(self.formats[code])
+        if code in (0xc4, 0xc5, 0xc6):
+            return bytes(self.read(self.read_length(code - 0xc4)))
+        if code in (0xc7, 0xc8, 0xc9):
+            return self.read_ext(self.read_length(code - 0xc7))
+        if 0xd4 <= code <= 0xd8:
+            return self.read_ext(1 << (code - 0xd4))
+        if code in (0xd9, 0xda, 0xdb):
+            return self.read_text(self.read_length(code - 0xd9))
+        if code in (0xdc, 0xdd):
+            return self.read_array(self.read_length(code - 0xdc + 1))
+        if code in (0xde, 0xdf):
+            return self.read_map(self.read_length(code - 0xde + 1))
+
+        raise ValueError("Invalid MessagePack type 0x%02x" % code)
+
+    def read_length(self, size):
+        return self.read_struct((">B", ">H", ">I")[size])
+
+    def read_text(self, length):
+        return self.read(length).decode("utf-8")
+
+    def read_array(self, length):
+        return [self.read_value() for _ in range(length)]
+
+    def read_map(self, length):
+        items = {}
+
+        for _ in range(length):
+            key = self.read_value()
+            items[key] = self.read_value()
+
+        return items
+
+    def read_ext(self, length):
+        code = self.read_struct(">b")
+
+        return decode_ext(code, self.read(length))
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    """Renderer which serializes to MessagePack"""
+
+    media_type = 'application/x-msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        return packb(data)
+
+
+class MessagePackParser(parsers.BaseParser):
+    """Parses MessagePack-serialized data"""
+
+    media_type = 'application/x-msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return unpackb(stream.read())
+        except Exception as exc:
+            raise ParseError('MessagePack parse error - %s' %
+                             six.text_type(exc))
@@ -1,13 +1,19 @@
 from rest_framework import parsers, relations
+from rest_framework.exceptions import ParseError
+from rest_framework_json_api.packers import MessagePackParser
 from rest_framework_json_api.utils import (
-    get_related_field, is_related_many,
-    model_from_obj, model_to_resource_type
+    get_related_field, is_jsonpatch, is_related_many,
+    model_from_obj, model_to_resource_type, pk_to_representation
 )
+from rest_framework_json_api.validators import DocumentValidator
 from django.utils import six
 
 
 class JsonApiMixin(object):
     media_type = 'application/vnd.api+json'
+    patch_operations = ('add', 'replace', 'remove', )
+    validator_class = DocumentValidator
+    validators = {}
 
     def parse(self, stream, media_type=None, parser_context=None):
         data = super(JsonApiMixin, self).parse(stream, media_type=media_type,
@@ -18,18 +24,56 @@ class JsonApiMixin(object):
         model = self.model_from_obj(view)
         resource_type = self.model_to_resource_type(model)
 
+        if is_jsonpatch(media_type):
+            return self.convert_operations(data, resource_type, view)
+
+        validator = self.get_validator(view, resource_type)
+
+        if validator is not None:
+            validator.validate(data)
+
         resource = {}
 
         if resource_type in data:
             resource = data[resource_type]
 
+        # Linkage documents, which only hold ids, are returned as they are
         if isinstance(resource, list):
-            resource = [self.convert_resource(r, view) for r in resource]
-        else:
+            resource = [
+                self.convert_resource(r, view) if isinstance(r, dict) else r
+                for r in resource
+            ]
+        elif isinstance(resource, dict):
             resource = self.convert_resource(resource, view)
 
         return resource
 
+    def get_validator(self, view, resource_type):
+        """Return the structural validator of the documents of a view
+
+        Validators are compiled once for each view class, serializer class,
+        resource type and relationship endpoint, and kept in `validators`.
+        No validation is done when `validator_class` is None, or for views
+        without serializers.
+        """
+        if self.validator_class is None or \
+                not hasattr(view, "get_serializer_class"):
+            return None
+
+        link_field = getattr(view, "link_field", None)
+
+        key = (
+            view.__class__, view.get_serializer_class(), resource_type,
+            getattr(link_field, "field_name", None),
+        )
+        validator = self.validators.get(key, None)
+
+        if validator is None:
+            validator = self.validator_class.compile(view, resource_type)
+            self.validators[key] = validator
+
+        return validator
+
     def convert_resource(self, resource, view):
         serializer_data = view.get_serializer(instance=None)
         fields = serializer_data.fields
@@ -49,36 +93,114 @@ class JsonApiMixin(object):
 
             if isinstance(related_field, relations.HyperlinkedRelatedField):
                 if is_related_many(field):
-                    pks = links[field_name]
-                    model = related_field.queryset.model
-
-                    resource[field_name] = []
-
-                    for pk in pks:
-                        obj = model(pk=pk)
+                    resource[field_name] = [
+                        pk_to_representation(related_field, pk)
+                        for pk in links[field_name]
+                    ]
+                else:
+                    resource[field_name] = pk_to_representation(
+                        related_field, links[field_name])
+            else:
+                resource[field_name] = links[field_name]
 
-                        try:
-                            url = related_field.to_representation(obj)
-                        except AttributeError:
-                            url = related_field.to_native(obj)
+        return resource
 
-                        resource[field_name].append(url)
-                else:
-                    pk = links[field_name]
-                    model = related_field.queryset.model
+    def convert_operations(self, operations, resource_type, view):
+        """Convert a JSON Patch extension document to a list of operations
+
+        Each operation is normalized to a dictionary with the keys `op`, `id`
+        (`None` when adding a resource) and `data`, which holds the parsed
+        resource in the same format that `convert_resource` returns:
+
+        [
+            {"op": "add", "path": "/-", "value": {"name": "new"}},
+            {"op": "replace", "path": "/1/name", "value": "changed"},
+            {"op": "remove", "path": "/2"}
+        ]
+
+        Is parsed into:
+
+        [
+            {"op": "add", "id": None, "data": {"name": "new"}},
+            {"op": "replace", "id": "1", "data": {"name": "changed"}},
+            {"op": "remove", "id": "2", "data": None}
+        ]
+
+        Paths are relative to the collection, and may optionally start with
+        the resource type (`/people/1/name`).  The value of each operation is
+        checked by the structural validator of the view before conversion.
+        """
+        if not isinstance(operations, list):
+            raise ParseError(
+                'JSON Patch documents must be a list of operations.')
+
+        validator = self.get_validator(view, resource_type)
+
+        return [
+            self.convert_operation(operation, resource_type, view, validator)
+            for operation in operations
+        ]
+
+    def convert_operation(self, operation, resource_type, view,
+                          validator=None):
+        if not isinstance(operation, dict):
+            raise ParseError('JSON Patch operations must be objects.')
+
+        op = operation.get("op", None)
+        path = operation.get("path", None)
+        value = operation.get("value", None)
+
+        if op not in self.patch_operations:
+            raise ParseError('Unsupported JSON Patch operation "%s".' % op)
+
+        if not isinstance(path, six.string_types) or \
+                not path.startswith("/"):
+            raise ParseError('Invalid JSON Patch path "%s".' % path)
+
+        segments = path[1:].split("/")
+
+        if len(segments) > 1 and segments[0] == resource_type:
+            segments = segments[1:]
+
+        if isinstance(value, dict) and list(value.keys()) == [resource_type]:
+            value = value[resource_type]
+
+        pk = None
+        resource = None
+
+        if op == "add" and segments == ["-"]:
+            resource = value
+        elif op == "remove" and len(segments) == 1:
+            pk = segments[0]
+        elif op == "replace" and len(segments) == 1:
+            pk = segments[0]
+            resource = value
+        elif op == "replace" and len(segments) == 2:
+            pk = segments[0]
+            resource = {segments[1]: value}
+        elif op == "replace" and len(segments) == 3 and \
+                segments[1] == "links":
+            pk = segments[0]
+            resource = {"links": {segments[2]: value}}
+        else:
+            raise ParseError(
+                'Unsupported JSON Patch path "%s" for "%s".' % (path, op))
 
-                    obj = model(pk=pk)
+        if resource is not None:
+            if not isinstance(resource, dict):
+                raise ParseError(
+                    'JSON Patch value for "%s" must be an object.' % path)
 
-                    try:
-                        url = related_field.to_representation(obj)
-                    except AttributeError:
-                        url = related_field.to_native(obj)
+            if validator is not None:
+                validator.validate_resource(resource, "/%s" % segments[0])
 
-                    resource[field_name] = url
-            else:
-                resource[field_name] = links[field_name]
+            resource = self.convert_resource(dict(resource), view)
 
-        return resource
+        return {
+            "op": op,
+            "id": pk,
+            "data": resource,
+        }
 
     def model_from_obj(self, obj):
         return model_from_obj(obj)
@@ -89,3 +211,7 @@ class JsonApiMixin(object):
 
 class JsonApiParser(JsonApiMixin, parsers.JSONParser):
     pass
+
+
+class JsonApiMessagePackParser(JsonApiMixin, MessagePackParser):
+    media_type = 'application/vnd.api+msgpack'
@@ -1,14 +1,30 @@
 from rest_framework import relations, renderers, serializers, status
 from rest_framework.settings import api_settings
 from rest_framework_json_api import encoders
+from rest_framework_json_api.packers import MessagePackRenderer
+from rest_framework_json_api.writers import (
+    EncodedResources, JsonApiWriter, WriterNotApplicable
+)
 from rest_framework_json_api.utils import (
-    get_related_field, is_related_many,
+    Linkage, get_related_field, is_jsonpatch, is_related_many,
     model_from_obj, model_to_resource_type
 )
+from collections import OrderedDict
+from django.conf import settings
 from django.core import urlresolvers
 from django.core.exceptions import NON_FIELD_ERRORS
+from django.db import connections, models
+from django.db.models import Count
+from django.db.models.fields import FieldDoesNotExist
 from django.utils import encoding, six
 from django.utils.six.moves.urllib.parse import urlparse, urlunparse
+from timeit import default_timer
+import itertools
+import logging
+import random
+import threading
+
+logger = logging.getLogger('rest_framework_json_api')
 
 
 class WrapperNotApplicable(ValueError):
@@ -20,6 +36,16 @@ class WrapperNotApplicable(ValueError):
         return super(WrapperNotApplicable, self).__init__(*args, **kwargs)
 
 
+class RenderLimitExceeded(ValueError):
+
+    def __init__(self, limit, value):
+        self.limit = limit
+        self.value = value
+
+        return super(RenderLimitExceeded, self).__init__(
+            'The document is over the %s limit of %d.' % (limit, value))
+
+
 class JsonApiMixin(object):
     convert_by_name = {
         'id': 'convert_to_text',
@@ -31,8 +57,27 @@ class JsonApiMixin(object):
         relations.HyperlinkedRelatedField: 'handle_url_field',
         serializers.ModelSerializer: 'handle_nested_serializer',
     }
+    debug_meta = False
+    debug_meta_header = 'HTTP_X_JSON_API_DEBUG'
     dict_class = dict
     encoder_class = encoders.JSONEncoder
+    error_cache = OrderedDict()
+    error_cache_lock = threading.Lock()
+    error_cache_size = 256
+    error_cache_statuses = (401, 403, 404, 405, 429)
+    limit_policy = 'error'
+    max_document_bytes = None
+    max_errors = 100
+    max_linkage_ids = None
+    max_linked_resources = None
+    max_resources = None
+    path_templates = {}
+    relative_links = False
+    render_timings = None
+    slow_render_threshold = 1.0
+    timing_sample_rate = 0
+    truncated_limits = None
+    writer_class = None
     media_type = 'application/vnd.api+json'
     wrappers = [
         'wrap_empty_response',
@@ -40,6 +85,10 @@ class JsonApiMixin(object):
         'wrap_field_error',
         'wrap_generic_error',
         'wrap_options',
+        'wrap_linkage',
+        'wrap_jsonpatch',
+        'write_encoded',
+        'write_document',
         'wrap_paginated',
         'wrap_default'
     ]
@@ -48,34 +97,277 @@ class JsonApiMixin(object):
         """Convert native data to JSON API
 
         Tries each of the methods in `wrappers`, using the first successful
-        one, or raises `WrapperNotApplicable`.
+        one, or raises `WrapperNotApplicable`.  Wrappers that already return
+        the encoded document as bytes skip the JSON encoder.
+
+        A `timing_sample_rate` share of the renders are timed, and the ones
+        taking longer than `slow_render_threshold` seconds are logged.
         """
 
+        if not self.timing_sample_rate or \
+                random.random() >= self.timing_sample_rate:
+            return self.render_document(
+                data, accepted_media_type, renderer_context)
+
+        self.render_timings = {}
+        started = default_timer()
+
+        try:
+            return self.render_document(
+                data, accepted_media_type, renderer_context)
+        finally:
+            elapsed = default_timer() - started
+
+            if elapsed >= self.slow_render_threshold:
+                self.log_slow_render(elapsed, renderer_context)
+
+            self.render_timings = None
+
+    def render_document(self, data, accepted_media_type, renderer_context):
         wrapper = None
         success = False
 
-        for wrapper_name in self.wrappers:
-            wrapper_method = getattr(self, wrapper_name)
-            try:
-                wrapper = wrapper_method(data, renderer_context)
-            except WrapperNotApplicable:
-                pass
-            else:
-                success = True
-                break
+        view = renderer_context.get("view", None)
+        debug = getattr(view, "jsonapi_debug", None)
+        error_key = None
+
+        if debug is not None:
+            debug.lap("serialization")
+        else:
+            error_key = self.get_error_cache_key(
+                data, accepted_media_type, renderer_context)
+
+            if error_key is not None:
+                cached = self.error_cache.get(error_key, None)
+
+                if cached is not None:
+                    return cached
+
+        try:
+            for wrapper_name in self.wrappers:
+                wrapper_method = getattr(self, wrapper_name)
+                try:
+                    wrapper = wrapper_method(data, renderer_context)
+                except WrapperNotApplicable:
+                    pass
+                else:
+                    success = True
+                    break
+        except RenderLimitExceeded as e:
+            wrapper = self.wrap_limit_error(e, renderer_context)
+            success = True
+        finally:
+            if debug is not None:
+                debug.stop()
 
         if not success:
             raise WrapperNotApplicable(
                 'No acceptable wrappers found for response.',
                 data=data, renderer_context=renderer_context)
 
+        document_meta = getattr(view, "document_meta", None)
+
+        if document_meta and isinstance(wrapper, dict):
+            self.add_meta(wrapper, document_meta)
+
+        # Writers add the debug data to the documents they encode
+        if debug is not None and isinstance(wrapper, dict):
+            debug.lap("conversion")
+            self.add_meta(wrapper, {
+                "debug": debug.as_meta(wrapper, self.dict_class),
+            })
+
+        if isinstance(wrapper, six.binary_type):
+            rendered = wrapper
+        else:
+            rendered = self.encode_document(
+                wrapper, accepted_media_type, renderer_context)
+
+        # The size is only known once encoded, so it cannot be truncated
+        if self.max_document_bytes is not None and \
+                len(rendered) > self.max_document_bytes:
+            wrapper = self.wrap_limit_error(
+                RenderLimitExceeded(
+                    'max_document_bytes', self.max_document_bytes),
+                renderer_context)
+            rendered = self.encode_document(
+                wrapper, accepted_media_type, renderer_context)
+
+        if error_key is not None:
+            self.cache_error(error_key, rendered)
+
+        if debug is not None:
+            # The document is already encoded, so the encoding time is only
+            # sent in the `Server-Timing` header
+            debug.lap("encoding")
+            response = renderer_context.get("response", None)
+
+            if response is not None:
+                response["Server-Timing"] = debug.server_timing()
+
+        return rendered
+
+    def encode_document(self, wrapper, accepted_media_type,
+                        renderer_context):
         renderer_context["indent"] = 4
 
-        return super(JsonApiMixin, self).render(
+        if self.render_timings is not None:
+            started = default_timer()
+
+        rendered = super(JsonApiMixin, self).render(
             data=wrapper,
             accepted_media_type=accepted_media_type,
             renderer_context=renderer_context)
 
+        if self.render_timings is not None:
+            self.record_timing(None, 'encode', default_timer() - started)
+
+        return rendered
+
+    def exceed_limit(self, limit):
+        """Raise `RenderLimitExceeded`, unless the `limit_policy` truncates
+
+        Documents are truncated to the limit when the policy is 'truncate',
+        and the limits they were truncated to are added to their `meta`:
+
+        {"meta": {"truncated": {"max_resources": 100}}}
+        """
+        value = getattr(self, limit)
+
+        if self.limit_policy != 'truncate':
+            raise RenderLimitExceeded(limit, value)
+
+        if self.truncated_limits is None:
+            self.truncated_limits = self.dict_class()
+
+        self.truncated_limits[limit] = value
+
+    def wrap_limit_error(self, error, renderer_context):
+        """Convert a `RenderLimitExceeded` to a 400 JSON API error"""
+        response = renderer_context.get("response", None)
+
+        if response is not None:
+            response.status_code = status.HTTP_400_BAD_REQUEST
+            response.reason_phrase = 'BAD REQUEST'
+
+        return self.wrap_error(
+            {"detail": six.text_type(error)}, renderer_context,
+            keys_are_fields=False, issue_is_title=False)
+
+    def get_error_cache_key(self, data, accepted_media_type,
+                            renderer_context):
+        """Return the key of an encoded error document, or None
+
+        Errors with one of the `error_cache_statuses` and only a text
+        `detail`, like authentication, permission, not found and throttling
+        errors, are the same for many requests.  Their encoded documents are
+        cached by renderer class, media type, status and detail.
+        """
+        response = renderer_context.get("response", None)
+        status_code = response and response.status_code
+
+        if status_code not in self.error_cache_statuses:
+            return None
+
+        if not isinstance(data, dict) or len(data) != 1:
+            return None
+
+        detail = data.get("detail", None)
+
+        if not isinstance(detail, six.string_types):
+            return None
+
+        return (self.__class__, accepted_media_type, status_code, detail)
+
+    def cache_error(self, key, rendered):
+        """Cache an encoded error document, evicting the oldest ones"""
+        with self.error_cache_lock:
+            while self.error_cache and \
+                    len(self.error_cache) >= self.error_cache_size:
+                self.error_cache.popitem(last=False)
+
+            self.error_cache[key] = rendered
+
+    def use_debug_meta(self, request):
+        """Return whether debug data should be added to the `meta`
+
+        Debug data is added to every document when `debug_meta` is set, and
+        to the documents requested with the `debug_meta_header` header by
+        clients in the `INTERNAL_IPS` setting.
+        """
+        if self.debug_meta:
+            return True
+
+        if not self.debug_meta_header or \
+                self.debug_meta_header not in request.META:
+            return False
+
+        internal_ips = getattr(settings, "INTERNAL_IPS", ())
+
+        return request.META.get("REMOTE_ADDR", None) in internal_ips
+
+    def add_meta(self, wrapper, meta):
+        """Merge the `meta` of a view, or the debug data, into a document
+
+        Views can set a `document_meta` dictionary, which is merged into the
+        top-level `meta` of their documents, next to the pagination.  Debug
+        data is added under the `debug` key:
+
+        {
+            "meta": {
+                "debug": {
+                    "queries": 3,
+                    "db_time": 0.0021,
+                    "resources": {"posts": 2},
+                    "linked": {"comments": 4},
+                    "timings": {"serialization": 0.0043, "conversion": 0.001}
+                }
+            }
+        }
+        """
+        merged = self.dict_class(wrapper.get("meta", None) or {})
+        merged.update(meta)
+        wrapper["meta"] = merged
+
+    def record_timing(self, field_name, converter_name, seconds):
+        key = (field_name, converter_name)
+        calls, total = self.render_timings.get(key, (0, 0.0))
+
+        self.render_timings[key] = (calls + 1, total + seconds)
+
+    def log_slow_render(self, elapsed, renderer_context):
+        """Log the time spent on each field and converter of a slow render
+
+        The breakdown is sorted by the total time, which includes the time
+        of the nested fields for nested serializers.
+        """
+        renderer_context = renderer_context or {}
+        view = renderer_context.get("view", None)
+        request = renderer_context.get("request", None)
+
+        fields = [
+            {
+                "field": field_name,
+                "converter": converter_name,
+                "calls": calls,
+                "seconds": seconds,
+            }
+            for (field_name, converter_name), (calls, seconds)
+            in six.iteritems(self.render_timings)
+        ]
+        fields.sort(key=lambda timing: timing["seconds"], reverse=True)
+
+        render = {
+            "view": view.__class__.__name__ if view is not None else None,
+            "path": getattr(request, "path", None),
+            "seconds": elapsed,
+            "fields": fields,
+        }
+
+        logger.warning(
+            'Slow JSON API render of %s took %.3f seconds',
+            render["path"], elapsed, extra={"jsonapi_render": render})
+
     def wrap_empty_response(self, data, renderer_context):
         """
         Pass-through empty responses
@@ -104,7 +396,7 @@ class JsonApiMixin(object):
         if status_code != 400:
             raise WrapperNotApplicable('Status code must be 400.')
 
-        if list(data.keys()) != ['detail']:
+        if not isinstance(data, dict) or list(data.keys()) != ['detail']:
             raise WrapperNotApplicable('Data must only have "detail" key.')
 
         # Probably a parser error, unless `detail` is a valid field
@@ -159,6 +451,10 @@ class JsonApiMixin(object):
                 "detail": "Select either a range or an enumeration, not both."
             }]
         }
+
+        Nested field errors, and lists of field errors for requests with
+        multiple resources, are flattened by `flatten_field_errors`.  At most
+        `max_errors` errors are rendered.
         """
         response = renderer_context.get("response", None)
         status_code = response and response.status_code
@@ -222,30 +518,85 @@ class JsonApiMixin(object):
         response = renderer_context.get("response", None)
         status_code = str(response and response.status_code)
 
+        if keys_are_fields:
+            issues = self.flatten_field_errors(data, renderer_context)
+        else:
+            issues = self.flatten_errors(data)
+
         errors = []
-        for field, issues in data.items():
-            if isinstance(issues, six.string_types):
-                issues = [issues]
-            for issue in issues:
-                error = self.dict_class()
-                error["status"] = status_code
-
-                if issue_is_title:
-                    error["title"] = issue
-                else:
-                    error["detail"] = issue
+        for path, issue in itertools.islice(issues, self.max_errors):
+            error = self.dict_class()
+            error["status"] = status_code
+
+            if issue_is_title:
+                error["title"] = issue
+            else:
+                error["detail"] = issue
 
-                if keys_are_fields:
-                    if field in ('non_field_errors', NON_FIELD_ERRORS):
-                        error["path"] = '/-'
-                    else:
-                        error["path"] = '/' + field
+            if path is not None:
+                error["path"] = path
 
-                errors.append(error)
+            errors.append(error)
         wrapper = self.dict_class()
         wrapper["errors"] = errors
         return wrapper
 
+    def flatten_errors(self, data):
+        """Yield `(None, issue)` pairs for errors that are not field errors"""
+        for issues in data.values():
+            if isinstance(issues, (list, tuple)):
+                for issue in issues:
+                    yield None, issue
+            else:
+                yield None, issues
+
+    def flatten_field_errors(self, data, renderer_context):
+        """Yield `(path, issue)` pairs for field errors
+
+        Field errors can be nested, for nested serializers, or a list of
+        field errors when multiple resources were sent.  The path is a JSON
+        pointer to the field, which starts with the resource type and the
+        index of the resource when multiple resources were sent:
+
+        [{}, {"name": ["This field is required."]}]
+
+        Is flattened into:
+
+        ("/people/1/name", "This field is required.")
+
+        Errors are generated lazily, so the caller can stop early.
+        """
+        if isinstance(data, list):
+            view = renderer_context.get("view", None)
+            model = self.model_from_obj(view)
+            resource_type = self.model_to_resource_type(model)
+
+            return self.iter_field_errors(data, '/' + resource_type)
+
+        return self.iter_field_errors(data, '')
+
+    def iter_field_errors(self, data, path):
+        if isinstance(data, dict):
+            for field, issues in data.items():
+                if field in ('non_field_errors', NON_FIELD_ERRORS):
+                    field = '-'
+
+                for error in self.iter_field_errors(
+                        issues, '%s/%s' % (path, field)):
+                    yield error
+        elif isinstance(data, (list, tuple)):
+            for index, issues in enumerate(data):
+                if isinstance(issues, (dict, list, tuple)):
+                    issues = self.iter_field_errors(
+                        issues, '%s/%d' % (path, index))
+                else:
+                    issues = [(path or '/-', issues)]
+
+                for error in issues:
+                    yield error
+        else:
+            yield path or '/-', data
+
     def wrap_options(self, data, renderer_context):
         '''Wrap OPTIONS data as JSON API meta value'''
         request = renderer_context.get("request", None)
@@ -257,6 +608,78 @@ class JsonApiMixin(object):
         wrapper["meta"] = data
         return wrapper
 
+    def wrap_linkage(self, data, renderer_context):
+        """Pass-through linkage documents of relationship endpoints
+
+        `Linkage` documents already have the JSON API format:
+
+        {"comments": ["1", "2"]}
+        """
+        if not isinstance(data, Linkage):
+            raise WrapperNotApplicable('Data must be a linkage document.')
+
+        return data
+
+    def wrap_jsonpatch(self, data, renderer_context):
+        """Convert JSON Patch extension results to a list of JSON API documents
+
+        The native format is a list with one item per operation, in the same
+        order as the operations were sent.  Operations that return a resource
+        are wrapped with `wrap_default`, the others are rendered as an empty
+        object:
+
+        [
+            {"people": {"id": "3", "name": "new"}},
+            {}
+        ]
+        """
+        request = renderer_context.get("request", None)
+        content_type = getattr(request, "content_type", None)
+
+        if not is_jsonpatch(content_type):
+            raise WrapperNotApplicable('Request must use the JSON Patch '
+                                       'extension.')
+
+        if not isinstance(data, list):
+            raise WrapperNotApplicable('Data must be a list of results.')
+
+        wrapper = []
+
+        for result in data:
+            if result is None:
+                wrapper.append(self.dict_class())
+            else:
+                wrapper.append(self.wrap_default(result, renderer_context))
+
+        return wrapper
+
+    def write_encoded(self, data, renderer_context):
+        """Splice resources that are already encoded into the document
+
+        `EncodedResources` are always written with a writer, using
+        `JsonApiWriter` when `writer_class` is not set.
+        """
+        if not isinstance(data, EncodedResources):
+            raise WrapperNotApplicable('Data must be encoded resources.')
+
+        writer_class = self.writer_class or JsonApiWriter
+
+        return writer_class(self, renderer_context).write_encoded(data)
+
+    def write_document(self, data, renderer_context):
+        """Write resource documents directly to bytes with `writer_class`
+
+        Handles the same data as `wrap_paginated` and `wrap_default`, and
+        is skipped when `writer_class` is not set.
+        """
+        if self.writer_class is None:
+            raise WrapperNotApplicable('No writer class is set.')
+
+        try:
+            return self.writer_class(self, renderer_context).write(data)
+        except WriterNotApplicable as e:
+            raise WrapperNotApplicable(*e.args)
+
     def wrap_paginated(self, data, renderer_context):
         """Convert paginated data to JSON API with meta"""
 
@@ -279,6 +702,8 @@ class JsonApiMixin(object):
         except ImportError:
             results = data["results"]
 
+        self.attach_instances(results, self.instances_from_data(data))
+
         # Use default wrapper for results
         wrapper = self.wrap_default(results, renderer_context)
 
@@ -323,24 +748,61 @@ class JsonApiMixin(object):
         links = self.dict_class()
         linked = self.dict_class()
         meta = self.dict_class()
+        linkage_ids = 0
+
+        # Resources are prepared before they are capped, so the instances
+        # still match them
+        self.prepare_resources(resources, data, request)
+
+        if self.max_resources is not None and \
+                len(resources) > self.max_resources:
+            self.exceed_limit('max_resources')
+            resources = resources[:self.max_resources]
 
         for resource in resources:
             converted = self.convert_resource(resource, data, request)
             item = converted.get('data', {})
             linked_ids = converted.get('linked_ids', {})
+
+            if self.max_linkage_ids is not None:
+                linkage_ids += self.count_linkage_ids(linked_ids)
+
+                if linkage_ids > self.max_linkage_ids:
+                    # Leaves out this resource and the next ones
+                    self.exceed_limit('max_linkage_ids')
+                    break
+
             if linked_ids:
                 item["links"] = linked_ids
             items.append(item)
 
             links.update(converted.get('links', {}))
+
+            if self.render_timings is not None:
+                started = default_timer()
+
             linked = self.update_nested(linked,
                                         converted.get('linked', {}))
+
+            if self.render_timings is not None:
+                self.record_timing(
+                    None, 'update_nested', default_timer() - started)
+
+            if self.max_linked_resources is not None:
+                truncated = self.limit_linked(linked)
+
+                if truncated:
+                    self.prune_linkage(
+                        linked_ids, converted.get('links', {}),
+                        self.nested_field_names(resource, data),
+                        self.linked_ids_of(linked, truncated))
+
             meta.update(converted.get('meta', {}))
 
         if many:
             wrapper[resource_type] = items
         else:
-            wrapper[resource_type] = items[0]
+            wrapper[resource_type] = items[0] if items else None
 
         if links:
             links = self.prepend_links_with_name(links, resource_type)
@@ -349,11 +811,88 @@ class JsonApiMixin(object):
         if linked:
             wrapper["linked"] = linked
 
+        if self.truncated_limits:
+            meta["truncated"] = self.dict_class(self.truncated_limits)
+
         if meta:
             wrapper["meta"] = meta
 
         return wrapper
 
+    def count_linkage_ids(self, linked_ids):
+        count = 0
+
+        for linkage in six.itervalues(linked_ids):
+            if isinstance(linkage, dict):
+                linkage = linkage.get("ids", [])
+
+            if isinstance(linkage, list):
+                count += len(linkage)
+            elif linkage is not None:
+                count += 1
+
+        return count
+
+    def limit_linked(self, linked):
+        """Cap the linked resources of each type, returning the capped types
+
+        Linked resources are appended resource by resource, so only the
+        ones of the last converted resource can be left out.
+        """
+        truncated = []
+
+        for resource_type, linked_resources in six.iteritems(linked):
+            if len(linked_resources) > self.max_linked_resources:
+                self.exceed_limit('max_linked_resources')
+                del linked_resources[self.max_linked_resources:]
+                truncated.append(resource_type)
+
+        return truncated
+
+    def linked_ids_of(self, linked, resource_types):
+        """Return the ids of the linked resources of some types"""
+        return dict(
+            (resource_type, set(encoding.force_text(linked_obj["id"])
+                                for linked_obj in linked[resource_type]))
+            for resource_type in resource_types
+        )
+
+    def nested_field_names(self, resource, data):
+        """Return the names of the nested serializer fields of a resource"""
+        fields = self.fields_from_resource(resource, data) or {}
+
+        return [
+            field_name for field_name, field in six.iteritems(fields)
+            if isinstance(get_related_field(field), serializers.BaseSerializer)
+        ]
+
+    def prune_linkage(self, linked_ids, links, field_names, kept):
+        """Remove the ids of linked resources left out of a document
+
+        `kept` maps resource types to the ids of their linked resources that
+        are in the document.  The linkage of the `field_names` relations to
+        these types only keeps those ids, so it never points to a missing
+        linked resource.
+        """
+        for field_name in field_names:
+            if field_name not in linked_ids:
+                continue
+
+            resource_type = links.get(field_name, {}).get("type", None)
+
+            if resource_type not in kept:
+                continue
+
+            ids = kept[resource_type]
+            linkage = linked_ids[field_name]
+
+            if isinstance(linkage, list):
+                linked_ids[field_name] = [
+                    pk for pk in linkage if encoding.force_text(pk) in ids]
+            elif linkage is not None and \
+                    encoding.force_text(linkage) not in ids:
+                linked_ids[field_name] = None
+
     def convert_resource(self, resource, data, request):
         fields = self.fields_from_resource(resource, data)
 
@@ -366,13 +905,20 @@ class JsonApiMixin(object):
         linked = self.dict_class()
         meta = self.dict_class()
 
+        timings = self.render_timings
+
         for field_name, field in six.iteritems(fields):
             converted = None
+            used_converter = 'attribute'
+
+            if timings is not None:
+                started = default_timer()
 
             if field_name in self.convert_by_name:
                 converter_name = self.convert_by_name[field_name]
                 converter = getattr(self, converter_name)
                 converted = converter(resource, field, field_name, request)
+                used_converter = converter_name
             else:
                 related_field = get_related_field(field)
 
@@ -382,6 +928,7 @@ class JsonApiMixin(object):
                         converter = getattr(self, converter_name)
                         converted = converter(
                             resource, field, field_name, request)
+                        used_converter = converter_name
                         break
 
             if converted:
@@ -394,6 +941,10 @@ class JsonApiMixin(object):
             else:
                 data[field_name] = resource[field_name]
 
+            if timings is not None:
+                self.record_timing(
+                    field_name, used_converter, default_timer() - started)
+
         return {
             'data': data,
             'linked_ids': linked_ids,
@@ -409,7 +960,7 @@ class JsonApiMixin(object):
 
     def rename_to_href(self, resource, field, field_name, request):
         data = self.dict_class()
-        data['href'] = resource[field_name]
+        data['href'] = self.to_href(resource[field_name], request)
         return {"data": data}
 
     def prepend_links_with_name(self, links, name):
@@ -448,6 +999,12 @@ class JsonApiMixin(object):
 
         if is_related_many(field):
             items = resource[field_name]
+
+            # Stops before converting the linked resources over the limit
+            if self.max_linked_resources is not None and \
+                    len(items) > self.max_linked_resources:
+                self.exceed_limit('max_linked_resources')
+                items = items[:self.max_linked_resources]
         else:
             items = [resource[field_name]]
 
@@ -500,7 +1057,15 @@ class JsonApiMixin(object):
         model = self.model_from_obj(related_field)
         resource_type = self.model_to_resource_type(model)
 
-        if field_name in resource:
+        loaded_linkage = getattr(resource, "loaded_linkage", {})
+
+        if field_name in loaded_linkage:
+            links[field_name] = {
+                "type": resource_type,
+            }
+
+            linked_ids[field_name] = loaded_linkage[field_name]
+        elif field_name in resource:
             links[field_name] = {
                 "type": resource_type,
             }
@@ -533,12 +1098,66 @@ class JsonApiMixin(object):
             "type": resource_type,
         }
 
-        if field_name in resource:
-            linked_ids[field_name] = self.url_to_pk(
-                resource[field_name], field)
+        loaded_linkage = getattr(resource, "loaded_linkage", {})
+
+        if field_name in loaded_linkage:
+            linked_ids[field_name] = loaded_linkage[field_name]
+        elif field_name in resource:
+            attname = self.get_related_attname(resource, field, field_name)
+
+            if attname is not None:
+                pk = getattr(resource.instance, attname)
+
+                if pk is not None:
+                    pk = encoding.force_text(pk)
+
+                linked_ids[field_name] = pk
+            else:
+                linked_ids[field_name] = self.url_to_pk(
+                    resource[field_name], field)
 
         return {"linked_ids": linked_ids, "links": links}
 
+    def get_related_attname(self, resource, field, field_name):
+        """Return the foreign key attribute of a to-one relation
+
+        The linkage can be read from the foreign key of the serialized
+        instance, instead of resolving the url of the related object and
+        loading it.  This is only possible when the instance is attached to
+        the resource and the relation links to the primary key of the related
+        model, otherwise `None` is returned.
+        """
+        instance = getattr(resource, "instance", None)
+
+        if instance is None or is_related_many(field):
+            return None
+
+        if getattr(field, "lookup_field", "pk") != "pk":
+            return None
+
+        source = getattr(field, "source", None) or field_name
+
+        if "." in source or source == "*":
+            return None
+
+        try:
+            model_field = instance._meta.get_field(source)
+        except FieldDoesNotExist:
+            return None
+
+        rel = getattr(model_field, "rel", None)
+        to_field = getattr(rel, "field_name", None)
+
+        if to_field is None:
+            return None
+
+        related_model = getattr(rel, "to", None) or rel.model
+
+        if to_field != related_model._meta.pk.name:
+            return None
+
+        return model_field.attname
+
     def url_to_pk(self, url_data, field):
         if is_related_many(field):
             try:
@@ -560,18 +1179,375 @@ class JsonApiMixin(object):
 
     def url_to_template(self, view_name, request, template_name):
         resolver = urlresolvers.get_resolver(None)
-        info = resolver.reverse_dict[view_name]
+        cache_key = (resolver, view_name, template_name)
+        path = self.path_templates.get(cache_key, None)
 
-        path_template = info[0][0][0]
-        # FIXME: what happens when URL has more than one dynamic values?
-        # e.g. nested relations: manufacturer/%(id)s/cars/%(card_id)s
-        path = path_template % {info[0][0][1][0]: '{%s}' % template_name}
+        if path is None:
+            info = resolver.reverse_dict[view_name]
 
-        parsed_url = urlparse(request.build_absolute_uri())
+            path_template = info[0][0][0]
+            # FIXME: what happens when URL has more than one dynamic values?
+            # e.g. nested relations: manufacturer/%(id)s/cars/%(card_id)s
+            path = '/' + path_template % {
+                info[0][0][1][0]: '{%s}' % template_name}
 
-        return urlunparse(
-            [parsed_url.scheme, parsed_url.netloc, path, '', '', '']
-        )
+            self.path_templates[cache_key] = path
+
+        if self.relative_links:
+            return path
+
+        return self.get_base_url(request) + path
+
+    def get_base_url(self, request):
+        """Return the scheme and host of the request
+
+        Computed once per request, and kept on the request so every renderer
+        and writer used for it shares the result.
+        """
+        base_url = getattr(request, "_jsonapi_base_url", None)
+
+        if base_url is None:
+            parsed_url = urlparse(request.build_absolute_uri())
+            base_url = urlunparse(
+                [parsed_url.scheme, parsed_url.netloc, '', '', '', ''])
+
+            request._jsonapi_base_url = base_url
+
+        return base_url
+
+    def to_href(self, url, request):
+        """Return the url of a resource as it is rendered"""
+        if self.relative_links and url and request is not None:
+            base_url = self.get_base_url(request)
+
+            if url.startswith(base_url + "/"):
+                return url[len(base_url):]
+
+        return url
+
+    def instances_from_data(self, data):
+        """Return the model instances the data was serialized from"""
+        serializer = getattr(data, "serializer", None)
+        instances = getattr(serializer, "instance", None)
+
+        if instances is None:
+            instances = getattr(serializer, "object", None)
+
+        # Paginated data is serialized from a page
+        return getattr(instances, "object_list", instances)
+
+    def prepare_resources(self, resources, data, request):
+        """Prepare the resources of a document before they are converted"""
+        self.attach_instances(resources, self.instances_from_data(data))
+
+        if resources:
+            fields = self.fields_from_resource(resources[0], data)
+
+            if fields:
+                self.load_linkage(resources, fields, request)
+
+    def attach_instances(self, resources, instances):
+        """Attach the model instances to the resources serialized from them
+
+        Converters can then read values that are already on the row from
+        `resource.instance`.  Querysets are only used once the serializer
+        evaluated them, so attaching the instances never runs a query.
+        """
+        if instances is None:
+            return
+
+        if isinstance(instances, models.Model):
+            instances = [instances]
+        elif isinstance(instances, models.query.QuerySet):
+            instances = instances._result_cache
+        elif not isinstance(instances, (list, tuple)):
+            return
+
+        if instances is None or len(instances) != len(resources):
+            return
+
+        for resource, instance in zip(resources, instances):
+            if isinstance(instance, models.Model):
+                try:
+                    resource.instance = instance
+                except AttributeError:
+                    return
+
+    def load_linkage(self, resources, fields, request):
+        """Load the linkage of to-many relations for all resources at once
+
+        Converting hyperlinked relations resolves every url and loads every
+        related object to find its primary key.  Instead, the ids are read
+        from the related objects the view prefetched, or the
+        `(owner, related)` primary key pairs of each relation are fetched for
+        all resources with a single `values_list` query, see
+        `get_related_pairs`.
+
+        Relations listed in the `linkage_limits` of the serializer `Meta` are
+        capped instead, see `load_capped_linkage`.  The linkage is stored in
+        `resource.loaded_linkage`.
+        """
+        instances = [getattr(resource, "instance", None)
+                     for resource in resources]
+
+        if None in instances:
+            return
+
+        owner_pks = [instance.pk for instance in instances]
+
+        for field_name, field in six.iteritems(fields):
+            related_field = get_related_field(field)
+
+            if not is_related_many(field):
+                continue
+
+            limit = self.get_linkage_limit(field, field_name)
+
+            if limit is None:
+                if field_name not in resources[0]:
+                    continue
+
+                if not isinstance(related_field,
+                                  relations.HyperlinkedRelatedField):
+                    continue
+
+            if getattr(related_field, "lookup_field", "pk") != "pk":
+                continue
+
+            source = getattr(field, "source", None) or field_name
+
+            if limit is None:
+                pairs = self.get_related_pairs(instances, source)
+
+                if pairs is None:
+                    continue
+
+                linkage = dict((pk, []) for pk in owner_pks)
+
+                for owner_pk, related_pk in pairs:
+                    if owner_pk in linkage:
+                        linkage[owner_pk].append(
+                            encoding.force_text(related_pk))
+            else:
+                linkage = self.load_capped_linkage(
+                    instances, source, field_name, limit, fields, request)
+
+                if linkage is None:
+                    continue
+
+            for resource, instance in zip(resources, instances):
+                if not hasattr(resource, "loaded_linkage"):
+                    resource.loaded_linkage = {}
+
+                resource.loaded_linkage[field_name] = linkage[instance.pk]
+
+    def get_related_pairs(self, instances, source):
+        """Return the `(owner, related)` primary keys of a to-many relation
+
+        When the relation was prefetched for every instance, the related
+        objects the view selected are used and no query is run.  Otherwise
+        the pairs are read in a single query, through the default manager of
+        the related model, so they are filtered and ordered the way the
+        related managers of the instances return them.  Related models
+        without a default ordering are ordered by primary key.
+
+        Returns None when the source is not a to-many relation of the model.
+        """
+        model = type(instances[0])
+
+        try:
+            _, _, direct, m2m = model._meta.get_field_by_name(source)
+        except FieldDoesNotExist:
+            return None
+
+        if direct and not m2m:
+            return None
+
+        managers = [getattr(instance, source) for instance in instances]
+        prefetched = [manager.get_queryset() for manager in managers]
+
+        # Prefetched relations are already evaluated querysets
+        if all(queryset._result_cache is not None
+               for queryset in prefetched):
+            return [
+                (instance.pk, related.pk)
+                for instance, queryset in zip(instances, prefetched)
+                for related in queryset
+            ]
+
+        related = self.get_related_lookup(model, source)
+
+        if related is None:
+            return None
+
+        related_model, lookup = related
+
+        queryset = related_model._default_manager.filter(**{
+            "%s__in" % lookup: [instance.pk for instance in instances],
+        })
+
+        if not queryset.ordered:
+            queryset = queryset.order_by("pk")
+
+        return queryset.values_list(lookup, "pk").iterator()
+
+    def get_related_lookup(self, model, source):
+        """Return the related model of a to-many relation and its lookup
+
+        The lookup filters the related model by the primary key of `model`.
+        Returns None for other relations, for reverse foreign keys to other
+        fields than the primary key, and for hidden relations.
+        """
+        try:
+            field, _, direct, m2m = model._meta.get_field_by_name(source)
+        except FieldDoesNotExist:
+            return None
+
+        if direct and not m2m:
+            return None
+
+        if direct:
+            related_model = field.rel.to
+            lookup = field.related_query_name()
+        elif field.field.rel.field_name == model._meta.pk.name:
+            related_model = field.field.model
+            lookup = field.field.name
+        else:
+            return None
+
+        # Hidden relations cannot be queried from the related model
+        if lookup.endswith("+"):
+            return None
+
+        return related_model, lookup
+
+    def load_capped_linkage(self, instances, source, field_name, limit,
+                            fields, request):
+        """Return the capped linkage of a to-many relation for each instance
+
+        The number of related objects of all instances is counted with a
+        single annotated aggregate, and rendered as `meta.count` with a link
+        to the relationship endpoint, which pages through all of the ids.
+        Only the first `limit` ids of each instance are read, with a sliced
+        query for each instance that has related objects, all run as a
+        single `UNION ALL` query.
+
+        Returns None when the source is not a to-many relation of the model.
+        """
+        model = type(instances[0])
+        related = self.get_related_lookup(model, source)
+
+        if related is None:
+            return None
+
+        related_model, lookup = related
+        owner_pks = [instance.pk for instance in instances]
+
+        counts = dict(
+            model._base_manager.filter(pk__in=owner_pks).order_by()
+            .annotate(linkage_count=Count(source))
+            .values_list("pk", "linkage_count"))
+
+        querysets = []
+
+        for owner_pk in owner_pks:
+            if not counts.get(owner_pk, 0):
+                continue
+
+            queryset = related_model._default_manager.filter(**{
+                lookup: owner_pk,
+            })
+
+            if not queryset.ordered:
+                queryset = queryset.order_by("pk")
+
+            querysets.append(queryset.values_list(lookup, "pk")[:limit])
+
+        pks = dict((encoding.force_text(pk), []) for pk in owner_pks)
+
+        for owner_pk, related_pk in self.union_querysets(querysets):
+            pks[encoding.force_text(owner_pk)].append(
+                encoding.force_text(related_pk))
+
+        linkage = {}
+
+        for instance in instances:
+            link = self.dict_class()
+            link["ids"] = pks[encoding.force_text(instance.pk)]
+
+            href = self.relationship_href(instance, field_name, fields,
+                                          request)
+
+            if href is not None:
+                link["href"] = href
+
+            link["meta"] = {"count": counts.get(instance.pk, 0)}
+
+            linkage[instance.pk] = link
+
+        return linkage
+
+    def union_querysets(self, querysets):
+        """Return the rows of querysets of the same columns, in one query
+
+        Each queryset may be sliced and ordered, so it is run as a subquery.
+        """
+        if not querysets:
+            return []
+
+        db = querysets[0].db
+        parts = []
+        params = []
+
+        for index, queryset in enumerate(querysets):
+            sql, query_params = queryset.query.get_compiler(db).as_sql()
+
+            parts.append("SELECT * FROM (%s) U%d" % (sql, index))
+            params.extend(query_params)
+
+        cursor = connections[db].cursor()
+
+        try:
+            cursor.execute(" UNION ALL ".join(parts), params)
+
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+    def get_linkage_limit(self, field, field_name):
+        """Return the maximum number of ids rendered for a to-many relation
+
+        Set in the serializer with `Meta.linkage_limits`, a dictionary of
+        limits keyed by field name.
+        """
+        meta = getattr(getattr(field, "parent", None), "Meta", None)
+        linkage_limits = getattr(meta, "linkage_limits", None) or {}
+
+        return linkage_limits.get(field_name, None)
+
+    def relationship_href(self, instance, field_name, fields, request):
+        """Return the url of the relationship endpoint of a relation
+
+        The endpoint is the one routed by `JsonApiRouter` for the view of the
+        url field of the resource, or `None` if there is no such route.
+        """
+        url_field = fields.get(api_settings.URL_FIELD_NAME, None)
+        view_name = getattr(url_field, "view_name", "")
+
+        if not view_name.endswith("-detail") or request is None:
+            return None
+
+        try:
+            path = urlresolvers.reverse(
+                view_name[:-len("-detail")] + "-links",
+                kwargs={"pk": instance.pk, "link_name": field_name})
+        except urlresolvers.NoReverseMatch:
+            return None
+
+        if self.relative_links:
+            return path
+
+        return self.get_base_url(request) + path
 
     def fields_from_resource(self, resource, data):
         if hasattr(data, "serializer"):
@@ -607,3 +1583,18 @@ class JsonApiMixin(object):
 
 class JsonApiRenderer(JsonApiMixin, renderers.JSONRenderer):
     pass
+
+
+class JsonApiMessagePackRenderer(JsonApiMixin, MessagePackRenderer):
+    """
+    Render JSON API documents as MessagePack
+
+    The documents are the same as the ones of `JsonApiRenderer`, but the
+    wrappers that write JSON text directly are left out.
+    """
+
+    media_type = 'application/vnd.api+msgpack'
+    wrappers = [
+        wrapper for wrapper in JsonApiMixin.wrappers
+        if wrapper not in ('write_encoded', 'write_document')
+    ]
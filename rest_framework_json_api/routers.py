@@ -0,0 +1,46 @@
+from rest_framework import routers
+
+
+class JsonApiRouter(routers.SimpleRouter):
+    """
+    A `SimpleRouter` that also routes the JSON API extensions provided by
+    `rest_framework_json_api.mixins`.
+
+    Routes are only generated for the actions a viewset implements, so
+    viewsets without the mixins are routed exactly like `SimpleRouter`.
+    """
+
+    routes = [
+        routers.Route(
+            url=r'^{prefix}{trailing_slash}$',
+            mapping={
+                'get': 'list',
+                'post': 'create',
+                'patch': 'patch_list',
+            },
+            name='{basename}-list',
+            initkwargs={'suffix': 'List'}
+        ),
+    ] + routers.SimpleRouter.routes[1:] + [
+        routers.Route(
+            url=r'^{prefix}/{lookup}/links/(?P<link_name>[^/.]+)'
+                r'{trailing_slash}$',
+            mapping={
+                'get': 'retrieve_links',
+                'put': 'update_links',
+                'post': 'create_links',
+                'delete': 'destroy_links',
+            },
+            name='{basename}-links',
+            initkwargs={'suffix': 'Links'}
+        ),
+        routers.Route(
+            url=r'^{prefix}/{lookup}/links/(?P<link_name>[^/.]+)/'
+                r'(?P<link_ids>[^/]+){trailing_slash}$',
+            mapping={
+                'delete': 'destroy_links',
+            },
+            name='{basename}-links-detail',
+            initkwargs={'suffix': 'Links'}
+        ),
+    ]
@@ -0,0 +1,25 @@
+class LinkageLimitsMixin(object):
+    """
+    Leave the relations in `Meta.linkage_limits` out of the serialized data
+
+    The JSON API renderer loads a capped linkage for these relations itself,
+    so the related objects do not need to be loaded when serializing.
+
+    class PostSerializer(LinkageLimitsMixin, HyperlinkedModelSerializer):
+
+        class Meta:
+            model = Post
+            linkage_limits = {"comments": 20}
+    """
+
+    def get_fields(self):
+        fields = super(LinkageLimitsMixin, self).get_fields()
+        linkage_limits = getattr(self.Meta, "linkage_limits", None) or {}
+
+        for field_name in linkage_limits:
+            if field_name in fields:
+                # Write only fields are skipped by `to_representation`, but
+                # can still be written to if they are not read only
+                fields[field_name].write_only = True
+
+        return fields
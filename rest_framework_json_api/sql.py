@@ -0,0 +1,329 @@
+from django.db import DatabaseError, connections, transaction
+from rest_framework import relations, serializers
+from rest_framework_json_api.utils import (
+    get_related_field, is_related_many, model_from_obj
+)
+
+
+class NotSupported(ValueError):
+    pass
+
+
+class SqliteDialect(object):
+    """JSON functions of the SQLite JSON1 extension"""
+
+    probe = "SELECT json_object('a', 1)"
+
+    def key(self):
+        return "%s"
+
+    def object(self, members):
+        return "json_object(%s)" % ", ".join(members)
+
+    def text(self, expression):
+        return "CAST(%s AS TEXT)" % expression
+
+    def boolean(self, expression):
+        return (
+            "CASE WHEN %(e)s IS NULL THEN NULL WHEN %(e)s THEN json('true') "
+            "ELSE json('false') END" % {"e": expression})
+
+    def array(self, value, table, where, order):
+        # Subquery results lose their JSON subtype, so they are parsed again
+        return (
+            "json((SELECT json_group_array(v) FROM (SELECT %s AS v FROM %s "
+            "WHERE %s ORDER BY %s)))" % (
+                self.text(value), table, where, order))
+
+
+class PostgresqlDialect(object):
+    """JSON functions of PostgreSQL 9.4+"""
+
+    probe = "SELECT json_build_object('a', 1)"
+
+    def key(self):
+        return "CAST(%s AS TEXT)"
+
+    def object(self, members):
+        return "json_build_object(%s)" % ", ".join(members)
+
+    def text(self, expression):
+        return "CAST(%s AS TEXT)" % expression
+
+    def boolean(self, expression):
+        return expression
+
+    def array(self, value, table, where, order):
+        return (
+            "(SELECT COALESCE(json_agg(%s ORDER BY %s), '[]'::json) FROM %s "
+            "WHERE %s)" % (self.text(value), order, table, where))
+
+
+class ResourceCompiler(object):
+    """
+    Compile a serializer into a SQL expression that builds each resource
+
+    Only flat serializers are supported: the `id` and url fields, model
+    fields with text, integer or boolean values, and relations that link
+    to the primary key of the related model.  `compile` raises
+    `NotSupported` for anything else, so the caller can fall back to the
+    normal rendering path.
+
+    The expression and its parameters are meant for `QuerySet.extra`, and
+    the document links are collected in `links` like `convert_resource`
+    collects them.
+    """
+
+    dialects = {
+        "sqlite": SqliteDialect,
+        "postgresql": PostgresqlDialect,
+    }
+
+    text_types = (
+        "CharField", "TextField", "EmailField", "SlugField", "URLField",
+    )
+    integer_types = (
+        "AutoField", "IntegerField", "BigIntegerField", "SmallIntegerField",
+        "PositiveIntegerField", "PositiveSmallIntegerField",
+    )
+    boolean_types = (
+        "BooleanField",
+    )
+
+    serializer_field_types = (
+        serializers.CharField,
+        serializers.EmailField,
+        serializers.SlugField,
+        serializers.URLField,
+        serializers.IntegerField,
+        serializers.BooleanField,
+    )
+
+    max_members = 50
+
+    probed = {}
+
+    def __init__(self, renderer, serializer, queryset, request):
+        self.renderer = renderer
+        self.serializer = serializer
+        self.queryset = queryset
+        self.model = queryset.model
+        self.request = request
+        self.connection = connections[queryset.db]
+
+        dialect_class = self.dialects.get(self.connection.vendor, None)
+
+        if dialect_class is None:
+            raise NotSupported(
+                'The "%s" database is not supported.' %
+                self.connection.vendor)
+
+        self.dialect = dialect_class()
+        self.quote = self.connection.ops.quote_name
+        self.links = renderer.dict_class()
+
+    def compile(self):
+        """Return the SQL expression and its parameters
+
+        Every part of the expression is a `(sql, params)` pair, so the
+        parameters stay in the same order as their placeholders.
+        """
+        if not self.is_supported():
+            raise NotSupported('The database has no JSON functions.')
+
+        members = []
+        linkage = []
+
+        for field_name, field in self.serializer.fields.items():
+            if self.renderer.get_linkage_limit(field, field_name) is not None:
+                raise NotSupported('Field "%s" has a linkage limit.' %
+                                   field_name)
+
+            if getattr(field, "write_only", False):
+                continue
+
+            converter_name = self.renderer.convert_by_name.get(
+                field_name, None)
+
+            if converter_name == "convert_to_text":
+                members.append(self.member(field_name, (
+                    self.dialect.text(self.column(self.model._meta.pk)), [])))
+            elif converter_name == "rename_to_href":
+                members.append(self.member("href", self.href(field)))
+            elif converter_name is not None:
+                raise NotSupported('Unknown converter "%s".' % converter_name)
+            elif isinstance(get_related_field(field),
+                            relations.RelatedField):
+                linkage.append(self.linkage(field_name, field))
+            else:
+                members.append(self.attribute(field_name, field))
+
+        if len(members) + len(linkage) >= self.max_members:
+            raise NotSupported('Too many fields.')
+
+        if linkage:
+            members.append(self.member("links", self.object(linkage)))
+
+        return self.object(members)
+
+    def is_supported(self):
+        alias = self.connection.alias
+
+        if alias not in self.probed:
+            try:
+                with transaction.atomic(using=alias):
+                    cursor = self.connection.cursor()
+                    cursor.execute(self.dialect.probe)
+                    cursor.fetchone()
+            except DatabaseError:
+                self.probed[alias] = False
+            else:
+                self.probed[alias] = True
+
+        return self.probed[alias]
+
+    def member(self, key, expression):
+        sql, params = expression
+
+        return "%s, %s" % (self.dialect.key(), sql), [key] + list(params)
+
+    def object(self, members):
+        sql = self.dialect.object([member[0] for member in members])
+        params = [param for member in members for param in member[1]]
+
+        return sql, params
+
+    def column(self, model_field, model=None):
+        model = model or self.model
+
+        return "%s.%s" % (self.quote(model._meta.db_table),
+                          self.quote(model_field.column))
+
+    def get_model_field(self, field, model=None):
+        model = model or self.model
+        source = getattr(field, "source", None) or field.field_name
+
+        if "." in source or source == "*":
+            raise NotSupported('Field "%s" is not a model field.' % source)
+
+        try:
+            return model._meta.get_field_by_name(source)
+        except Exception:
+            raise NotSupported('Field "%s" is not a model field.' % source)
+
+    def attribute(self, field_name, field):
+        if type(field) not in self.serializer_field_types:
+            raise NotSupported('Field "%s" is not supported.' % field_name)
+
+        model_field, _, direct, m2m = self.get_model_field(field)
+
+        if not direct or m2m or getattr(model_field, "rel", None):
+            raise NotSupported('Field "%s" is a relation.' % field_name)
+
+        internal_type = model_field.get_internal_type()
+        column = self.column(model_field)
+
+        if internal_type in self.text_types:
+            expression = column
+        elif internal_type in self.integer_types:
+            expression = column
+        elif internal_type in self.boolean_types:
+            expression = self.dialect.boolean(column)
+        else:
+            raise NotSupported('Field "%s" is not supported.' % field_name)
+
+        return self.member(field_name, (expression, []))
+
+    def href(self, field):
+        lookup_field = getattr(field, "lookup_field", "pk")
+
+        if lookup_field == "pk":
+            model_field = self.model._meta.pk
+        else:
+            model_field = self.get_model_field(field)[0]
+
+        return self.template_expression(
+            field.view_name, self.dialect.text(self.column(model_field)))
+
+    def template_expression(self, view_name, value):
+        template = self.renderer.url_to_template(
+            view_name, self.request, "pk")
+        prefix, _, suffix = template.partition("{pk}")
+
+        return "%%s || %s || %%s" % value, [prefix, suffix]
+
+    def linkage(self, field_name, field):
+        related_field = get_related_field(field)
+
+        if isinstance(related_field, relations.HyperlinkedRelatedField):
+            if getattr(related_field, "lookup_field", "pk") != "pk":
+                raise NotSupported('Field "%s" does not link to the primary '
+                                   'key.' % field_name)
+        elif not isinstance(related_field, relations.PrimaryKeyRelatedField):
+            raise NotSupported('Field "%s" is not supported.' % field_name)
+
+        related_model = model_from_obj(related_field)
+        resource_type = self.renderer.model_to_resource_type(related_model)
+
+        if related_model is None or related_model._meta.ordering:
+            raise NotSupported('Field "%s" is not supported.' % field_name)
+
+        links = self.links[field_name] = {
+            "type": resource_type,
+        }
+
+        if isinstance(related_field, relations.HyperlinkedRelatedField):
+            links["href"] = self.renderer.url_to_template(
+                related_field.view_name, self.request, field_name)
+
+        model_field, _, direct, m2m = self.get_model_field(field)
+        pk_column = self.column(self.model._meta.pk)
+
+        if not is_related_many(field):
+            if not direct or m2m or not getattr(model_field, "rel", None):
+                raise NotSupported('Field "%s" is not supported.' % field_name)
+
+            # The column only holds the id when it refers to the primary key
+            if model_field.rel.field_name != \
+                    model_field.rel.to._meta.pk.name:
+                raise NotSupported('Field "%s" does not link to the primary '
+                                   'key.' % field_name)
+
+            return self.member(field_name, (
+                self.dialect.text(self.column(model_field)), []))
+
+        if m2m:
+            if direct:
+                through = model_field.rel.through
+                source = model_field.m2m_column_name()
+                target = model_field.m2m_reverse_name()
+            else:
+                through = model_field.field.rel.through
+                source = model_field.field.m2m_reverse_name()
+                target = model_field.field.m2m_column_name()
+
+            table = self.quote(through._meta.db_table)
+            value = "%s.%s" % (table, self.quote(target))
+            where = "%s.%s = %s" % (table, self.quote(source), pk_column)
+        elif not direct:
+            remote_field = model_field.field
+            remote_model = remote_field.model
+
+            # The table of the subquery would shadow the table of the query
+            if remote_model is self.model:
+                raise NotSupported('Field "%s" is a self-referential '
+                                   'relation.' % field_name)
+
+            if remote_field.rel.field_name != self.model._meta.pk.name:
+                raise NotSupported('Field "%s" does not link to the primary '
+                                   'key.' % field_name)
+
+            table = self.quote(remote_model._meta.db_table)
+            value = self.column(remote_model._meta.pk, remote_model)
+            where = "%s = %s" % (
+                self.column(remote_field, remote_model), pk_column)
+        else:
+            raise NotSupported('Field "%s" is not supported.' % field_name)
+
+        return self.member(field_name, (
+            self.dialect.array(value, table, where, value), []))
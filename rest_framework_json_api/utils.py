@@ -1,4 +1,6 @@
-from django.utils.encoding import force_text
+from django.conf import settings
+from django.http.multipartparser import parse_header
+from django.utils.encoding import force_bytes, force_text
 from django.utils.text import slugify
 
 try:
@@ -35,6 +37,20 @@ def is_related_many(field):
     return False
 
 
+def pk_to_representation(related_field, pk):
+    '''Return the representation of a related object from its primary key
+
+    The related object is not loaded, only an unsaved instance with the
+    primary key is passed to the field.
+    '''
+    obj = related_field.queryset.model(pk=pk)
+
+    try:
+        return related_field.to_representation(obj)
+    except AttributeError:
+        return related_field.to_native(obj)
+
+
 def model_from_obj(obj):
     model = getattr(obj, "model", None)
 
@@ -61,6 +77,57 @@ def model_to_resource_type(model):
 
     return force_text(model._meta.verbose_name_plural)
 
+
+class Linkage(dict):
+    '''A document that only holds the linkage of a relation
+
+    Keyed by the resource type of the related model, with the id or the list
+    of ids as the value:
+
+    {"comments": ["1", "2"]}
+    '''
+
+
+def is_jsonpatch(media_type):
+    '''Return True if the media type selects the JSON Patch extension
+
+    Examples:
+    "application/vnd.api+json; ext=jsonpatch" -> True
+    "application/vnd.api+json" -> False
+    '''
+    if not media_type:
+        return False
+
+    _, params = parse_header(force_bytes(media_type))
+
+    return force_text(params.get("ext", "")) == "jsonpatch"
+
+
+def get_credentials(request):
+    '''Return the credentials a response can depend on
+
+    The `Authorization` header and the session cookie, for keys of responses
+    shared between requests.
+    '''
+    return (
+        request.META.get("HTTP_AUTHORIZATION", ""),
+        request.COOKIES.get(settings.SESSION_COOKIE_NAME, ""),
+    )
+
+
+def get_class_cache(cls, name, factory=dict):
+    '''Return a cache stored on a class, which subclasses do not share
+
+    The cache is created with `factory` the first time a class asks for it.
+    '''
+    cache = cls.__dict__.get(name, None)
+
+    if cache is None:
+        cache = factory()
+        setattr(cls, name, cache)
+
+    return cache
+
 #
 # String conversion
 #
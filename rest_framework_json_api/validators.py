@@ -0,0 +1,104 @@
+"""
+Structural validation of parsed JSON API documents
+
+A `DocumentValidator` is compiled once per view class, serializer class and
+resource type, from the relations of the serializer.  It checks the shape
+of a document in a single pass, before the serializer or the database are
+involved, and raises a `ParseError` for the first problem it finds.
+"""
+
+from django.utils import six
+from rest_framework import relations
+from rest_framework.exceptions import ParseError
+from rest_framework_json_api.utils import get_related_field, is_related_many
+
+
+def is_id(value):
+    """Return True for the string and integer ids of resources"""
+    if isinstance(value, bool):
+        return False
+
+    return isinstance(value, six.string_types + six.integer_types)
+
+
+class DocumentValidator(object):
+
+    def __init__(self, resource_type, links, linkage_many=None):
+        # Maps the name of each relation to True for to-many relations
+        self.resource_type = resource_type
+        self.links = links
+
+        # Set for the linkage documents of relationship endpoints
+        self.linkage_many = linkage_many
+
+    @classmethod
+    def compile(cls, view, resource_type):
+        serializer = view.get_serializer(instance=None)
+        links = {}
+
+        for field_name, field in six.iteritems(serializer.fields):
+            related_field = get_related_field(field)
+
+            if isinstance(related_field, relations.RelatedField):
+                links[field_name] = is_related_many(field)
+
+        link_field = getattr(view, "link_field", None)
+        linkage_many = None
+
+        if link_field is not None:
+            linkage_many = is_related_many(link_field)
+
+        return cls(resource_type, links, linkage_many)
+
+    def validate(self, data):
+        if not isinstance(data, dict):
+            raise ParseError('JSON API documents must be objects.')
+
+        if self.resource_type not in data:
+            raise ParseError(
+                'JSON API documents must have a "%s" member.' % (
+                    self.resource_type))
+
+        value = data[self.resource_type]
+        path = "/%s" % self.resource_type
+
+        if self.linkage_many is not None:
+            # Single ids can be added to to-many relations
+            if not is_id(value):
+                self.validate_linkage(value, self.linkage_many, path)
+        elif isinstance(value, list):
+            for index, resource in enumerate(value):
+                self.validate_resource(resource, "%s/%d" % (path, index))
+        else:
+            self.validate_resource(value, path)
+
+    def validate_resource(self, resource, path):
+        if not isinstance(resource, dict):
+            raise ParseError('Resource at "%s" must be an object.' % path)
+
+        if "id" in resource and not is_id(resource["id"]):
+            raise ParseError(
+                'Resource at "%s" must have a string or integer id.' % path)
+
+        links = resource.get("links", None)
+
+        if links is None:
+            return
+
+        if not isinstance(links, dict):
+            raise ParseError('Links at "%s/links" must be an object.' % path)
+
+        for link_name, linkage in six.iteritems(links):
+            if link_name in self.links:
+                self.validate_linkage(
+                    linkage, self.links[link_name],
+                    "%s/links/%s" % (path, link_name))
+
+    def validate_linkage(self, linkage, many, path):
+        if many:
+            if not isinstance(linkage, list) or \
+                    not all(is_id(pk) for pk in linkage):
+                raise ParseError(
+                    'Linkage at "%s" must be a list of ids.' % path)
+        elif linkage is not None and not is_id(linkage):
+            raise ParseError('Linkage at "%s" must be an id or null.' % path)
@@ -0,0 +1,215 @@
+from django.core.urlresolvers import Resolver404, resolve
+from django.db import transaction
+from django.http import HttpResponse
+from django.test.client import RequestFactory
+from django.utils import encoding, six
+from rest_framework import exceptions, parsers, permissions, renderers
+from rest_framework.views import APIView
+from rest_framework_json_api.renderers import JsonApiRenderer
+import json
+
+
+class BatchRollback(Exception):
+
+    def __init__(self, results):
+        self.results = results
+
+
+class BatchView(APIView):
+    """
+    Run a list of JSON API requests in a single request
+
+    The body is a JSON list of sub-requests, each with a `method`, a `url`,
+    and optionally a JSON API `body` and extra `headers`:
+
+    [
+        {"method": "GET", "url": "/posts/?page=2"},
+        {"method": "POST", "url": "/people/", "body": {"people": {...}}}
+    ]
+
+    Sub-requests are dispatched in order to the views of the urls, without
+    going through the middleware again.  They use the headers, user and
+    session of the batch request, and share its base url, so the renderers
+    compute it once.  The response is a JSON list with the status, headers
+    and document of each sub-request:
+
+    [
+        {"status": 200, "headers": {...}, "body": {"posts": [...]}},
+        {"status": 201, "headers": {...}, "body": {"people": {...}}}
+    ]
+
+    When `atomic` is set, the sub-requests run in a single transaction,
+    which is rolled back if a sub-request that is not a safe method fails.
+    The remaining sub-requests are not run, and every sub-request but the
+    failed one, including the ones that were not run, is reported with a
+    424 status, so the results still match the requests by position.
+    """
+
+    atomic = False
+    max_requests = 50
+    media_type = 'application/vnd.api+json'
+    methods = ("GET", "HEAD", "OPTIONS", "POST", "PUT", "PATCH", "DELETE")
+    parser_classes = (parsers.JSONParser, )
+    renderer_classes = (renderers.JSONRenderer, )
+
+    def post(self, request, *args, **kwargs):
+        try:
+            operations = request.data
+        except AttributeError:
+            operations = request.DATA
+
+        self.validate_operations(operations)
+
+        if not self.atomic:
+            results = self.run_operations(request, operations)
+        else:
+            try:
+                with transaction.atomic():
+                    results = self.run_operations(
+                        request, operations, stop_on_error=True)
+            except BatchRollback as e:
+                results = e.results
+
+        content = b"[" + b",".join(
+            self.encode_result(*result) for result in results) + b"]"
+
+        return HttpResponse(content, content_type="application/json")
+
+    def validate_operations(self, operations):
+        if not isinstance(operations, list):
+            raise exceptions.ParseError('A list of requests is required.')
+
+        if len(operations) > self.max_requests:
+            raise exceptions.ParseError(
+                'At most %d requests can be batched.' % self.max_requests)
+
+        for operation in operations:
+            if not isinstance(operation, dict) or \
+                    not isinstance(operation.get("url", None),
+                                   six.string_types):
+                raise exceptions.ParseError(
+                    'Each request must be an object with a url.')
+
+            method = operation.get("method", "GET")
+
+            if not isinstance(method, six.string_types) or \
+                    method.upper() not in self.methods:
+                raise exceptions.ParseError(
+                    'The method of each request must be one of %s.' %
+                    ", ".join(self.methods))
+
+            headers = operation.get("headers", {})
+
+            if not isinstance(headers, dict) or not all(
+                    isinstance(name, six.string_types) and
+                    isinstance(value, six.string_types)
+                    for name, value in six.iteritems(headers)):
+                raise exceptions.ParseError(
+                    'The headers of each request must be an object of '
+                    'strings.')
+
+    def run_operations(self, request, operations, stop_on_error=False):
+        factory = self.get_request_factory(request)
+        base_url = JsonApiRenderer().get_base_url(request)
+        results = []
+
+        for index, operation in enumerate(operations):
+            method = operation.get("method", "GET").upper()
+            result = self.run_operation(
+                factory, request, operation, method, base_url)
+            results.append(result)
+
+            safe = method in permissions.SAFE_METHODS
+
+            if stop_on_error and not safe and result[0] >= 400:
+                failed = [self.failed_dependency()] * len(operations)
+                failed[index] = result
+
+                raise BatchRollback(failed)
+
+        return results
+
+    def run_operation(self, factory, request, operation, method, base_url):
+        """Return the status, headers and content of a sub-request"""
+        url = operation["url"]
+        path = url.split("?", 1)[0]
+
+        try:
+            match = resolve(path, getattr(request, "urlconf", None))
+        except Resolver404:
+            return self.error_result(404, 'Not found.')
+
+        view_class = getattr(match.func, "cls", None)
+
+        if view_class is not None and issubclass(view_class, BatchView):
+            return self.error_result(400, 'Batches cannot be nested.')
+
+        body = b''
+
+        if operation.get("body", None) is not None:
+            body = encoding.force_bytes(json.dumps(operation["body"]))
+
+        extra = dict(
+            ("HTTP_%s" % name.upper().replace("-", "_"), value)
+            for name, value in six.iteritems(operation.get("headers", {}))
+        )
+
+        sub_request = factory.generic(
+            method, url, data=body, content_type=self.media_type, **extra)
+
+        # Attributes set on the batch request by the middleware
+        for name in ("user", "session", "_dont_enforce_csrf_checks"):
+            if hasattr(request._request, name):
+                setattr(sub_request, name, getattr(request._request, name))
+
+        sub_request._jsonapi_base_url = base_url
+
+        response = match.func(sub_request, *match.args, **match.kwargs)
+
+        if hasattr(response, "render") and callable(response.render):
+            response.render()
+
+        return (
+            response.status_code,
+            dict(response.items()),
+            response.content if self.is_json(response) else None,
+        )
+
+    def get_request_factory(self, request):
+        """Return a factory of sub-requests with the batch request's headers
+
+        The body, path, method and content headers are replaced for each
+        sub-request.
+        """
+        meta = dict(
+            (key, value)
+            for key, value in six.iteritems(request.META)
+            if key not in ("CONTENT_LENGTH", "CONTENT_TYPE", "PATH_INFO",
+                           "QUERY_STRING", "REQUEST_METHOD", "wsgi.input")
+        )
+        meta["HTTP_ACCEPT"] = self.media_type
+
+        return RequestFactory(**meta)
+
+    def is_json(self, response):
+        content_type = response.get("Content-Type", "").split(";")[0]
+
+        return bool(response.content) and content_type.endswith("json")
+
+    def encode_result(self, status_code, headers, content):
+        frame = encoding.force_bytes(json.dumps(
+            {"status": status_code, "headers": headers}, sort_keys=True))
+
+        # The documents are already encoded, so they are spliced in
+        return frame[:-1] + b', "body": ' + (content or b"null") + b"}"
+
+    def error_result(self, status_code, title):
+        content = json.dumps({"errors": [{
+            "status": str(status_code),
+            "title": title,
+        }]})
+
+        return (status_code, {}, encoding.force_bytes(content))
+
+    def failed_dependency(self):
+        return self.error_result(424, 'The batch was rolled back.')
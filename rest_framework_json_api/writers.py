@@ -0,0 +1,557 @@
+from collections import OrderedDict
+from django.utils import encoding, six
+from json.encoder import encode_basestring, encode_basestring_ascii
+from rest_framework.settings import api_settings
+from rest_framework_json_api.utils import (
+    get_class_cache, get_related_field, is_related_many
+)
+import json
+
+
+class WriterNotApplicable(ValueError):
+    pass
+
+
+class EncodedResources(list):
+    """
+    Resources that are already encoded as JSON text
+
+    Used for resources built outside of the serializer, such as in the
+    database.  `links` are the links of the relations, keyed by field name
+    like `convert_resource` returns them, and `pagination` is the pagination
+    metadata for paginated lists.
+    """
+
+    def __init__(self, resources, many=True, links=None, pagination=None):
+        super(EncodedResources, self).__init__(resources)
+
+        self.many = many
+        self.links = links or {}
+        self.pagination = pagination
+
+
+class JsonApiWriter(object):
+    """
+    Write JSON API documents as JSON text in a single pass
+
+    The default rendering path converts the serializer data into a second
+    tree of dictionaries (`convert_resource` and `wrap_default`), which is
+    then sorted and encoded by the JSON encoder.  The writer walks the
+    serializer data once instead, appending JSON fragments to a buffer that
+    is joined and encoded at the end.  Linked resources are written as the
+    nested serializers are visited, and are de-duplicated by id.
+
+    The documents are equivalent to the default ones, but are compact and
+    keep the order of the serializer fields instead of sorting the keys.
+
+    Which fields are attributes, relations or nested serializers is decided
+    once per renderer class, serializer class and set of fields, using the
+    `convert_by_name` and `convert_by_type` maps of the renderer, and kept
+    in the `plans` of each writer class.  Relations, and fields with
+    custom converters, are still passed through the converters of the
+    renderer and only their output is written.
+    """
+
+    ATTRIBUTE = "attribute"
+    NESTED = "nested"
+
+    direct_converters = {
+        'convert_to_text': 'text',
+        'rename_to_href': 'href',
+        'handle_nested_serializer': NESTED,
+    }
+
+    plans = {}
+
+    def __init__(self, renderer, renderer_context):
+        self.renderer = renderer
+        self.renderer_context = renderer_context
+        self.request = renderer_context.get("request", None)
+
+        ensure_ascii = getattr(renderer, "ensure_ascii", True)
+
+        if ensure_ascii:
+            self.encode_string = encode_basestring_ascii
+        else:
+            self.encode_string = encode_basestring
+
+        self.encoder = renderer.encoder_class(
+            ensure_ascii=ensure_ascii, separators=(',', ':'))
+
+        self.linked = {}
+        self.linked_types = []
+        self.linked_ids = {}
+        self.field_plans = {}
+        self.meta = renderer.dict_class()
+        self.resource_counts = {}
+
+    def write(self, data):
+        """Return the JSON API document for native data as bytes
+
+        Supports the same data as `wrap_default` and `wrap_paginated`, and
+        raises `WriterNotApplicable` for anything else.
+        """
+        pagination = None
+
+        if data and all(key in data for key in
+                        ('count', 'next', 'previous', 'results')):
+            pagination = self.renderer.dict_class()
+            pagination['previous'] = data['previous']
+            pagination['next'] = data['next']
+            pagination['count'] = data['count']
+
+            results = data["results"]
+            serializer = data.serializer.fields["results"]
+
+            self.renderer.attach_instances(
+                results, self.renderer.instances_from_data(data))
+
+            data = self.serializer_list(results, serializer)
+
+        view = self.renderer_context.get("view", None)
+        model = self.renderer.model_from_obj(view)
+        resource_type = self.renderer.model_to_resource_type(model)
+
+        if isinstance(data, list):
+            resources = data
+        else:
+            resources = [data]
+
+        links = self.renderer.dict_class()
+        items = []
+        serializer_class = self.get_serializer_class(data, view)
+        max_linkage_ids = self.renderer.max_linkage_ids
+        linkage_ids = 0
+
+        self.renderer.prepare_resources(resources, data, self.request)
+        resources = self.limit_resources(resources)
+
+        for resource in resources:
+            fields = self.renderer.fields_from_resource(resource, data)
+
+            if not fields:
+                raise WriterNotApplicable(
+                    'Items must have a fields attribute.')
+
+            mark = self.mark_linked()
+            item, count = self.write_resource(
+                resource, fields, links, serializer_class)
+
+            if max_linkage_ids is not None:
+                linkage_ids += count
+
+                if linkage_ids > max_linkage_ids:
+                    # Leaves out this resource and the next ones
+                    self.renderer.exceed_limit('max_linkage_ids')
+                    self.rollback_linked(mark)
+                    break
+
+            items.append(item)
+
+        parts = [self.encode_string(resource_type), ':']
+        self.resource_counts = {resource_type: len(items)}
+
+        if isinstance(data, list):
+            parts.extend(['[', ','.join(items), ']'])
+        else:
+            parts.append(items[0] if items else 'null')
+
+        if links:
+            links = self.renderer.prepend_links_with_name(
+                links, resource_type)
+            parts.extend([',"links":', self.encode(links)])
+
+        if self.linked_types:
+            parts.append(',"linked":{')
+            parts.append(','.join(
+                '%s:[%s]' % (self.encode_string(linked_type), ','.join(
+                    fragment for _, fragment in self.linked[linked_type]))
+                for linked_type in self.linked_types))
+            parts.append('}')
+
+        if pagination is not None:
+            meta_pagination = self.meta.setdefault(
+                'pagination', self.renderer.dict_class())
+            meta_pagination.setdefault(
+                resource_type, self.renderer.dict_class()).update(pagination)
+
+        self.write_meta(parts)
+
+        return ('{%s}' % ''.join(parts)).encode('utf-8')
+
+    def write_encoded(self, data):
+        """Return the JSON API document for `EncodedResources` as bytes"""
+        view = self.renderer_context.get("view", None)
+        model = self.renderer.model_from_obj(view)
+        resource_type = self.renderer.model_to_resource_type(model)
+
+        resources = self.limit_resources(list(data))
+
+        if self.renderer.max_linkage_ids is not None:
+            resources = self.limit_encoded_linkage(resources)
+
+        parts = [self.encode_string(resource_type), ':']
+        self.resource_counts = {resource_type: len(resources)}
+
+        if data.many:
+            parts.extend(['[', ','.join(resources), ']'])
+        else:
+            parts.append(resources[0] if resources else 'null')
+
+        if data.links:
+            links = self.renderer.prepend_links_with_name(
+                self.renderer.dict_class(data.links), resource_type)
+            parts.extend([',"links":', self.encode(links)])
+
+        if data.pagination is not None:
+            self.meta['pagination'] = self.renderer.dict_class()
+            self.meta['pagination'][resource_type] = data.pagination
+
+        self.write_meta(parts)
+
+        return ('{%s}' % ''.join(parts)).encode('utf-8')
+
+    def write_meta(self, parts):
+        """Write the `meta` of the document
+
+        The truncated limits, the `document_meta` of the view and the debug
+        data of `DebugMetaMixin` are merged into it, like the renderer does
+        for the documents it converts.
+        """
+        if self.renderer.truncated_limits:
+            self.meta["truncated"] = self.renderer.dict_class(
+                self.renderer.truncated_limits)
+
+        view = self.renderer_context.get("view", None)
+        document_meta = getattr(view, "document_meta", None)
+
+        if document_meta:
+            self.meta.update(document_meta)
+
+        debug = getattr(view, "jsonapi_debug", None)
+
+        if debug is not None:
+            debug.lap("conversion")
+
+            linked = self.renderer.dict_class(
+                (linked_type, len(self.linked[linked_type]))
+                for linked_type in self.linked_types)
+            self.meta["debug"] = debug.counts_as_meta(
+                self.renderer.dict_class(self.resource_counts), linked,
+                self.renderer.dict_class)
+
+        if self.meta:
+            parts.extend([',"meta":', self.encode(self.meta)])
+
+    def limit_resources(self, resources):
+        """Apply the `max_resources` limit of the renderer"""
+        limit = self.renderer.max_resources
+
+        if limit is not None and len(resources) > limit:
+            self.renderer.exceed_limit('max_resources')
+            resources = resources[:limit]
+
+        return resources
+
+    def limit_encoded_linkage(self, resources):
+        """Apply the `max_linkage_ids` limit to encoded resources
+
+        The linkage is only known once the resources are decoded, which is
+        only done when the limit is set.
+        """
+        linkage_ids = 0
+
+        for index, resource in enumerate(resources):
+            linked_ids = json.loads(resource).get("links", None) or {}
+            linkage_ids += self.renderer.count_linkage_ids(linked_ids)
+
+            if linkage_ids > self.renderer.max_linkage_ids:
+                self.renderer.exceed_limit('max_linkage_ids')
+
+                return resources[:index]
+
+        return resources
+
+    def write_resource(self, resource, fields, links, serializer_class):
+        """Return the JSON for a single resource, and its number of linkage ids
+
+        The links of the relations are added to `links`, the same way
+        `convert_resource` collects them.
+        """
+        parts = []
+        linkage = OrderedDict()
+
+        for field_name, field, kind, key in self.get_plan(
+                fields, serializer_class):
+            if kind is self.ATTRIBUTE:
+                if field_name in resource:
+                    parts.append(key + self.encode(resource[field_name]))
+            elif kind == 'text':
+                parts.append(key + self.encode_string(
+                    encoding.force_text(resource[field_name])))
+            elif kind == 'href':
+                parts.append('"href":' + self.encode(self.renderer.to_href(
+                    resource[field_name], self.request)))
+            elif kind is self.NESTED:
+                linkage[field_name] = self.write_nested(
+                    resource, field, field_name, links)
+            else:
+                converter = getattr(self.renderer, kind)
+                converted = converter(resource, field, field_name,
+                                      self.request)
+
+                if not converted:
+                    parts.append(key + self.encode(resource[field_name]))
+                    continue
+
+                for name, value in six.iteritems(converted.get("data", {})):
+                    parts.append(self.encode_key(name) + self.encode(value))
+
+                converted_ids = converted.get("linked_ids", {})
+                converted_links = converted.get("links", {})
+                links.update(converted_links)
+                self.meta.update(converted.get("meta", {}))
+
+                if self.add_converted_linked(converted.get("linked", {})):
+                    self.renderer.prune_linkage(
+                        converted_ids, converted_links, list(converted_ids),
+                        self.linked_ids)
+
+                linkage.update(converted_ids)
+
+        if linkage:
+            parts.append('"links":{%s}' % ','.join(
+                self.encode_key(name) + self.encode(value)
+                for name, value in six.iteritems(linkage)))
+
+        count = self.renderer.count_linkage_ids(linkage)
+
+        return '{%s}' % ','.join(parts), count
+
+    def add_converted_linked(self, linked):
+        """Add the linked resources of a converter, returning True if some
+        were left out by `max_linked_resources`"""
+        truncated = False
+
+        for linked_type, linked_objs in six.iteritems(linked):
+            for linked_obj in linked_objs:
+                obj_id = encoding.force_text(linked_obj["id"])
+
+                if self.can_add_linked(linked_type, obj_id):
+                    self.add_linked(
+                        linked_type, obj_id, self.encode(linked_obj))
+                else:
+                    truncated = True
+
+        return truncated
+
+    def write_nested(self, resource, field, field_name, links):
+        """Write the linked resources of a nested serializer
+
+        Returns the linkage of the field, and adds the links of the field and
+        of the nested resources to `links`.  Resources left out by
+        `max_linked_resources` are left out of the linkage too.
+        """
+        serializer_field = get_related_field(field)
+
+        if hasattr(serializer_field, "opts"):
+            model = serializer_field.opts.model
+        else:
+            model = serializer_field.Meta.model
+
+        resource_type = self.renderer.model_to_resource_type(model)
+        self.add_linked_type(resource_type)
+
+        many = is_related_many(field)
+
+        if many:
+            items = resource[field_name]
+        else:
+            items = [resource[field_name]]
+
+        obj_ids = []
+        nested_links = self.renderer.dict_class()
+        fields = serializer_field.fields
+
+        for item in items:
+            if item is None:
+                continue
+
+            obj_id = encoding.force_text(item["id"])
+
+            if not self.can_add_linked(resource_type, obj_id):
+                continue
+
+            obj_ids.append(obj_id)
+
+            if obj_id not in self.linked_ids[resource_type]:
+                fragment, _ = self.write_resource(
+                    item, fields, nested_links, type(serializer_field))
+                self.add_linked(resource_type, obj_id, fragment)
+
+        if obj_ids:
+            field_links = self.renderer.prepend_links_with_name(
+                nested_links, resource_type)
+
+            field_links[field_name] = {
+                "type": resource_type,
+            }
+
+            url_field_name = api_settings.URL_FIELD_NAME
+
+            if url_field_name in fields:
+                field_links[field_name]["href"] = \
+                    self.renderer.url_to_template(
+                        fields[url_field_name].view_name, self.request,
+                        field_name)
+
+            links.update(field_links)
+
+        if many:
+            return obj_ids
+
+        if obj_ids:
+            return obj_ids[0]
+
+        return None
+
+    def add_linked_type(self, linked_type):
+        if linked_type not in self.linked:
+            self.linked[linked_type] = []
+            self.linked_ids[linked_type] = set()
+            self.linked_types.append(linked_type)
+
+    def add_linked(self, linked_type, obj_id, fragment):
+        self.add_linked_type(linked_type)
+
+        if obj_id not in self.linked_ids[linked_type]:
+            self.linked_ids[linked_type].add(obj_id)
+            self.linked[linked_type].append((obj_id, fragment))
+
+    def can_add_linked(self, linked_type, obj_id):
+        """Return False for new linked resources over `max_linked_resources`"""
+        limit = self.renderer.max_linked_resources
+
+        if limit is None or obj_id in self.linked_ids.get(linked_type, ()):
+            return True
+
+        if len(self.linked.get(linked_type, ())) < limit:
+            return True
+
+        self.renderer.exceed_limit('max_linked_resources')
+
+        return False
+
+    def mark_linked(self):
+        """Return the number of linked resources of each type"""
+        return [
+            (linked_type, len(self.linked[linked_type]))
+            for linked_type in self.linked_types
+        ]
+
+    def rollback_linked(self, mark):
+        """Remove the linked resources added since `mark_linked`"""
+        for linked_type in self.linked_types[len(mark):]:
+            del self.linked[linked_type]
+            del self.linked_ids[linked_type]
+
+        del self.linked_types[len(mark):]
+
+        for linked_type, count in mark:
+            for obj_id, _ in self.linked[linked_type][count:]:
+                self.linked_ids[linked_type].discard(obj_id)
+
+            del self.linked[linked_type][count:]
+
+    def get_serializer_class(self, data, view):
+        """Return the class of the serializer of the top level resources"""
+        serializer = getattr(data, "serializer", None)
+
+        if serializer is not None:
+            return type(getattr(serializer, "child", serializer))
+
+        if hasattr(view, "get_serializer_class"):
+            return view.get_serializer_class()
+
+        return None
+
+    def get_plan(self, fields, serializer_class):
+        """Return the `(name, field, kind, key)` of every serializer field
+
+        The kind is the name of a converter method of the renderer, or a
+        kind the writer handles itself.  Kinds are cached per renderer class,
+        serializer class and field names, and the plan is built once per
+        document for each set of fields.
+        """
+        cached = self.field_plans.get(id(fields), None)
+
+        if cached is not None and cached[0] is fields:
+            return cached[1]
+
+        cache_key = (
+            type(self.renderer), serializer_class, tuple(fields.keys()),
+        )
+
+        plans = get_class_cache(type(self), "plans")
+        kinds = plans.get(cache_key, None)
+
+        if kinds is None:
+            kinds = [self.field_kind(field_name, field)
+                     for field_name, field in six.iteritems(fields)]
+            plans[cache_key] = kinds
+
+        plan = [
+            (field_name, field, kind, self.encode_key(field_name))
+            for (field_name, field), kind in zip(six.iteritems(fields), kinds)
+        ]
+        self.field_plans[id(fields)] = (fields, plan)
+
+        return plan
+
+    def field_kind(self, field_name, field):
+        converter_name = None
+
+        if field_name in self.renderer.convert_by_name:
+            converter_name = self.renderer.convert_by_name[field_name]
+        else:
+            related_field = get_related_field(field)
+
+            for field_type, name in \
+                    six.iteritems(self.renderer.convert_by_type):
+                if isinstance(related_field, field_type):
+                    converter_name = name
+                    break
+
+        if converter_name is None:
+            return self.ATTRIBUTE
+
+        return self.direct_converters.get(converter_name, converter_name)
+
+    def serializer_list(self, results, serializer):
+        try:
+            from rest_framework.utils.serializer_helpers import ReturnList
+        except ImportError:
+            return results
+
+        return ReturnList(results, serializer=serializer)
+
+    def encode_key(self, key):
+        return self.encode_string(key) + ':'
+
+    def encode(self, value):
+        if isinstance(value, six.string_types):
+            return self.encode_string(value)
+
+        if value is None:
+            return 'null'
+
+        if value is True:
+            return 'true'
+
+        if value is False:
+            return 'false'
+
+        if type(value) in six.integer_types:
+            return str(value)
+
+        return self.encoder.encode(value)
@@ -30,10 +30,16 @@ setup(
     url='https://github.com/kevin-brown/drf-json-api',
     packages=[
         'rest_framework_json_api',
+        'rest_framework_json_api.management',
+        'rest_framework_json_api.management.commands',
+        'rest_framework_json_api.migrations',
     ],
     package_dir={'rest_framework_json_api': 'rest_framework_json_api'},
     include_package_data=True,
     install_requires=[],
+    extras_require={
+        'msgpack': ['msgpack'],
+    },
     license='MIT',
     zip_safe=False,
     keywords='drf-json-api',
@@ -1,4 +1,5 @@
 from django.db import models
+from rest_framework_json_api.models import track_deletions
 
 
 class Person(models.Model):
@@ -30,3 +31,23 @@ class ProfileImage(models.Model):
     person = models.ForeignKey(Person)
     url = models.URLField()
     current = models.BooleanField(db_index=True)
+
+
+class Article(models.Model):
+    title = models.CharField(max_length=100)
+    modified = models.DateTimeField(auto_now=True, db_index=True)
+
+
+class Category(models.Model):
+    code = models.CharField(max_length=20, unique=True)
+
+    # Self-referential ForeignKey
+    parent = models.ForeignKey(
+        "self", blank=True, null=True, related_name="children")
+
+    # ForeignKey to a field other than the primary key
+    successor = models.ForeignKey(
+        "self", blank=True, null=True, to_field="code", related_name="+")
+
+
+track_deletions(Article)
@@ -1,8 +1,16 @@
 from rest_framework import relations, serializers
+from rest_framework_json_api.serializers import LinkageLimitsMixin
 from tests import models
 import rest_framework
 
 
+class ArticleSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        fields = ("id", "title", "modified", )
+        model = models.Article
+
+
 class CommentSerializer(serializers.HyperlinkedModelSerializer):
 
     class Meta:
@@ -31,6 +39,12 @@ class MaximalPersonSerializer(serializers.HyperlinkedModelSerializer):
         model = models.Person
 
 
+class CappedPostSerializer(LinkageLimitsMixin, PostSerializer):
+
+    class Meta(PostSerializer.Meta):
+        linkage_limits = {"comments": 1}
+
+
 class MinimalCommentSerializer(CommentSerializer):
 
     class Meta(CommentSerializer.Meta):
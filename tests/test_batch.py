@@ -0,0 +1,109 @@
+"""Test the batch requests of `BatchView`"""
+
+from django.core.urlresolvers import reverse
+from django.utils.encoding import force_text
+from tests import models
+from tests.utils import dump_json
+import json
+import pytest
+
+pytestmark = pytest.mark.django_db
+
+
+def batch(client, operations, name="batch"):
+    response = client.post(
+        reverse(name), data=json.dumps(operations),
+        content_type="application/json")
+
+    return response, json.loads(force_text(response.content))
+
+
+def test_batch(client):
+    models.Person.objects.create(name="test")
+
+    response, results = batch(client, [
+        {"method": "GET", "url": "/people/1/"},
+        {"method": "POST", "url": "/people/",
+         "body": {"people": {"name": "new"}}},
+        {"method": "DELETE", "url": "/people/1/"},
+    ])
+
+    assert response.status_code == 200, response.content
+    assert [result["status"] for result in results] == [200, 201, 204]
+    assert results[0]["body"] == {"people": {
+        "id": "1",
+        "href": "http://testserver/people/1/",
+        "name": "test",
+    }}
+    assert results[1]["body"]["people"]["name"] == "new"
+    assert results[1]["headers"]["Content-Type"].startswith(
+        "application/vnd.api+json")
+    assert results[2]["body"] is None
+
+    assert list(models.Person.objects.values_list("name", flat=True)) == \
+        ["new"]
+
+
+def test_matches_single_requests(client):
+    models.Person.objects.create(name="test")
+
+    _, results = batch(client, [{"url": "/people/?name=test"}])
+    response = client.get("/people/?name=test")
+
+    assert dump_json(results[0]["body"]) == response.content
+
+
+def test_not_found(client):
+    _, results = batch(client, [{"url": "/missing/"}])
+
+    assert results[0]["status"] == 404
+    assert results[0]["body"]["errors"][0]["status"] == "404"
+
+
+def test_nested_batch(client):
+    _, results = batch(client, [{"method": "POST", "url": "/batch/"}])
+
+    assert results[0]["status"] == 400
+
+
+def test_invalid_batch(client):
+    response, _ = batch(client, {"url": "/people/"})
+
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("operation", [
+    {"method": 5, "url": "/people/"},
+    {"method": "TRACE", "url": "/people/"},
+    {"url": "/people/", "headers": ["x"]},
+    {"url": "/people/", "headers": {"X-Test": 1}},
+])
+def test_invalid_operation(client, operation):
+    response, _ = batch(client, [operation])
+
+    assert response.status_code == 400
+
+
+def test_atomic_rollback(client):
+    response, results = batch(client, [
+        {"method": "POST", "url": "/people/",
+         "body": {"people": {"name": "new"}}},
+        {"method": "POST", "url": "/people/", "body": {"people": {}}},
+        {"method": "POST", "url": "/people/",
+         "body": {"people": {"name": "never"}}},
+    ], name="atomic-batch")
+
+    assert response.status_code == 200, response.content
+    assert [result["status"] for result in results] == [424, 400, 424]
+    assert not models.Person.objects.exists()
+
+
+def test_not_atomic(client):
+    _, results = batch(client, [
+        {"method": "POST", "url": "/people/",
+         "body": {"people": {"name": "new"}}},
+        {"method": "POST", "url": "/people/", "body": {"people": {}}},
+    ])
+
+    assert [result["status"] for result in results] == [201, 400]
+    assert models.Person.objects.count() == 1
@@ -0,0 +1,132 @@
+"""Test the coalescing of identical requests by `CoalesceMixin`"""
+
+from rest_framework.response import Response
+from rest_framework_json_api.mixins import CoalesceMixin, InFlightRequest
+from tests import models
+from tests import views
+import threading
+import time
+
+
+class SlowPersonViewSet(CoalesceMixin, views.PersonViewSet):
+    """Lists people without queries, once the `release` event is set"""
+
+    calls = 0
+    release = threading.Event()
+
+    def list(self, request, *args, **kwargs):
+        SlowPersonViewSet.calls += 1
+        self.release.wait(5)
+
+        people = [models.Person(pk=1, name="test")]
+
+        return Response(self.get_serializer(people, many=True).data)
+
+
+def get(rf, responses, **extra):
+    view = SlowPersonViewSet.as_view({"get": "list"})
+    response = view(rf.get("/people/", **extra))
+
+    if hasattr(response, "render"):
+        response.render()
+
+    responses.append(response)
+
+
+def key(rf, **extra):
+    request = rf.get("/people/", **extra)
+
+    return SlowPersonViewSet().get_coalesce_key(request)
+
+
+def setup_function(function):
+    SlowPersonViewSet.calls = 0
+    SlowPersonViewSet.release.clear()
+
+
+def test_concurrent_requests_are_coalesced(rf):
+    responses = []
+    threads = [
+        threading.Thread(target=get, args=(rf, responses))
+        for _ in range(5)
+    ]
+
+    for thread in threads:
+        thread.start()
+
+    # Give the other requests time to wait for the first one
+    while not SlowPersonViewSet.coalesce_in_flight:
+        time.sleep(0.01)
+
+    time.sleep(0.2)
+    SlowPersonViewSet.release.set()
+
+    for thread in threads:
+        thread.join()
+
+    assert SlowPersonViewSet.calls == 1
+    assert len(set(response.content for response in responses)) == 1
+    assert all(response["Content-Type"] == responses[0]["Content-Type"]
+               for response in responses)
+    assert not SlowPersonViewSet.coalesce_in_flight
+
+
+def test_follower_gets_shared_response(rf):
+    in_flight = InFlightRequest()
+    in_flight.result = (b"shared", [("Content-Type", "text/plain")])
+    in_flight.done.set()
+
+    SlowPersonViewSet.coalesce_in_flight[key(rf)] = in_flight
+
+    try:
+        responses = []
+        get(rf, responses)
+    finally:
+        SlowPersonViewSet.coalesce_in_flight.clear()
+
+    assert SlowPersonViewSet.calls == 0
+    assert responses[0].content == b"shared"
+    assert responses[0]["Content-Type"] == "text/plain"
+
+
+def test_follower_times_out(rf):
+    class TimeoutViewSet(SlowPersonViewSet):
+        coalesce_timeout = 0.01
+
+    SlowPersonViewSet.release.set()
+
+    request = rf.get("/people/")
+    TimeoutViewSet.coalesce_in_flight[
+        TimeoutViewSet().get_coalesce_key(request)] = InFlightRequest()
+
+    try:
+        response = TimeoutViewSet.as_view({"get": "list"})(request)
+    finally:
+        TimeoutViewSet.coalesce_in_flight.clear()
+
+    assert response.status_code == 200
+    assert SlowPersonViewSet.calls == 1
+
+
+def test_failed_leader_releases_followers(rf):
+    in_flight = InFlightRequest()
+    in_flight.done.set()
+
+    SlowPersonViewSet.release.set()
+    SlowPersonViewSet.coalesce_in_flight[key(rf)] = in_flight
+
+    try:
+        responses = []
+        get(rf, responses)
+    finally:
+        SlowPersonViewSet.coalesce_in_flight.clear()
+
+    assert responses[0].status_code == 200
+    assert SlowPersonViewSet.calls == 1
+
+
+def test_scope(rf):
+    assert key(rf) != key(rf, HTTP_AUTHORIZATION="Token 1")
+    assert key(rf, HTTP_AUTHORIZATION="Token 1") == \
+        key(rf, HTTP_AUTHORIZATION="Token 1")
+    assert SlowPersonViewSet().get_coalesce_key(rf.post("/people/")) is None
@@ -0,0 +1,132 @@
+"""Test building resources as JSON in the database
+
+Every supported view is rendered with and without `DatabaseJsonMixin`, and
+both documents must contain the same data.
+"""
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.encoding import force_text
+from rest_framework import relations, serializers
+from rest_framework_json_api.mixins import DatabaseJsonMixin
+from rest_framework_json_api.renderers import JsonApiRenderer
+from rest_framework_json_api.sql import NotSupported, ResourceCompiler
+from rest_framework_json_api.writers import EncodedResources
+from tests import models
+from tests import views
+import json
+import pytest
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def content():
+    author = models.Person.objects.create(name="author")
+    fan = models.Person.objects.create(name=u"fan \u2603 \"quoted\"")
+    post = models.Post.objects.create(title="A post", author=author)
+    other = models.Post.objects.create(title="Another post", author=author)
+    comment = models.Comment.objects.create(post=post, body="First")
+    second = models.Comment.objects.create(post=post, body="Second")
+    models.Comment.objects.create(post=other, body="Third")
+
+    fan.favorite_post = post
+    fan.save()
+    fan.liked_comments.add(comment, second)
+
+
+def render(rf, viewset, path="/"):
+    view = viewset.as_view({"get": "list"})
+    response = view(rf.get(path))
+    response.render()
+
+    return response, json.loads(force_text(response.content))
+
+
+@pytest.mark.parametrize("viewset", [
+    views.CommentViewSet,
+    views.PersonViewSet,
+    views.PostViewSet,
+    views.MaximalPersonViewSet,
+    views.PkCommentViewSet,
+    views.PkMaximalPersonViewSet,
+])
+def test_matches_default(rf, content, viewset):
+    database_viewset = type(
+        "Database" + viewset.__name__, (DatabaseJsonMixin, viewset), {})
+
+    _, expected = render(rf, viewset)
+    response, written = render(rf, database_viewset)
+
+    assert isinstance(response.data, EncodedResources)
+    assert written == expected
+
+
+def test_single_query(rf, content):
+    class DatabasePostViewSet(DatabaseJsonMixin, views.PostViewSet):
+        pass
+
+    render(rf, DatabasePostViewSet)
+
+    with CaptureQueriesContext(connection) as queries:
+        render(rf, DatabasePostViewSet)
+
+    assert len(queries) == 1
+
+
+def test_paginated(rf, content):
+    class PaginatedPostViewSet(views.PostViewSet):
+        paginate_by = 1
+
+    class DatabasePostViewSet(DatabaseJsonMixin, PaginatedPostViewSet):
+        pass
+
+    _, expected = render(rf, PaginatedPostViewSet, "/?page=2")
+    response, written = render(rf, DatabasePostViewSet, "/?page=2")
+
+    assert isinstance(response.data, EncodedResources)
+    assert written == expected
+    assert written["meta"]["pagination"]["posts"]["previous"] == \
+        "http://testserver/?page=1"
+
+
+def test_nested_serializer_falls_back(rf, content):
+    class DatabasePostViewSet(DatabaseJsonMixin, views.NestedPostViewSet):
+        pass
+
+    _, expected = render(rf, views.NestedPostViewSet)
+    response, written = render(rf, DatabasePostViewSet)
+
+    assert not isinstance(response.data, EncodedResources)
+    assert written == expected
+
+
+class CategorySerializer(serializers.ModelSerializer):
+    children = relations.PrimaryKeyRelatedField(
+        many=True, required=False, queryset=models.Category.objects)
+
+    class Meta:
+        model = models.Category
+        fields = ("id", "parent", "successor", "children")
+
+
+@pytest.mark.parametrize("field_name, message", [
+    ("parent", None),
+    ("successor", 'Field "successor" does not link to the primary key.'),
+    ("children", 'Field "children" is a self-referential relation.'),
+])
+def test_linkage_not_supported(rf, field_name, message):
+    serializer = CategorySerializer()
+    compiler = ResourceCompiler(
+        JsonApiRenderer(), serializer, models.Category.objects.all(),
+        rf.get("/"))
+
+    field = serializer.fields[field_name]
+
+    if message is None:
+        compiler.linkage(field_name, field)
+    else:
+        with pytest.raises(NotSupported) as excinfo:
+            compiler.linkage(field_name, field)
+
+        assert str(excinfo.value) == message
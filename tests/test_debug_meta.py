@@ -0,0 +1,118 @@
+"""Test the debug data added to the meta by `DebugMetaMixin`"""
+
+from django.utils.encoding import force_text
+from rest_framework_json_api.mixins import DatabaseJsonMixin, DebugMetaMixin
+from rest_framework_json_api.renderers import JsonApiRenderer
+from rest_framework_json_api.writers import JsonApiWriter
+from tests import models
+from tests import views
+import json
+import pytest
+
+pytestmark = pytest.mark.django_db
+
+
+class DebugRenderer(JsonApiRenderer):
+    debug_meta = True
+
+
+class DebugPostViewSet(DebugMetaMixin, views.NestedPostViewSet):
+    pass
+
+
+@pytest.fixture()
+def content():
+    author = models.Person.objects.create(name="test")
+    post = models.Post.objects.create(author=author, title="Post")
+    models.Comment.objects.create(post=post, body="First")
+    models.Comment.objects.create(post=post, body="Second")
+    models.Post.objects.create(author=author, title="Another post")
+
+
+def get(rf, renderer_class=JsonApiRenderer, viewset=DebugPostViewSet,
+        **extra):
+    view = viewset.as_view(
+        {"get": "list"}, renderer_classes=(renderer_class, ))
+    response = view(rf.get("/", **extra))
+    response.render()
+
+    return response, json.loads(force_text(response.content))
+
+
+def test_debug_meta(rf, content):
+    response, document = get(rf, DebugRenderer)
+    debug = document["meta"]["debug"]
+
+    assert debug["queries"] == 2
+    assert debug["db_time"] >= 0
+    assert debug["resources"] == {"posts": 2}
+    assert debug["linked"] == {"comments": 2}
+    assert sorted(debug["timings"]) == ["conversion", "serialization"]
+
+    assert response["Server-Timing"].startswith("db;dur=")
+    assert "encoding;dur=" in response["Server-Timing"]
+
+
+def test_debug_meta_paginated(rf, content):
+    class PaginatedViewSet(DebugPostViewSet):
+        paginate_by = 1
+
+    _, document = get(rf, DebugRenderer, PaginatedViewSet)
+
+    assert document["meta"]["pagination"]["posts"]["count"] == 2
+    assert document["meta"]["debug"]["resources"] == {"posts": 1}
+
+
+def test_debug_meta_header(rf, settings, content):
+    settings.INTERNAL_IPS = ["127.0.0.1"]
+
+    _, document = get(rf, HTTP_X_JSON_API_DEBUG="1")
+
+    assert document["meta"]["debug"]["resources"] == {"posts": 2}
+
+
+def test_debug_meta_header_untrusted(rf, settings, content):
+    settings.INTERNAL_IPS = []
+
+    response, document = get(rf, HTTP_X_JSON_API_DEBUG="1")
+
+    assert "meta" not in document
+    assert not response.has_header("Server-Timing")
+
+
+def test_debug_meta_off(rf, settings, content):
+    settings.INTERNAL_IPS = ["127.0.0.1"]
+
+    response, document = get(rf)
+
+    assert "meta" not in document
+    assert response.renderer_context["view"].jsonapi_debug is None
+
+
+def test_debug_meta_requires_mixin(rf, content):
+    _, document = get(rf, DebugRenderer, views.NestedPostViewSet)
+
+    assert "meta" not in document
+
+
+class DebugWriterRenderer(DebugRenderer):
+    writer_class = JsonApiWriter
+
+
+class DebugDatabasePostViewSet(DatabaseJsonMixin, DebugMetaMixin,
+                               views.PostViewSet):
+    pass
+
+
+@pytest.mark.parametrize("viewset, linked", [
+    (DebugPostViewSet, {"comments": 2}),
+    (DebugDatabasePostViewSet, {}),
+])
+def test_debug_meta_writer(rf, content, viewset, linked):
+    response, document = get(rf, DebugWriterRenderer, viewset)
+    debug = document["meta"]["debug"]
+
+    assert debug["resources"] == {"posts": 2}
+    assert debug["linked"] == linked
+    assert sorted(debug["timings"]) == ["conversion", "serialization"]
+    assert "encoding;dur=" in response["Server-Timing"]
@@ -1,9 +1,12 @@
 """Test error response renderer"""
 
+from collections import OrderedDict
 from django.core.urlresolvers import reverse
 from rest_framework.relations import HyperlinkedRelatedField
 from rest_framework.serializers import ValidationError
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework_json_api.renderers import JsonApiRenderer
 
 from tests import models
 from tests.serializers import PersonSerializer
@@ -218,3 +221,143 @@ def test_bad_json(client):
         }]
     }
     assert response.content == dump_json(results)
+
+
+def test_bulk_validation_errors(renderer):
+    data = [
+        {},
+        {"name": ["This field is required."]},
+    ]
+    renderer_context = {
+        "response": Response(data, status=400),
+        "view": PersonViewSet(),
+    }
+
+    results = {
+        "errors": [{
+            "status": "400",
+            "path": "/people/1/name",
+            "detail": "This field is required.",
+        }]
+    }
+
+    assert renderer.render(data, renderer_context=renderer_context) == \
+        dump_json(results)
+
+
+def test_nested_validation_errors(renderer):
+    data = OrderedDict([
+        ("author", OrderedDict([
+            ("name", ["This field is required."]),
+            ("non_field_errors", ["Authors must be people."]),
+        ])),
+        ("comments", [
+            {},
+            {"body": ["This field may not be blank."]},
+        ]),
+    ])
+    renderer_context = {
+        "response": Response(data, status=400),
+        "view": PersonViewSet(),
+    }
+
+    results = {
+        "errors": [{
+            "status": "400",
+            "path": "/author/name",
+            "detail": "This field is required.",
+        }, {
+            "status": "400",
+            "path": "/author/-",
+            "detail": "Authors must be people.",
+        }, {
+            "status": "400",
+            "path": "/comments/1/body",
+            "detail": "This field may not be blank.",
+        }]
+    }
+
+    assert renderer.render(data, renderer_context=renderer_context) == \
+        dump_json(results)
+
+
+def test_validation_errors_are_capped(renderer):
+    data = [{"name": ["This field is required."]} for _ in range(10)]
+    renderer_context = {
+        "response": Response(data, status=400),
+        "view": PersonViewSet(),
+    }
+    renderer.max_errors = 3
+
+    results = {
+        "errors": [{
+            "status": "400",
+            "path": "/people/%d/name" % index,
+            "detail": "This field is required.",
+        } for index in range(3)]
+    }
+
+    assert renderer.render(data, renderer_context=renderer_context) == \
+        dump_json(results)
+
+
+def cached_error_renderer(size=256):
+    class CachedErrorRenderer(JsonApiRenderer):
+        error_cache = OrderedDict()
+        error_cache_size = size
+        wrapped = 0
+
+        def wrap_error(self, *args, **kwargs):
+            CachedErrorRenderer.wrapped += 1
+
+            return super(CachedErrorRenderer, self).wrap_error(
+                *args, **kwargs)
+
+    return CachedErrorRenderer()
+
+
+def render_error(renderer, status, detail):
+    data = {"detail": detail}
+    renderer_context = {
+        "response": Response(data, status=status),
+        "view": PersonViewSet(),
+    }
+
+    return renderer.render(data, renderer_context=renderer_context)
+
+
+def test_generic_errors_are_cached():
+    renderer = cached_error_renderer()
+
+    first = render_error(renderer, 404, "Not found")
+    second = render_error(renderer, 404, "Not found")
+
+    assert first == dump_json({"errors": [{
+        "status": "404",
+        "title": "Not found",
+    }]})
+    assert second is first
+    assert renderer.wrapped == 1
+
+    render_error(renderer, 403, "Not found")
+
+    assert renderer.wrapped == 2
+
+
+def test_error_cache_is_bounded():
+    renderer = cached_error_renderer(size=2)
+
+    for detail in ["First", "Second", "Third"]:
+        render_error(renderer, 401, detail)
+
+    assert [key[-1] for key in renderer.error_cache] == ["Second", "Third"]
+
+
+def test_bad_requests_are_not_cached():
+    renderer = cached_error_renderer()
+
+    render_error(renderer, 400, "Malformed request.")
+    render_error(renderer, 400, "Malformed request.")
+
+    assert renderer.wrapped == 2
+    assert not renderer.error_cache
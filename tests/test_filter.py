@@ -0,0 +1,126 @@
+"""Test the `filter[<field>]` parameters of `JsonApiFilter`"""
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.encoding import force_text
+from rest_framework_json_api.filters import JsonApiFilter
+from tests import models
+from tests import views
+import json
+import pytest
+
+pytestmark = pytest.mark.django_db
+
+
+class FilteredPostViewSet(views.PostViewSet):
+    filter_backends = (JsonApiFilter, )
+    filter_fields = ("author", "title", "comments")
+    paginate_by = 2
+
+
+class IndexedPostViewSet(FilteredPostViewSet):
+    filter_require_index = True
+
+
+@pytest.fixture()
+def content():
+    first = models.Person.objects.create(name="first")
+    second = models.Person.objects.create(name="second")
+
+    post = models.Post.objects.create(title="A", author=first)
+    models.Post.objects.create(title="B", author=second)
+    models.Post.objects.create(title="A", author=second)
+
+    models.Comment.objects.create(post=post, body="First")
+    models.Comment.objects.create(post=post, body="Second")
+
+
+def get(rf, viewset, query):
+    view = viewset.as_view({"get": "list"})
+    response = view(rf.get("/", query))
+    response.render()
+
+    return response, json.loads(force_text(response.content))
+
+
+def ids(document):
+    return [post["id"] for post in document["posts"]]
+
+
+def test_filter_by_relation(rf, content):
+    with CaptureQueriesContext(connection) as queries:
+        _, document = get(rf, FilteredPostViewSet, {"filter[author]": "2"})
+
+    assert ids(document) == ["2", "3"]
+    assert not any("JOIN" in query["sql"] and "author_id" in query["sql"]
+                   for query in queries)
+
+
+def test_filter_by_field(rf, content):
+    _, document = get(rf, FilteredPostViewSet, {
+        "filter[author]": "2",
+        "filter[title]": "A",
+    })
+
+    assert ids(document) == ["3"]
+
+
+def test_filter_list_of_values(rf, content):
+    _, document = get(rf, FilteredPostViewSet, {"filter[title]": "A,B"})
+
+    assert ids(document) == ["1", "2"]
+    assert document["meta"]["pagination"]["posts"]["count"] == 3
+
+
+def test_filter_to_many_relation(rf, content):
+    _, document = get(rf, FilteredPostViewSet, {"filter[comments]": "1,2"})
+
+    assert ids(document) == ["1"]
+
+
+def test_filter_not_allowed(rf, content):
+    response, document = get(
+        rf, FilteredPostViewSet, {"filter[unknown]": "1"})
+
+    assert response.status_code == 400
+    assert document["errors"][0]["detail"] == \
+        'Filtering by "unknown" is not supported.'
+
+
+def test_filter_invalid_value(rf, content):
+    response, document = get(
+        rf, FilteredPostViewSet, {"filter[author]": "first"})
+
+    assert response.status_code == 400
+    assert document["errors"][0]["detail"] == \
+        'Invalid value for filter "author".'
+
+
+def test_filter_require_index(rf, content):
+    _, document = get(rf, IndexedPostViewSet, {"filter[author]": "1"})
+
+    assert ids(document) == ["1"]
+
+    response, _ = get(rf, IndexedPostViewSet, {"filter[title]": "A"})
+
+    assert response.status_code == 400
+
+
+def test_filter_require_index_to_many_relation(rf, content):
+    response, document = get(
+        rf, IndexedPostViewSet, {"filter[comments]": "1,2"})
+
+    assert response.status_code == 200
+    assert ids(document) == ["1"]
+
+
+def test_filter_plan_cached(rf, content):
+    JsonApiFilter.plans.clear()
+
+    get(rf, FilteredPostViewSet, {"filter[title]": "A"})
+    get(rf, FilteredPostViewSet, {"filter[title]": "B"})
+
+    keys = [key for key in JsonApiFilter.plans
+            if key[0] is FilteredPostViewSet]
+
+    assert [key[-1] for key in keys] == [("title", )]
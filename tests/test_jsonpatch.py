@@ -0,0 +1,235 @@
+"""Test the JSON Patch extension
+
+Parsing is tested through the echo view, applying the operations through
+the list view of `PatchPersonViewSet`.
+"""
+
+from django.core.urlresolvers import reverse
+from tests import models
+from tests.utils import dump_json
+import pytest
+
+pytestmark = pytest.mark.django_db
+
+jsonpatch_media_type = "application/vnd.api+json; ext=jsonpatch"
+
+
+def test_parse_operations(client):
+    test_data = dump_json([
+        {"op": "add", "path": "/-", "value": {"name": "new"}},
+        {"op": "replace", "path": "/people/1/name", "value": "changed"},
+        {"op": "replace", "path": "/2", "value": {"people": {"name": "x"}}},
+        {"op": "remove", "path": "/3"},
+    ])
+
+    output_data = [
+        {"op": "add", "id": None, "data": {"name": "new"}},
+        {"op": "replace", "id": "1", "data": {"name": "changed"}},
+        {"op": "replace", "id": "2", "data": {"name": "x"}},
+        {"op": "remove", "id": "3", "data": None},
+    ]
+
+    response = client.generic(
+        "echo", reverse("person-list"), data=test_data,
+        content_type=jsonpatch_media_type)
+
+    assert response.data == output_data
+
+
+def test_parse_link_operation(client):
+    test_data = dump_json([
+        {"op": "replace", "path": "/1/links/post", "value": "2"},
+    ])
+
+    output_data = [
+        {"op": "replace", "id": "1", "data": {
+            "post": "http://testserver/posts/2/",
+        }},
+    ]
+
+    response = client.generic(
+        "echo", reverse("comment-list"), data=test_data,
+        content_type=jsonpatch_media_type)
+
+    assert response.data == output_data
+
+
+def test_unsupported_operation(client):
+    test_data = dump_json([
+        {"op": "move", "from": "/1", "path": "/2"},
+    ])
+
+    response = client.patch(
+        reverse("patch-person-list"), data=test_data,
+        content_type=jsonpatch_media_type)
+
+    assert response.status_code == 400, response.content
+
+    results = {
+        "errors": [{
+            "status": "400",
+            "detail": 'Unsupported JSON Patch operation "move".',
+        }]
+    }
+
+    assert response.content == dump_json(results)
+
+
+def test_apply_operations(client):
+    models.Person.objects.create(name="first")
+    models.Person.objects.create(name="second")
+
+    test_data = dump_json([
+        {"op": "add", "path": "/-", "value": {"name": "third"}},
+        {"op": "replace", "path": "/1/name", "value": "changed"},
+        {"op": "remove", "path": "/2"},
+    ])
+
+    results = [
+        {
+            "people": {
+                "id": "3",
+                "href": "http://testserver/people/3/",
+                "name": "third",
+            },
+        },
+        {
+            "people": {
+                "id": "1",
+                "href": "http://testserver/people/1/",
+                "name": "changed",
+            },
+        },
+        {},
+    ]
+
+    response = client.patch(
+        reverse("patch-person-list"), data=test_data,
+        content_type=jsonpatch_media_type)
+
+    assert response.status_code == 200, response.content
+    assert response.content == dump_json(results)
+
+    names = models.Person.objects.order_by("pk").values_list("name", flat=True)
+    assert list(names) == ["changed", "third"]
+
+
+def test_remove_only(client):
+    models.Person.objects.create(name="first")
+    models.Person.objects.create(name="second")
+
+    test_data = dump_json([
+        {"op": "remove", "path": "/1"},
+        {"op": "remove", "path": "/2"},
+    ])
+
+    response = client.patch(
+        reverse("patch-person-list"), data=test_data,
+        content_type=jsonpatch_media_type)
+
+    assert response.status_code == 204, response.content
+    assert not models.Person.objects.exists()
+
+
+def test_invalid_operation_rolls_back(client):
+    models.Person.objects.create(name="first")
+
+    test_data = dump_json([
+        {"op": "replace", "path": "/1/name", "value": "changed"},
+        {"op": "add", "path": "/-", "value": {}},
+    ])
+
+    response = client.patch(
+        reverse("patch-person-list"), data=test_data,
+        content_type=jsonpatch_media_type)
+
+    assert response.status_code == 400, response.content
+
+    results = {
+        "errors": [{
+            "status": "400",
+            "path": "/people/1/name",
+            "detail": "This field is required.",
+        }]
+    }
+
+    assert response.content == dump_json(results)
+    assert models.Person.objects.get().name == "first"
+
+
+def test_missing_resource(client):
+    models.Person.objects.create(name="first")
+
+    test_data = dump_json([
+        {"op": "replace", "path": "/1/name", "value": "changed"},
+        {"op": "remove", "path": "/5"},
+    ])
+
+    response = client.patch(
+        reverse("patch-person-list"), data=test_data,
+        content_type=jsonpatch_media_type)
+
+    assert response.status_code == 404, response.content
+    assert models.Person.objects.get().name == "first"
+
+
+def test_replace_after_remove(client):
+    models.Person.objects.create(name="first")
+
+    test_data = dump_json([
+        {"op": "remove", "path": "/1"},
+        {"op": "replace", "path": "/1/name", "value": "changed"},
+    ])
+
+    response = client.patch(
+        reverse("patch-person-list"), data=test_data,
+        content_type=jsonpatch_media_type)
+
+    assert response.status_code == 404, response.content
+    assert models.Person.objects.get().name == "first"
+
+
+def test_invalid_id(client):
+    models.Person.objects.create(name="first")
+
+    test_data = dump_json([
+        {"op": "replace", "path": "/1/name", "value": "changed"},
+        {"op": "remove", "path": "/abc"},
+    ])
+
+    response = client.patch(
+        reverse("patch-person-list"), data=test_data,
+        content_type=jsonpatch_media_type)
+
+    assert response.status_code == 400, response.content
+
+    results = {
+        "errors": [{
+            "status": "400",
+            "detail": 'Invalid resource id "abc".',
+        }]
+    }
+
+    assert response.content == dump_json(results)
+    assert models.Person.objects.get().name == "first"
+
+
+def test_invalid_link_value(client):
+    test_data = dump_json([
+        {"op": "replace", "path": "/1/links/comments", "value": 5},
+    ])
+
+    response = client.generic(
+        "echo", reverse("post-list"), data=test_data,
+        content_type=jsonpatch_media_type)
+
+    assert response.status_code == 400, response.content
+
+    results = {
+        "errors": [{
+            "status": "400",
+            "detail": 'Linkage at "/1/links/comments" must be a list of ids.',
+        }]
+    }
+
+    assert response.content == dump_json(results)
@@ -0,0 +1,178 @@
+"""Test the limits on the size of rendered documents"""
+
+from django.utils.encoding import force_text
+from rest_framework_json_api.mixins import DatabaseJsonMixin
+from rest_framework_json_api.renderers import JsonApiRenderer
+from rest_framework_json_api.writers import JsonApiWriter
+from tests import models
+from tests import views
+import json
+import pytest
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def content():
+    author = models.Person.objects.create(name="author")
+
+    for index in range(3):
+        post = models.Post.objects.create(
+            title="Post %d" % index, author=author)
+
+        for body in ["First", "Second", "Third"]:
+            models.Comment.objects.create(post=post, body=body)
+
+
+def render(rf, viewset=views.NestedPostViewSet, **limits):
+    renderer_class = type("LimitedRenderer", (JsonApiRenderer, ), limits)
+
+    view = viewset.as_view(
+        {"get": "list"}, renderer_classes=(renderer_class, ))
+    response = view(rf.get("/"))
+    response.render()
+
+    return response, json.loads(force_text(response.content))
+
+
+def test_no_limits(rf, content):
+    response, document = render(rf)
+
+    assert response.status_code == 200
+    assert len(document["posts"]) == 3
+    assert len(document["linked"]["comments"]) == 9
+    assert "meta" not in document
+
+
+def test_max_resources_error(rf, content):
+    response, document = render(rf, max_resources=2)
+
+    assert response.status_code == 400
+    assert document == {"errors": [{
+        "status": "400",
+        "detail": "The document is over the max_resources limit of 2.",
+    }]}
+
+
+def test_max_resources_truncated(rf, content):
+    response, document = render(
+        rf, max_resources=2, limit_policy="truncate")
+
+    assert response.status_code == 200
+    assert [post["id"] for post in document["posts"]] == ["1", "2"]
+    assert document["meta"] == {"truncated": {"max_resources": 2}}
+
+
+def test_max_linked_resources_truncated(rf, content):
+    response, document = render(
+        rf, max_linked_resources=4, limit_policy="truncate")
+
+    assert response.status_code == 200
+    assert len(document["posts"]) == 3
+    assert len(document["linked"]["comments"]) == 4
+    assert document["meta"] == {"truncated": {"max_linked_resources": 4}}
+
+
+def test_max_linked_resources_per_resource(rf, content):
+    _, document = render(rf, max_linked_resources=2, limit_policy="truncate")
+
+    # Only the first two comments of the first post are converted
+    assert document["posts"][0]["links"]["comments"] == ["1", "2"]
+    assert len(document["linked"]["comments"]) == 2
+
+
+def test_max_linkage_ids(rf, content):
+    response, _ = render(rf, views.PostViewSet, max_linkage_ids=6)
+
+    assert response.status_code == 400
+
+    response, document = render(
+        rf, views.PostViewSet, max_linkage_ids=8, limit_policy="truncate")
+
+    # Each post links to its author and three comments
+    assert len(document["posts"]) == 2
+    assert document["meta"] == {"truncated": {"max_linkage_ids": 8}}
+
+
+def test_max_document_bytes(rf, content):
+    response, document = render(
+        rf, max_document_bytes=100, limit_policy="truncate")
+
+    assert response.status_code == 400
+    assert document["errors"][0]["detail"] == \
+        "The document is over the max_document_bytes limit of 100."
+
+
+class WriterRenderer(JsonApiRenderer):
+    writer_class = JsonApiWriter
+
+
+def render_writer(rf, viewset=views.NestedPostViewSet, **limits):
+    renderer_class = type("LimitedRenderer", (WriterRenderer, ), limits)
+
+    view = viewset.as_view(
+        {"get": "list"}, renderer_classes=(renderer_class, ))
+    response = view(rf.get("/"))
+    response.render()
+
+    return response, json.loads(force_text(response.content))
+
+
+def render_database(rf, viewset=views.PostViewSet, **limits):
+    database_viewset = type(
+        "Database" + viewset.__name__, (DatabaseJsonMixin, viewset), {})
+
+    return render(rf, database_viewset, **limits)
+
+
+@pytest.mark.parametrize("render_limited", [render_writer, render_database])
+def test_writer_max_resources(rf, content, render_limited):
+    response, _ = render_limited(rf, max_resources=1)
+
+    assert response.status_code == 400
+
+    response, document = render_limited(
+        rf, max_resources=2, limit_policy="truncate")
+
+    assert response.status_code == 200
+    assert [post["id"] for post in document["posts"]] == ["1", "2"]
+    assert document["meta"] == {"truncated": {"max_resources": 2}}
+
+
+@pytest.mark.parametrize("render_limited", [render_writer, render_database])
+def test_writer_max_linkage_ids(rf, content, render_limited):
+    response, _ = render_limited(rf, views.PostViewSet, max_linkage_ids=6)
+
+    assert response.status_code == 400
+
+    response, document = render_limited(
+        rf, views.PostViewSet, max_linkage_ids=8, limit_policy="truncate")
+
+    assert len(document["posts"]) == 2
+    assert document["meta"] == {"truncated": {"max_linkage_ids": 8}}
+
+
+def test_writer_max_linkage_ids_leaves_out_linked(rf, content):
+    response, document = render_writer(
+        rf, max_linkage_ids=9, limit_policy="truncate")
+
+    # The third post and its comments are left out
+    assert len(document["posts"]) == 2
+    assert len(document["linked"]["comments"]) == 6
+
+
+@pytest.mark.parametrize("render_limited", [render, render_writer])
+def test_max_linked_resources_prunes_linkage(rf, content, render_limited):
+    response, document = render_limited(
+        rf, max_linked_resources=4, limit_policy="truncate")
+
+    linked = set(comment["id"] for comment in document["linked"]["comments"])
+
+    assert response.status_code == 200
+    assert len(linked) == 4
+    assert [post["links"]["comments"] for post in document["posts"]] == [
+        ["1", "2", "3"], ["4"], []]
+
+    response, _ = render_limited(rf, max_linked_resources=4)
+
+    assert response.status_code == 400
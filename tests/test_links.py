@@ -1,6 +1,14 @@
 from django.core.urlresolvers import reverse
+from django.db import connection
+from django.db.models import Prefetch
+from django.test.utils import CaptureQueriesContext
+from django.utils.encoding import force_text
+from rest_framework_json_api.renderers import JsonApiRenderer
 from tests import models
+from tests import serializers
+from tests import views
 from tests.utils import dump_json
+import json
 import pytest
 
 pytestmark = pytest.mark.django_db
@@ -100,3 +108,186 @@ def test_pk_related(client):
     response = client.get(reverse("pk-comment-list"))
 
     assert response.content == dump_json(results)
+
+
+def test_to_one_links_from_foreign_key(client):
+    author = models.Person.objects.create(name="test")
+    post = models.Post.objects.create(author=author, title="Test post title.")
+    other = models.Post.objects.create(author=author, title="Other post.")
+    models.Comment.objects.create(post=post, body="First")
+    models.Comment.objects.create(post=other, body="Second")
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse("comment-list"))
+
+    assert len(queries) == 1
+    content = json.loads(force_text(response.content))
+
+    assert [comment["links"]["post"] for comment in
+            content["comments"]] == ["1", "2"]
+
+
+def test_to_many_links_loaded_at_once(rf):
+    class PrefetchPostViewSet(views.PostViewSet):
+        list_prefetch = (Prefetch(
+            "comments", queryset=models.Comment.objects.only("post")), )
+
+    author = models.Person.objects.create(name="test")
+
+    for index in range(3):
+        post = models.Post.objects.create(author=author, title="Post")
+        models.Comment.objects.create(post=post, body="First")
+        models.Comment.objects.create(post=post, body="Second")
+
+    view = PrefetchPostViewSet.as_view({"get": "list"})
+
+    with CaptureQueriesContext(connection) as queries:
+        response = view(rf.get("/"))
+        response.render()
+
+    # The posts and the prefetched comments, which the linkage is read from
+    assert len(queries) == 2
+
+    content = json.loads(force_text(response.content))
+
+    assert [post["links"]["comments"] for post in content["posts"]] == [
+        ["1", "2"], ["3", "4"], ["5", "6"]]
+
+
+def test_to_many_links_filtered_prefetch(rf):
+    class FilteredPostViewSet(views.PostViewSet):
+        list_prefetch = (Prefetch(
+            "comments", queryset=models.Comment.objects.filter(
+                body="Second").order_by("-pk")), )
+
+    author = models.Person.objects.create(name="test")
+
+    for index in range(2):
+        post = models.Post.objects.create(author=author, title="Post")
+        models.Comment.objects.create(post=post, body="First")
+        models.Comment.objects.create(post=post, body="Second")
+        models.Comment.objects.create(post=post, body="Second")
+
+    view = FilteredPostViewSet.as_view({"get": "list"})
+    response = view(rf.get("/"))
+    response.render()
+
+    content = json.loads(force_text(response.content))
+
+    assert [post["links"]["comments"] for post in content["posts"]] == [
+        ["3", "2"], ["6", "5"]]
+
+
+def test_to_many_links_without_prefetch(rf):
+    class UnprefetchedPostViewSet(views.PostViewSet):
+        list_prefetch = ()
+
+    author = models.Person.objects.create(name="test")
+
+    for index in range(2):
+        post = models.Post.objects.create(author=author, title="Post")
+        models.Comment.objects.create(post=post, body="First")
+
+    view = UnprefetchedPostViewSet.as_view({"get": "list"})
+    response = view(rf.get("/"))
+    response.render()
+
+    content = json.loads(force_text(response.content))
+
+    assert [post["links"]["comments"] for post in content["posts"]] == [
+        ["1"], ["2"]]
+
+
+def test_capped_links(rf):
+    class CappedPostViewSet(views.PostViewSet):
+        list_prefetch = ()
+        serializer_class = serializers.CappedPostSerializer
+
+    author = models.Person.objects.create(name="test")
+
+    for index in range(3):
+        post = models.Post.objects.create(author=author, title="Post")
+
+    models.Comment.objects.create(post=post, body="First")
+    models.Comment.objects.create(post=post, body="Second")
+
+    view = CappedPostViewSet.as_view({"get": "list"})
+
+    with CaptureQueriesContext(connection) as queries:
+        response = view(rf.get("/"))
+        response.render()
+
+    # The posts, the counts of comments, and the first ids of the comments
+    assert len(queries) == 3
+    assert "COUNT(" in queries[1]["sql"]
+    assert "LIMIT 1" in queries[2]["sql"]
+
+    content = json.loads(force_text(response.content))
+
+    assert content["links"]["posts.comments"] == {
+        "href": "http://testserver/comments/{posts.comments}/",
+        "type": "comments",
+    }
+    assert content["posts"][0]["links"]["comments"] == {
+        "ids": [],
+        "href": "http://testserver/posts/1/links/comments/",
+        "meta": {"count": 0},
+    }
+    assert content["posts"][2]["links"]["comments"] == {
+        "ids": ["1"],
+        "href": "http://testserver/posts/3/links/comments/",
+        "meta": {"count": 2},
+    }
+
+
+def test_capped_links_query_count(rf):
+    class CappedPostViewSet(views.PostViewSet):
+        list_prefetch = ()
+        serializer_class = serializers.CappedPostSerializer
+
+    author = models.Person.objects.create(name="test")
+    view = CappedPostViewSet.as_view({"get": "list"})
+    counts = []
+
+    for posts in (2, 6):
+        for index in range(posts - models.Post.objects.count()):
+            post = models.Post.objects.create(author=author, title="Post")
+            models.Comment.objects.create(post=post, body="First")
+            models.Comment.objects.create(post=post, body="Second")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = view(rf.get("/"))
+            response.render()
+
+        counts.append(len(queries))
+
+    assert counts == [3, 3]
+
+    content = json.loads(force_text(response.content))
+
+    assert [post["links"]["comments"]["ids"] for post in content["posts"]] \
+        == [["1"], ["3"], ["5"], ["7"], ["9"], ["11"]]
+
+
+def test_relative_links(rf):
+    class RelativeRenderer(JsonApiRenderer):
+        relative_links = True
+
+    author = models.Person.objects.create(name="test")
+    post = models.Post.objects.create(author=author, title="Test post title.")
+    models.Comment.objects.create(post=post, body="Some text for testing.")
+
+    view = views.CommentViewSet.as_view(
+        {"get": "list"}, renderer_classes=(RelativeRenderer, ))
+    response = view(rf.get("/"))
+    response.render()
+
+    content = json.loads(force_text(response.content))
+
+    assert content["links"] == {
+        "comments.post": {
+            "href": "/posts/{comments.post}/",
+            "type": "posts",
+        },
+    }
+    assert content["comments"][0]["href"] == "/comments/1/"
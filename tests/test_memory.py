@@ -0,0 +1,136 @@
+"""Memory budgets of rendering and parsing large documents
+
+Peak allocations are traced with `tracemalloc` for each phase of rendering
+a list of posts with their nested comments, and for parsing a document of
+the same size.  Each phase must stay within its budget of bytes per
+resource, which allows for about twice the allocations measured when the
+budgets were set.
+
+Budgets in bytes per resource:
+
+- conversion: `convert_resource` for every resource, 8000
+- linked merge: `update_nested` of the linked comments, 50
+- encoding: the JSON encoder, run on the converted document, 8000
+- parsing: `JsonApiParser.parse` of a list of people, 3000
+"""
+
+from django.test import RequestFactory
+from django.utils.six import BytesIO
+from rest_framework import renderers
+from rest_framework.request import Request
+from rest_framework_json_api.parsers import JsonApiParser
+from rest_framework_json_api.renderers import JsonApiRenderer
+from tests import models
+from tests import views
+from tests.utils import dump_json
+import pytest
+
+tracemalloc = pytest.importorskip("tracemalloc")
+
+pytestmark = pytest.mark.django_db
+
+resource_count = 200
+
+conversion_budget = 8000
+linked_merge_budget = 50
+encoding_budget = 8000
+parsing_budget = 3000
+
+
+def peak_allocations(function, *args):
+    """Return the result of the function and its peak traced allocations"""
+    tracemalloc.start()
+
+    try:
+        result = function(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return result, peak
+
+
+@pytest.fixture()
+def rendered():
+    author = models.Person.objects.create(name="author")
+
+    for index in range(resource_count):
+        post = models.Post.objects.create(
+            title="Post %d" % index, author=author)
+        models.Comment.objects.create(post=post, body="First " * 10)
+        models.Comment.objects.create(post=post, body="Second " * 10)
+
+    view = views.NestedPostViewSet.as_view({"get": "list"})
+    response = view(RequestFactory().get("/"))
+
+    renderer = JsonApiRenderer()
+    renderer_context = response.renderer_context
+
+    return renderer, response.data, renderer_context
+
+
+def test_conversion(rendered):
+    renderer, data, renderer_context = rendered
+    request = renderer_context["request"]
+
+    def convert():
+        return [renderer.convert_resource(resource, data, request)
+                for resource in data]
+
+    _, peak = peak_allocations(convert)
+
+    assert peak / resource_count < conversion_budget
+
+
+def test_linked_merge(rendered):
+    renderer, data, renderer_context = rendered
+    request = renderer_context["request"]
+
+    converted = [renderer.convert_resource(resource, data, request)
+                 for resource in data]
+
+    def merge():
+        linked = {}
+
+        for item in converted:
+            linked = renderer.update_nested(linked, item["linked"])
+
+        return linked
+
+    linked, peak = peak_allocations(merge)
+
+    assert len(linked["comments"]) == resource_count * 2
+    assert peak / resource_count < linked_merge_budget
+
+
+def test_encoding(rendered):
+    renderer, data, renderer_context = rendered
+    wrapper = renderer.wrap_default(data, renderer_context)
+    renderer_context["indent"] = 4
+
+    content, peak = peak_allocations(
+        renderers.JSONRenderer.render, renderer, wrapper,
+        renderer.media_type, renderer_context)
+
+    assert content.startswith(b"{")
+    assert peak / resource_count < encoding_budget
+
+
+def test_parsing():
+    content = dump_json({
+        "people": [
+            {"name": "Person %d" % index} for index in range(resource_count)
+        ],
+    })
+
+    view = views.PersonViewSet()
+    view.request = Request(RequestFactory().post("/"))
+    view.format_kwarg = None
+
+    parser = JsonApiParser()
+
+    data, peak = peak_allocations(
+        parser.parse, BytesIO(content), parser.media_type, {"view": view})
+
+    assert len(data) == resource_count
+    assert peak / resource_count < parsing_budget
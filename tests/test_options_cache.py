@@ -0,0 +1,139 @@
+"""Test the cache of OPTIONS documents of `OptionsCacheMixin`"""
+
+from django.utils import translation
+from rest_framework import metadata, permissions
+from rest_framework.renderers import JSONRenderer
+from rest_framework_json_api.mixins import OptionsCacheMixin
+from rest_framework_json_api.renderers import JsonApiRenderer
+from tests import views
+import pytest
+
+pytestmark = pytest.mark.django_db
+
+
+class CountingMetadata(metadata.SimpleMetadata):
+    calls = 0
+
+    def determine_metadata(self, request, view):
+        CountingMetadata.calls += 1
+
+        return super(CountingMetadata, self).determine_metadata(
+            request, view)
+
+
+class HeaderPermission(permissions.BasePermission):
+
+    def has_permission(self, request, view):
+        return request.method in permissions.SAFE_METHODS or \
+            "HTTP_X_WRITER" in request.META
+
+
+class CachedPostViewSet(OptionsCacheMixin, views.PostViewSet):
+    metadata_class = CountingMetadata
+    permission_classes = (HeaderPermission, )
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    CountingMetadata.calls = 0
+    OptionsCacheMixin.clear_options_cache()
+
+
+def options(rf, renderer_classes=(JsonApiRenderer, ), kwargs=None, **extra):
+    view = CachedPostViewSet.as_view(
+        {"get": "list", "post": "create"}, renderer_classes=renderer_classes)
+    response = view(rf.options("/", **extra), **(kwargs or {}))
+
+    # Cached documents are plain responses, which are already rendered
+    if hasattr(response, "render"):
+        response.render()
+
+    return response
+
+
+def test_cached(rf):
+    first = options(rf)
+    second = options(rf)
+
+    assert CountingMetadata.calls == 1
+    assert second.status_code == 200
+    assert second.content == first.content
+    assert second["Content-Type"] == first["Content-Type"]
+    assert second["Allow"] == first["Allow"]
+
+
+def test_permission_context(rf):
+    anonymous = options(rf)
+    writer = options(rf, HTTP_X_WRITER="1")
+
+    assert CountingMetadata.calls == 2
+    assert b"POST" not in anonymous.content
+    assert b"POST" in writer.content
+
+    assert options(rf, HTTP_X_WRITER="1").content == writer.content
+    assert CountingMetadata.calls == 2
+
+
+def test_clear_options_cache(rf):
+    options(rf)
+    CachedPostViewSet.clear_options_cache()
+    options(rf)
+
+    assert CountingMetadata.calls == 2
+
+
+def test_other_renderers_not_cached(rf):
+    options(rf, renderer_classes=(JSONRenderer, ))
+    options(rf, renderer_classes=(JSONRenderer, ))
+
+    assert CountingMetadata.calls == 2
+
+
+def test_language(rf):
+    options(rf)
+
+    with translation.override("fr"):
+        options(rf)
+
+    options(rf)
+
+    assert CountingMetadata.calls == 2
+
+
+def test_url_arguments_not_in_key(rf):
+    for pk in range(20):
+        options(rf, kwargs={"pk": str(pk)})
+
+    keys = [key for key in OptionsCacheMixin.options_cache
+            if key[0] is CachedPostViewSet]
+
+    assert CountingMetadata.calls == 1
+    assert len(keys) == 1
+
+
+def test_url_arguments_opt_in(rf, monkeypatch):
+    monkeypatch.setattr(CachedPostViewSet, "options_cache_kwargs", True)
+
+    options(rf, kwargs={"pk": "1"})
+    options(rf, kwargs={"pk": "2"})
+    options(rf, kwargs={"pk": "2"})
+
+    assert CountingMetadata.calls == 2
+
+
+def test_cache_size(rf, monkeypatch):
+    monkeypatch.setattr(CachedPostViewSet, "options_cache_kwargs", True)
+    monkeypatch.setattr(CachedPostViewSet, "options_cache_size", 2)
+
+    options(rf, kwargs={"pk": "1"})
+    options(rf, kwargs={"pk": "2"})
+    options(rf, kwargs={"pk": "1"})  # the least recently used is now "2"
+    options(rf, kwargs={"pk": "3"})
+
+    assert len(OptionsCacheMixin.options_cache) == 2
+
+    options(rf, kwargs={"pk": "1"})
+    assert CountingMetadata.calls == 3
+
+    options(rf, kwargs={"pk": "2"})
+    assert CountingMetadata.calls == 4
@@ -0,0 +1,110 @@
+"""Test the MessagePack renderer and parser
+
+The pure Python encoding is always tested, and is compared with the
+`msgpack` package when it is installed.
+"""
+
+from decimal import Decimal
+from django.utils import six, timezone
+from django.utils.encoding import force_text
+from rest_framework_json_api import packers
+from rest_framework_json_api.parsers import (
+    JsonApiMessagePackParser, JsonApiParser
+)
+from rest_framework_json_api.renderers import (
+    JsonApiMessagePackRenderer, JsonApiRenderer
+)
+from tests import models
+from tests import views
+import datetime
+import json
+import pytest
+
+msgpack_media_type = "application/vnd.api+msgpack"
+
+values = [
+    None, True, False,
+    0, 1, 127, 128, 255, 256, 65535, 65536, 2 ** 32, 2 ** 64 - 1,
+    -1, -32, -33, -128, -129, -32768, -32769, -2 ** 31 - 1, -2 ** 63,
+    1.5, -0.25,
+    u"", u"text", u"\u2603" * 40, u"x" * 300, u"x" * 70000,
+    [], [1, [2, 3]], list(range(20)), list(range(70000)),
+    {}, {u"a": {u"b": [None]}}, dict((u"%d" % i, i) for i in range(20)),
+    Decimal("1.10"), datetime.date(2015, 3, 1), datetime.time(12, 30, 1),
+    datetime.datetime(2015, 3, 1, 12, 30, 1, 500),
+    datetime.datetime(2015, 3, 1, 12, 30, tzinfo=timezone.utc),
+]
+
+
+@pytest.fixture()
+def pure_python(monkeypatch):
+    monkeypatch.setattr(packers, "msgpack", None)
+
+
+@pytest.mark.parametrize("value", values)
+def test_round_trip(pure_python, value):
+    assert packers.unpackb(packers.packb(value)) == value
+
+
+@pytest.mark.skipif(packers.msgpack is None, reason="requires msgpack")
+@pytest.mark.parametrize("value", values)
+def test_matches_msgpack(monkeypatch, value):
+    packed = packers.packb(value)
+
+    monkeypatch.setattr(packers, "msgpack", None)
+
+    assert packers.unpackb(packed) == value
+    assert packers.packb(value) == packed
+
+
+def test_text_on_python_2(pure_python):
+    packed = packers.packb({"links": "text"})
+
+    assert packers.unpackb(packed) == {u"links": u"text"}
+
+    if six.PY2:
+        assert packed == packers.packb({u"links": u"text"})
+
+
+@pytest.mark.django_db
+def test_render_matches_json(rf):
+    author = models.Person.objects.create(name=u"\u2603")
+    post = models.Post.objects.create(title="A post", author=author)
+    models.Comment.objects.create(post=post, body="First")
+
+    view = views.NestedPostViewSet.as_view({"get": "list"}, renderer_classes=(
+        JsonApiRenderer, JsonApiMessagePackRenderer))
+
+    response = view(rf.get("/"))
+    response.render()
+    expected = json.loads(force_text(response.content))
+
+    response = view(rf.get("/", HTTP_ACCEPT=msgpack_media_type))
+    response.render()
+
+    assert response["Content-Type"] == msgpack_media_type
+    assert packers.unpackb(response.content) == expected
+
+
+@pytest.mark.django_db
+def test_parse(rf):
+    view = views.PersonViewSet.as_view({"post": "create"}, parser_classes=(
+        JsonApiParser, JsonApiMessagePackParser))
+
+    request = rf.post(
+        "/", data=packers.packb({"people": {"name": u"\u2603"}}),
+        content_type=msgpack_media_type)
+    response = view(request)
+
+    assert response.status_code == 201, response.data
+    assert models.Person.objects.get().name == u"\u2603"
+
+
+def test_parse_error(rf):
+    view = views.PersonViewSet.as_view({"post": "create"}, parser_classes=(
+        JsonApiMessagePackParser, ))
+
+    request = rf.post("/", data=b"\xc1", content_type=msgpack_media_type)
+    response = view(request)
+
+    assert response.status_code == 400
@@ -0,0 +1,40 @@
+"""Test the jsonapi_profile management command"""
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.utils.six import StringIO
+from tests import models
+import os
+import pstats
+import pytest
+
+pytestmark = pytest.mark.django_db
+
+
+def test_profile(tmpdir):
+    author = models.Person.objects.create(name="test")
+    models.Post.objects.create(author=author, title="Post")
+
+    output = str(tmpdir.join("profile.out"))
+    stdout = StringIO()
+
+    call_command("jsonapi_profile", "/posts/", repeat=2, output=output,
+                 stdout=stdout)
+
+    lines = stdout.getvalue().splitlines()
+
+    assert lines[0].startswith("GET /posts/: 200, ")
+    assert lines[0].endswith(", 2 queries")
+    assert lines[1].startswith("2 requests, ")
+    assert lines[2].startswith("Parsing: ")
+    assert lines[3].startswith("Serialization: ")
+    assert lines[4].startswith("Rendering: ")
+    assert "function calls" in stdout.getvalue()
+
+    assert os.path.exists(output)
+    assert pstats.Stats(output).total_calls > 0
+
+
+def test_profile_requires_url():
+    with pytest.raises(CommandError):
+        call_command("jsonapi_profile", stdout=StringIO())
@@ -0,0 +1,39 @@
+"""Test the number of queries of the list views
+
+Every viewset declares a `query_budget`, which the list view must stay
+within at any page size.
+"""
+
+from tests import models
+from tests import views
+import pytest
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def content():
+    for index in range(6):
+        author = models.Person.objects.create(name="Person %d" % index)
+        post = models.Post.objects.create(title="Post", author=author)
+        first = models.Comment.objects.create(post=post, body="First")
+        second = models.Comment.objects.create(post=post, body="Second")
+
+        author.favorite_post = post
+        author.save()
+        author.liked_comments.add(first, second)
+
+
+@pytest.mark.parametrize("viewset", [
+    views.ArticleViewSet,
+    views.CommentViewSet,
+    views.PersonViewSet,
+    views.PostViewSet,
+    views.MaximalPersonViewSet,
+    views.NestedCommentViewSet,
+    views.NestedPostViewSet,
+    views.PkCommentViewSet,
+    views.PkMaximalPersonViewSet,
+])
+def test_list_query_budget(content, assert_query_budget, viewset):
+    assert_query_budget(viewset)
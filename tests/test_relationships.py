@@ -0,0 +1,182 @@
+"""Test the relationship endpoints of `RelationshipMixin`"""
+
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import permissions
+from tests import models
+from tests import views
+from tests.utils import dump_json
+import pytest
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def content():
+    author = models.Person.objects.create(name="author")
+    fan = models.Person.objects.create(name="fan")
+    post = models.Post.objects.create(title="A post", author=author)
+    models.Post.objects.create(title="Another post", author=author)
+    first = models.Comment.objects.create(post=post, body="First")
+    models.Comment.objects.create(post=post, body="Second")
+
+    fan.favorite_post = post
+    fan.save()
+    fan.liked_comments.add(first)
+
+
+def links_url(name, pk, link_name):
+    return reverse(name, kwargs={"pk": pk, "link_name": link_name})
+
+
+def test_get_to_many(client, content):
+    response = client.get(links_url("post-links", 1, "comments"))
+
+    assert response.status_code == 200, response.content
+    assert response.content == dump_json({"comments": ["1", "2"]})
+
+
+def test_get_to_one(client, content):
+    response = client.get(links_url("post-links", 1, "author"))
+
+    assert response.content == dump_json({"people": "1"})
+
+
+def test_get_null_to_one(client, content):
+    response = client.get(links_url("people-full-links", 1, "favorite_post"))
+
+    assert response.content == dump_json({"posts": None})
+
+
+def test_get_single_query(client, content):
+    url = links_url("post-links", 1, "comments")
+
+    with CaptureQueriesContext(connection) as queries:
+        client.get(url)
+
+    assert len(queries) == 1
+
+
+def test_get_not_found(client, content):
+    assert client.get(
+        links_url("post-links", 3, "comments")).status_code == 404
+    assert client.get(
+        links_url("post-links", 1, "title")).status_code == 404
+
+
+def test_get_paginated(rf, content):
+    class PaginatedPostViewSet(views.PostViewSet):
+        linkage_page_size = 1
+
+    view = PaginatedPostViewSet.as_view({"get": "retrieve_links"})
+    response = view(rf.get("/?page=2"), pk="1", link_name="comments")
+    response.render()
+
+    assert response.content == dump_json({
+        "comments": ["2"],
+        "meta": {
+            "pagination": {
+                "comments": {
+                    "count": 2,
+                    "next": None,
+                    "previous": "http://testserver/?page=1",
+                },
+            },
+        },
+    })
+
+
+def test_put_to_one(client, content):
+    response = client.put(
+        links_url("pk-people-full-links", 2, "favorite_post"),
+        data=dump_json({"posts": "2"}),
+        content_type="application/vnd.api+json")
+
+    assert response.status_code == 204, response.content
+    assert models.Person.objects.get(pk=2).favorite_post_id == 2
+
+
+def test_put_hyperlinked_to_many(client, content):
+    response = client.put(
+        links_url("people-full-links", 2, "liked_comments"),
+        data=dump_json({"comments": ["2"]}),
+        content_type="application/vnd.api+json")
+
+    assert response.status_code == 204, response.content
+    assert list(models.Person.objects.get(pk=2).liked_comments.values_list(
+        "pk", flat=True)) == [2]
+
+
+def test_post_to_many(client, content):
+    response = client.post(
+        links_url("pk-people-full-links", 2, "liked_comments"),
+        data=dump_json({"comments": ["2"]}),
+        content_type="application/vnd.api+json")
+
+    assert response.status_code == 204, response.content
+    assert sorted(models.Person.objects.get(pk=2).liked_comments.values_list(
+        "pk", flat=True)) == [1, 2]
+
+
+def test_post_to_one(client, content):
+    response = client.post(
+        links_url("pk-people-full-links", 2, "favorite_post"),
+        data=dump_json({"posts": "2"}),
+        content_type="application/vnd.api+json")
+
+    assert response.status_code == 405, response.content
+
+
+def test_delete_to_many(client, content):
+    models.Person.objects.get(pk=2).liked_comments.add(2)
+
+    url = reverse("pk-people-full-links-detail", kwargs={
+        "pk": 2, "link_name": "liked_comments", "link_ids": "1"})
+    response = client.delete(url)
+
+    assert response.status_code == 204, response.content
+    assert list(models.Person.objects.get(pk=2).liked_comments.values_list(
+        "pk", flat=True)) == [2]
+
+
+def test_delete_to_one(client, content):
+    response = client.delete(
+        links_url("pk-people-full-links", 2, "favorite_post"))
+
+    assert response.status_code == 204, response.content
+    assert models.Person.objects.get(pk=2).favorite_post is None
+
+
+def test_linkage_keyed_by_type(client, content):
+    response = client.put(
+        links_url("pk-people-full-links", 2, "favorite_post"),
+        data=dump_json({"people": "2"}),
+        content_type="application/vnd.api+json")
+
+    assert response.status_code == 400, response.content
+
+
+def test_get_object_permissions(rf, content):
+    class DenyObjects(permissions.BasePermission):
+
+        def has_object_permission(self, request, view, obj):
+            return False
+
+    class DeniedPostViewSet(views.PostViewSet):
+        permission_classes = (DenyObjects, )
+
+    view = DeniedPostViewSet.as_view({"get": "retrieve_links"})
+    response = view(rf.get("/"), pk="1", link_name="comments")
+
+    assert response.status_code == 403
+
+
+def test_put_reverse_relation(client, content):
+    response = client.put(
+        links_url("post-links", 1, "comments"),
+        data=dump_json({"comments": []}),
+        content_type="application/vnd.api+json")
+
+    assert response.status_code == 405, response.content
+    assert models.Comment.objects.count() == 2
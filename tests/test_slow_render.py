@@ -0,0 +1,88 @@
+"""Test the timing of slow renders"""
+
+from rest_framework_json_api.renderers import JsonApiRenderer
+from tests import models
+from tests import views
+import logging
+import pytest
+
+pytestmark = pytest.mark.django_db
+
+
+class RecordingHandler(logging.Handler):
+
+    def __init__(self):
+        super(RecordingHandler, self).__init__()
+
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture()
+def records(request):
+    handler = RecordingHandler()
+    logger = logging.getLogger("rest_framework_json_api")
+    logger.addHandler(handler)
+
+    request.addfinalizer(lambda: logger.removeHandler(handler))
+
+    return handler.records
+
+
+def render(rf, renderer_class):
+    author = models.Person.objects.create(name="test")
+    post = models.Post.objects.create(author=author, title="Post")
+    models.Comment.objects.create(post=post, body="First")
+
+    view = views.NestedPostViewSet.as_view(
+        {"get": "list"}, renderer_classes=(renderer_class, ))
+    response = view(rf.get("/nested-posts/"))
+    response.render()
+
+    return response
+
+
+def test_slow_render_logged(rf, records):
+    class SampledRenderer(JsonApiRenderer):
+        timing_sample_rate = 1
+        slow_render_threshold = 0
+
+    render(rf, SampledRenderer)
+
+    assert len(records) == 1
+
+    timings = records[0].jsonapi_render
+
+    assert timings["view"] == "NestedPostViewSet"
+    assert timings["path"] == "/nested-posts/"
+
+    fields = dict(
+        ((timing["field"], timing["converter"]), timing["calls"])
+        for timing in timings["fields"])
+
+    assert fields[("comments", "handle_nested_serializer")] == 1
+    assert fields[("author", "handle_url_field")] == 1
+    assert fields[("body", "attribute")] == 1
+    assert fields[(None, "update_nested")] == 1
+    assert fields[(None, "encode")] == 1
+
+
+def test_fast_render_not_logged(rf, records):
+    class SampledRenderer(JsonApiRenderer):
+        timing_sample_rate = 1
+        slow_render_threshold = 60
+
+    render(rf, SampledRenderer)
+
+    assert records == []
+
+
+def test_sampling_off_by_default(rf, records):
+    class SlowRenderer(JsonApiRenderer):
+        slow_render_threshold = 0
+
+    render(rf, SlowRenderer)
+
+    assert records == []
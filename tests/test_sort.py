@@ -0,0 +1,123 @@
+"""Test the `sort` parameter of `JsonApiSortFilter`"""
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.encoding import force_text
+from rest_framework_json_api.filters import JsonApiSortFilter
+from tests import models
+from tests import views
+import datetime
+import json
+import pytest
+
+pytestmark = pytest.mark.django_db
+
+
+class SortedPostViewSet(views.PostViewSet):
+    filter_backends = (JsonApiSortFilter, )
+    paginate_by = 2
+    sort_fields = ("title", )
+
+
+class SortedArticleViewSet(views.ArticleViewSet):
+    filter_backends = (JsonApiSortFilter, )
+
+
+@pytest.fixture()
+def content():
+    first = models.Person.objects.create(name="first")
+    second = models.Person.objects.create(name="second")
+
+    models.Post.objects.create(title="B", author=second)
+    models.Post.objects.create(title="A", author=first)
+    models.Post.objects.create(title="C", author=first)
+
+
+def get(rf, viewset, query):
+    view = viewset.as_view({"get": "list"})
+    response = view(rf.get("/", query))
+    response.render()
+
+    return response, json.loads(force_text(response.content))
+
+
+def titles(document):
+    return [post["title"] for post in document["posts"]]
+
+
+def test_sort_allowed_field(rf, content):
+    _, document = get(rf, SortedPostViewSet, {"sort": "title"})
+
+    assert titles(document) == ["A", "B"]
+    assert document["meta"]["pagination"]["posts"]["next"] == \
+        "http://testserver/?sort=title&page=2"
+
+    _, document = get(rf, SortedPostViewSet, {"sort": "title", "page": 2})
+
+    assert titles(document) == ["C"]
+
+
+def test_sort_descending(rf, content):
+    _, document = get(rf, SortedPostViewSet, {"sort": "-title"})
+
+    assert titles(document) == ["C", "B"]
+
+
+def test_sort_indexed_relation(rf, content):
+    with CaptureQueriesContext(connection) as queries:
+        _, document = get(rf, SortedPostViewSet, {"sort": "author,-title"})
+
+    assert titles(document) == ["C", "A"]
+    assert not any("JOIN" in query["sql"] for query in queries)
+
+
+def test_sort_relation_by_column(rf):
+    view = SortedPostViewSet(request=None, format_kwarg=None)
+    plan = JsonApiSortFilter().get_plan(view, models.Post)
+
+    # Not by the ordering of the related model
+    assert plan["author"] == "author_id"
+
+
+def test_sort_in_database(rf, content):
+    with CaptureQueriesContext(connection) as queries:
+        get(rf, SortedPostViewSet, {"sort": "-title"})
+
+    assert any("ORDER BY" in query["sql"] and "LIMIT" in query["sql"]
+               for query in queries)
+
+
+def test_sort_indexed_field(rf):
+    first = models.Article.objects.create(title="first")
+    models.Article.objects.create(title="second")
+    models.Article.objects.filter(pk=first.pk).update(
+        modified=first.modified - datetime.timedelta(days=1))
+
+    _, document = get(rf, SortedArticleViewSet, {"sort": "-modified"})
+
+    assert [article["title"] for article in document["articles"]] == \
+        ["second", "first"]
+
+
+def test_sort_not_indexed(rf):
+    response, document = get(rf, SortedArticleViewSet, {"sort": "title"})
+
+    assert response.status_code == 400
+    assert document["errors"][0]["detail"] == \
+        'Sorting by "title" is not supported.'
+
+
+def test_sort_to_many_relation(rf, content):
+    response, _ = get(rf, SortedPostViewSet, {"sort": "comments"})
+
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("sort", ["--title", "+title", " title", "-"])
+def test_sort_invalid_prefix(rf, content, sort):
+    response, document = get(rf, SortedPostViewSet, {"sort": sort})
+
+    assert response.status_code == 400
+    assert document["errors"][0]["detail"] == (
+        'Invalid sort key "%s", only a "-" prefix for a descending order '
+        'is supported.' % sort)
@@ -0,0 +1,163 @@
+"""Test the cached responses of `StaleWhileRevalidateMixin`"""
+
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import authentication, permissions
+from tests import models
+from tests import views
+import pytest
+
+pytestmark = pytest.mark.django_db
+
+
+class HeaderUser(object):
+
+    def __init__(self, pk):
+        self.pk = pk
+
+    def is_authenticated(self):
+        return True
+
+
+class HeaderAuthentication(authentication.BaseAuthentication):
+
+    def authenticate(self, request):
+        pk = request.META.get("HTTP_X_USER", None)
+
+        if pk is None:
+            return None
+
+        return (HeaderUser(pk), None)
+
+
+class AllowedPermission(permissions.BasePermission):
+    allowed = True
+
+    def has_permission(self, request, view):
+        return AllowedPermission.allowed
+
+
+class AuthStalePersonViewSet(views.StalePersonViewSet):
+    authentication_classes = (HeaderAuthentication, )
+    permission_classes = (AllowedPermission, )
+
+
+class RecordingExecutor(object):
+    """Keeps the submitted refreshes, to run them when the test wants"""
+
+    def __init__(self):
+        self.calls = []
+
+    def submit(self, function, *args):
+        self.calls.append((function, args))
+
+    def run(self):
+        calls, self.calls = self.calls, []
+
+        for function, args in calls:
+            function(*args)
+
+
+@pytest.fixture()
+def executor(monkeypatch):
+    executor = RecordingExecutor()
+    monkeypatch.setattr(views.StalePersonViewSet, "swr_executor", executor)
+
+    views.StalePersonViewSet.get_swr_cache().clear()
+    views.StalePersonViewSet.get_swr_refreshing().clear()
+    AuthStalePersonViewSet.get_swr_cache().clear()
+    AllowedPermission.allowed = True
+
+    models.Person.objects.create(name="first")
+
+    return executor
+
+
+def get(client):
+    return client.get(reverse("stale-person-list"))
+
+
+def test_fresh_response_is_cached(client, executor):
+    first = get(client)
+
+    with CaptureQueriesContext(connection) as queries:
+        second = get(client)
+
+    assert len(queries) == 0
+    assert second.status_code == 200
+    assert second.content == first.content
+    assert second["Content-Type"] == first["Content-Type"]
+    assert second["Age"] == "0"
+    assert not executor.calls
+
+
+def test_stale_response_is_refreshed(client, executor, monkeypatch):
+    monkeypatch.setattr(views.StalePersonViewSet, "swr_stale_after", 0)
+
+    first = get(client)
+    models.Person.objects.update(name="second")
+
+    assert get(client).content == first.content
+    assert get(client).content == first.content
+    assert len(executor.calls) == 1
+
+    executor.run()
+
+    assert not views.StalePersonViewSet.get_swr_refreshing()
+    assert b"second" in get(client).content
+
+
+def test_expired_response_is_rendered(client, executor, monkeypatch):
+    monkeypatch.setattr(views.StalePersonViewSet, "swr_expire_after", 0)
+
+    get(client)
+    models.Person.objects.update(name="second")
+
+    assert b"second" in get(client).content
+    assert not executor.calls
+
+
+def get_as(rf, user=None):
+    extra = {}
+
+    if user is not None:
+        extra["HTTP_X_USER"] = user
+
+    view = AuthStalePersonViewSet.as_view({"get": "list"})
+    response = view(rf.get("/people/", **extra))
+
+    if hasattr(response, "render"):
+        response.render()
+
+    return response
+
+
+def test_user_is_part_of_the_key(rf, executor):
+    get_as(rf, "1")
+
+    with CaptureQueriesContext(connection) as queries:
+        assert get_as(rf, "1").status_code == 200
+
+    assert len(queries) == 0
+
+    with CaptureQueriesContext(connection) as queries:
+        get_as(rf, "2")
+        get_as(rf)
+
+    assert len(queries) == 2
+
+
+def test_cache_is_served_after_permission_checks(rf, executor):
+    assert get_as(rf, "1").status_code == 200
+
+    AllowedPermission.allowed = False
+
+    assert get_as(rf, "1").status_code == 403
+
+
+def test_cache_per_view_class(client, rf, executor):
+    get(client)
+
+    assert len(views.StalePersonViewSet.get_swr_cache()) == 1
+    assert not AuthStalePersonViewSet.get_swr_cache()
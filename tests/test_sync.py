@@ -0,0 +1,124 @@
+"""Test the sync mode of list views with `SyncMixin`"""
+
+from django.core.urlresolvers import reverse
+from django.utils.encoding import force_text
+from rest_framework_json_api.models import Tombstone
+from rest_framework_json_api.renderers import JsonApiRenderer
+from rest_framework_json_api.writers import JsonApiWriter
+from tests import models
+from tests import views
+import json
+import pytest
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def articles():
+    return [
+        models.Article.objects.create(title="Article %d" % index)
+        for index in range(3)
+    ]
+
+
+def sync(client, token=""):
+    response = client.get(reverse("article-list"), {"since": token})
+
+    return response, json.loads(force_text(response.content))
+
+
+def test_full_sync(client, articles):
+    response, document = sync(client)
+
+    assert response.status_code == 200, response.content
+    assert [article["id"] for article in document["articles"]] == \
+        ["1", "2", "3"]
+    assert document["meta"]["sync"]["deleted"] == []
+    assert document["meta"]["sync"]["token"]
+
+
+def test_changes_since(client, articles, monkeypatch):
+    monkeypatch.setattr(views.ArticleViewSet, "sync_margin", 0)
+
+    _, document = sync(client)
+    token = document["meta"]["sync"]["token"]
+
+    articles[1].title = "Changed"
+    articles[1].save()
+    articles[0].delete()
+    models.Article.objects.create(title="New")
+
+    response, document = sync(client, token)
+
+    assert response.status_code == 200, response.content
+    assert [article["id"] for article in document["articles"]] == ["2", "4"]
+    assert document["articles"][0]["title"] == "Changed"
+    assert document["meta"]["sync"]["deleted"] == ["1"]
+
+    _, document = sync(client, document["meta"]["sync"]["token"])
+
+    assert document["articles"] == []
+    assert document["meta"]["sync"]["deleted"] == []
+
+
+def test_deletions_are_tracked_by_resource_type(articles):
+    articles[0].delete()
+
+    tombstone = Tombstone.objects.get()
+
+    assert tombstone.resource_type == "articles"
+    assert tombstone.resource_id == "1"
+
+
+def test_invalid_token(client, articles):
+    response, _ = sync(client, "invalid")
+
+    assert response.status_code == 400
+
+
+def test_expired_token(rf, articles):
+    class ExpiringArticleViewSet(views.ArticleViewSet):
+        sync_max_age = -1
+
+    token = views.ArticleViewSet().make_sync_token(articles[0].modified)
+
+    view = ExpiringArticleViewSet.as_view({"get": "list"})
+    response = view(rf.get("/", {"since": token}))
+
+    assert response.status_code == 400
+
+
+def test_without_sync(client, articles):
+    response = client.get(reverse("article-list"))
+    document = json.loads(force_text(response.content))
+
+    assert len(document["articles"]) == 3
+    assert "meta" not in document
+
+
+def test_late_commits_are_not_missed(client, articles):
+    _, document = sync(client)
+    token = document["meta"]["sync"]["token"]
+
+    # Committed after the token, by a transaction that started before it
+    models.Article.objects.filter(pk=2).update(
+        title="Late", modified=articles[0].modified)
+
+    _, document = sync(client, token)
+
+    assert "2" in [article["id"] for article in document["articles"]]
+
+
+def test_sync_meta_with_writer(rf, articles):
+    class WriterRenderer(JsonApiRenderer):
+        writer_class = JsonApiWriter
+
+    view = views.ArticleViewSet.as_view(
+        {"get": "list"}, renderer_classes=(WriterRenderer, ))
+    response = view(rf.get("/", {"since": ""}))
+    response.render()
+
+    document = json.loads(force_text(response.content))
+
+    assert len(document["articles"]) == 3
+    assert document["meta"]["sync"]["token"]
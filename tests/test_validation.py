@@ -0,0 +1,72 @@
+"""Test the structural validation of parsed documents"""
+
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from tests.utils import dump_json
+import json
+import pytest
+
+pytestmark = pytest.mark.django_db
+
+
+def post(client, url, document):
+    return client.post(
+        url, data=json.dumps(document),
+        content_type="application/vnd.api+json")
+
+
+@pytest.mark.parametrize("document, detail", [
+    ([], 'JSON API documents must be objects.'),
+    ({"person": {"name": "test"}},
+     'JSON API documents must have a "comments" member.'),
+    ({"comments": "body"}, 'Resource at "/comments" must be an object.'),
+    ({"comments": [{}, 1]}, 'Resource at "/comments/1" must be an object.'),
+    ({"comments": {"id": ["1"]}},
+     'Resource at "/comments" must have a string or integer id.'),
+    ({"comments": {"links": ["1"]}},
+     'Links at "/comments/links" must be an object.'),
+    ({"comments": {"links": {"post": ["1"]}}},
+     'Linkage at "/comments/links/post" must be an id or null.'),
+    ({"comments": {"links": {"post": True}}},
+     'Linkage at "/comments/links/post" must be an id or null.'),
+])
+def test_malformed_documents(client, document, detail):
+    with CaptureQueriesContext(connection) as queries:
+        response = post(client, reverse("comment-list"), document)
+
+    assert response.status_code == 400
+    assert response.content == dump_json({"errors": [{
+        "status": "400",
+        "detail": detail,
+    }]})
+    assert len(queries) == 0
+
+
+def test_to_many_linkage(client):
+    response = post(client, reverse("people-full-list"), {
+        "people": {"name": "test", "links": {"liked_comments": "1"}},
+    })
+
+    assert response.status_code == 400
+    assert b"must be a list of ids" in response.content
+
+
+def test_integer_ids(client):
+    response = client.generic(
+        "echo", reverse("pk-comment-list"),
+        data=json.dumps({"comments": {"body": "test", "links": {"post": 1}}}),
+        content_type="application/vnd.api+json")
+
+    assert response.data == {"body": "test", "post": 1}
+
+
+def test_relationship_linkage(client):
+    url = reverse("people-full-links", kwargs={
+        "pk": 1, "link_name": "liked_comments"})
+    response = client.put(
+        url, data=json.dumps({"comments": [{"id": "1"}]}),
+        content_type="application/vnd.api+json")
+
+    assert response.status_code == 400
+    assert b"must be a list of ids" in response.content
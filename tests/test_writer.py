@@ -0,0 +1,117 @@
+"""Test the single pass writer
+
+Every endpoint is rendered with the default renderer and with a renderer
+using `JsonApiWriter`, and both documents must contain the same data.
+"""
+
+from rest_framework_json_api.renderers import JsonApiRenderer
+from rest_framework_json_api.writers import JsonApiWriter
+from tests import models
+from tests import views
+from django.utils.encoding import force_text
+import json
+import pytest
+
+pytestmark = pytest.mark.django_db
+
+
+class WriterRenderer(JsonApiRenderer):
+    writer_class = JsonApiWriter
+
+
+@pytest.fixture()
+def content():
+    author = models.Person.objects.create(name="author")
+    fan = models.Person.objects.create(name=u"fan \u2603")
+    post = models.Post.objects.create(title="A post", author=author)
+    other = models.Post.objects.create(title="Another post", author=author)
+    comment = models.Comment.objects.create(post=post, body="First")
+    models.Comment.objects.create(post=post, body="Second")
+    models.Comment.objects.create(post=other, body="Third")
+
+    fan.favorite_post = post
+    fan.save()
+    fan.liked_comments.add(comment)
+
+
+def render_both(rf, viewset, actions, **kwargs):
+    request = rf.get("/")
+    responses = []
+
+    for renderer_class in (JsonApiRenderer, WriterRenderer):
+        view = viewset.as_view(actions, renderer_classes=(renderer_class, ))
+        response = view(request, **kwargs)
+        response.render()
+        responses.append(json.loads(force_text(response.content)))
+
+    return responses
+
+
+@pytest.mark.parametrize("viewset", [
+    views.CommentViewSet,
+    views.PersonViewSet,
+    views.PostViewSet,
+    views.MaximalPersonViewSet,
+    views.NestedCommentViewSet,
+    views.NestedPostViewSet,
+    views.PkCommentViewSet,
+    views.PkMaximalPersonViewSet,
+])
+def test_list_matches_default(rf, content, viewset):
+    expected, written = render_both(rf, viewset, {"get": "list"})
+
+    assert written == expected
+
+
+@pytest.mark.parametrize("viewset", [
+    views.NestedCommentViewSet,
+    views.NestedPostViewSet,
+    views.MaximalPersonViewSet,
+])
+def test_detail_matches_default(rf, content, viewset):
+    expected, written = render_both(
+        rf, viewset, {"get": "retrieve"}, pk="1")
+
+    assert written == expected
+
+
+def test_paginated_matches_default(rf, content):
+    class PaginatedPostViewSet(views.NestedPostViewSet):
+        paginate_by = 1
+
+    expected, written = render_both(rf, PaginatedPostViewSet, {"get": "list"})
+
+    assert written == expected
+    assert written["meta"]["pagination"]["posts"]["count"] == 2
+
+
+def test_compact_output(rf):
+    models.Person.objects.create(name="test")
+
+    view = views.PersonViewSet.as_view(
+        {"get": "retrieve"}, renderer_classes=(WriterRenderer, ))
+    response = view(rf.get("/"), pk="1")
+    response.render()
+
+    assert response.content == (
+        b'{"people":{"id":"1","href":"http://testserver/people/1/",'
+        b'"name":"test"}}')
+
+
+def test_plans_per_serializer_class(rf, content):
+    class PlanWriter(JsonApiWriter):
+        pass
+
+    class PlanRenderer(JsonApiRenderer):
+        writer_class = PlanWriter
+
+    for viewset in (views.CommentViewSet, views.PkCommentViewSet):
+        view = viewset.as_view(
+            {"get": "list"}, renderer_classes=(PlanRenderer, ))
+        view(rf.get("/")).render()
+
+    assert set(key[1] for key in PlanWriter.plans) == set([
+        views.CommentViewSet.serializer_class,
+        views.PkCommentViewSet.serializer_class,
+    ])
+    assert not any(key[0] is PlanRenderer for key in JsonApiWriter.plans)
@@ -1,11 +1,13 @@
 from django.conf.urls import patterns, include, url
-from rest_framework import routers
+from rest_framework_json_api.routers import JsonApiRouter
+from rest_framework_json_api.views import BatchView
 
 from tests import views
 
 
-router = routers.SimpleRouter()
+router = JsonApiRouter()
 
+router.register("articles", views.ArticleViewSet)
 router.register("comments", views.CommentViewSet)
 router.register("people", views.PersonViewSet)
 router.register("posts", views.PostViewSet)
@@ -18,10 +20,17 @@ router.register(
     "people-full", views.MaximalPersonViewSet, base_name="people-full")
 router.register(
     "pk-people-full", views.PkMaximalPersonViewSet, base_name="pk-people-full")
+router.register(
+    "patch-people", views.PatchPersonViewSet, base_name="patch-person")
+router.register(
+    "stale-people", views.StalePersonViewSet, base_name="stale-person")
 
 urlpatterns = router.urls
 
 urlpatterns += patterns(
     '',
+    url(r'^batch/$', BatchView.as_view(), name='batch'),
+    url(r'^atomic-batch/$', BatchView.as_view(atomic=True),
+        name='atomic-batch'),
     url('posts', include('tests.namespace_urls', namespace='n1'))
 )
@@ -1,3 +1,6 @@
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
 from django.utils.encoding import force_bytes
 import json
 
@@ -16,3 +19,24 @@ def dump_json(data):
         json_kwargs["separators"] = (", ", ": ", )
 
     return force_bytes(json.dumps(data, **json_kwargs))
+
+
+def count_queries(view, request, **kwargs):
+    """Return the number of queries run to respond and render the response"""
+    with CaptureQueriesContext(connection) as queries:
+        response = view(request, **kwargs)
+        response.render()
+
+    assert response.status_code == 200, response.content
+
+    return len(queries)
+
+
+def count_list_queries(viewset, page_size):
+    """Return the number of queries run to render a page of the list view"""
+    paginated = type(viewset.__name__, (viewset, ), {
+        "paginate_by": page_size,
+    })
+    view = paginated.as_view({"get": "list"})
+
+    return count_queries(view, RequestFactory().get("/"))
@@ -1,5 +1,8 @@
 from django.http import HttpResponse
 from rest_framework import viewsets
+from rest_framework_json_api.mixins import (
+    JsonPatchMixin, RelationshipMixin, StaleWhileRevalidateMixin, SyncMixin
+)
 from tests import models
 from tests import serializers
 
@@ -23,38 +26,84 @@ class EchoMixin(object):
         return response
 
 
+class ListPrefetchMixin(object):
+    """
+    Prefetches the `list_prefetch` relations for list views only, as the
+    prefetched relations of an updated object would be out of date.
+    """
+
+    list_prefetch = ()
+
+    def get_queryset(self):
+        queryset = super(ListPrefetchMixin, self).get_queryset()
+
+        if getattr(self, "action", None) == "list":
+            queryset = queryset.prefetch_related(*self.list_prefetch)
+
+        return queryset
+
+
+class ArticleViewSet(SyncMixin, viewsets.ModelViewSet):
+    queryset = models.Article.objects.order_by("pk")
+    serializer_class = serializers.ArticleSerializer
+    query_budget = 1
+
+
 class CommentViewSet(EchoMixin, viewsets.ModelViewSet):
     queryset = models.Comment.objects.all()
     serializer_class = serializers.CommentSerializer
+    query_budget = 2
 
 
 class PersonViewSet(EchoMixin, viewsets.ModelViewSet):
     queryset = models.Person.objects.all()
     serializer_class = serializers.PersonSerializer
+    query_budget = 2
 
 
-class PostViewSet(EchoMixin, viewsets.ModelViewSet):
+class PostViewSet(RelationshipMixin, EchoMixin, ListPrefetchMixin,
+                  viewsets.ModelViewSet):
     queryset = models.Post.objects.all()
+    list_prefetch = ("comments", )
     serializer_class = serializers.PostSerializer
+    query_budget = 4
 
 
-class MaximalPersonViewSet(viewsets.ModelViewSet):
+class MaximalPersonViewSet(RelationshipMixin, ListPrefetchMixin,
+                           viewsets.ModelViewSet):
     queryset = models.Person.objects.all()
+    list_prefetch = ("liked_comments", )
     serializer_class = serializers.MaximalPersonSerializer
+    query_budget = 4
 
 
 class NestedCommentViewSet(CommentViewSet):
+    queryset = models.Comment.objects.select_related("post")
     serializer_class = serializers.NestedCommentSerializer
+    query_budget = 2
 
 
 class NestedPostViewSet(PostViewSet):
     serializer_class = serializers.NestedPostSerializer
+    query_budget = 3
 
 
 class PkCommentViewSet(CommentViewSet):
     serializer_class = serializers.PkCommentSerializer
+    query_budget = 2
 
 
-class PkMaximalPersonViewSet(viewsets.ModelViewSet):
+class PkMaximalPersonViewSet(RelationshipMixin, ListPrefetchMixin,
+                             viewsets.ModelViewSet):
     queryset = models.Person.objects.all()
+    list_prefetch = ("liked_comments", )
     serializer_class = serializers.PkMaximalPersonSerializer
+    query_budget = 3
+
+
+class PatchPersonViewSet(JsonPatchMixin, PersonViewSet):
+    pass
+
+
+class StalePersonViewSet(StaleWhileRevalidateMixin, PersonViewSet):
+    pass